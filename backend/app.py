@@ -1,12 +1,66 @@
 # import `Flask` to create the web app
 # import `request` to handle incoming data, and import `jsonify` to send JSON responses
-from flask import Flask, request, jsonify
+# import `g` and `has_request_context` to keep one database connection per request
+# import `Response` to stream large results incrementally
+from flask import Flask, request, jsonify, g, has_request_context, Response
 from flask_cors import CORS  # Import CORS
 
+# import date/datetime/timedelta/timezone to validate due-date filters and report periods
+from datetime import date, datetime, timedelta, timezone
 
-# import sqlite3 to connect and interact with the SQLite database
+# import csv and io to write CSV exports chunk by chunk
+import csv
+import io
+
+# import time to measure request latency
+import time
+
+# import atexit to flush buffered writes when the process shuts down
+import atexit
+
+# import threading to guard the lazy creation of shared resources (pool, caches, buffers)
+import threading
+
+# import hashlib to fold query parameters into collection ETags
+import hashlib
+
+# import os to resolve the database path independently of the current working directory
+import os
+
+# import sqlite3 to recognize database errors raised by handlers (e.g. SQLITE_BUSY)
 import sqlite3
 
+# import the connection pool that hands out pre-tuned SQLite connections
+from db_pool import ConnectionPool, PoolTimeout, is_busy
+
+# import the schema migration runner so the database is brought up to date on startup
+import migrations
+
+# import the LRU+TTL cache used to remember user roles between requests
+from user_cache import LRUTTLCache
+
+# import the metrics registry behind the /metrics endpoint
+from metrics import MetricsRegistry
+
+# import the signed session tokens and the revocation denylist used for authentication
+from session_tokens import TokenSigner, SessionDenylist, sql_timestamp
+
+# import the write-behind buffer used by the time-logging endpoint
+from time_log_buffer import TimeLogBuffer, BufferFull
+
+# import the in-process change feed behind the /events endpoints
+from change_feed import ChangeFeed
+
+# import the full-text query builder used by the /search endpoint
+import search_index
+
+# import the archive table names, which reads fall through to, and the cascading project delete
+import archive
+
+# import the per-user workload summary and its background refresher, behind the manager dashboard
+import workload
+from workload import WorkloadRefresher
+
 # create an instance of the Flask class for the web app (i.e. initialize a new instance of the Flask app)
 app = Flask(__name__)
 
@@ -14,35 +68,213 @@ app = Flask(__name__)
 # This will allow the frontend to make requests to the backend without being blocked by the browser's CORS policy
 CORS(app)
 
+# Database configuration
+# The database path defaults to projects.db at the repository root and can be overridden with PROJECTS_DB
+app.config.setdefault('DATABASE', os.environ.get(
+    'PROJECTS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'projects.db')))
+# Connection pool settings (maximum connections, acquire timeout in seconds and per-connection tuning)
+app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', 8)))
+app.config.setdefault('DB_POOL_TIMEOUT', float(os.environ.get('DB_POOL_TIMEOUT', 5.0)))
+app.config.setdefault('DB_SYNCHRONOUS', os.environ.get('DB_SYNCHRONOUS', 'NORMAL'))
+app.config.setdefault('DB_MMAP_SIZE', int(os.environ.get('DB_MMAP_SIZE', 268435456)))
+app.config.setdefault('DB_CACHE_SIZE', int(os.environ.get('DB_CACHE_SIZE', -16000)))
+app.config.setdefault('DB_STATEMENT_CACHE_SIZE', int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 256)))
+# How long (ms) a statement waits for another writer's lock, and how often a write transaction is then retried
+# (with exponential backoff starting at DB_BUSY_BACKOFF seconds) before the request fails with 503
+app.config.setdefault('DB_BUSY_TIMEOUT', int(os.environ.get('DB_BUSY_TIMEOUT', 5000)))
+app.config.setdefault('DB_BUSY_RETRIES', int(os.environ.get('DB_BUSY_RETRIES', 3)))
+app.config.setdefault('DB_BUSY_BACKOFF', float(os.environ.get('DB_BUSY_BACKOFF', 0.05)))
+# Apply pending schema migrations when the first connection is opened (set AUTO_MIGRATE=0 to disable)
+app.config.setdefault('AUTO_MIGRATE', os.environ.get('AUTO_MIGRATE', '1') != '0')
+# User identity cache settings (maximum cached users and seconds before an entry is re-read)
+app.config.setdefault('USER_CACHE_SIZE', int(os.environ.get('USER_CACHE_SIZE', 10000)))
+app.config.setdefault('USER_CACHE_TTL', float(os.environ.get('USER_CACHE_TTL', 300.0)))
+# Session tokens: signing secret (must be shared by every worker process), token lifetime in seconds,
+# how often the revocation denylist is re-read from login_sessions, and whether the legacy `user_id` header is still accepted
+# (Flask predefines SECRET_KEY as None, so it is filled in explicitly; a random key only suits a single process)
+if not app.config.get('SECRET_KEY'):
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(32).hex()
+app.config.setdefault('TOKEN_TTL', int(os.environ.get('TOKEN_TTL', 3600)))
+app.config.setdefault('DENYLIST_SYNC_SECONDS', float(os.environ.get('DENYLIST_SYNC_SECONDS', 30)))
+app.config.setdefault('ALLOW_USER_ID_HEADER', os.environ.get('ALLOW_USER_ID_HEADER', '1') != '0')
+# Write-behind mode for time logging (off by default): batch size, flush latency in seconds,
+# queue bound, how long a request waits for queue space before getting a 503, and how many times a failed
+# batch is retried (with exponential backoff) before its entries are written one by one
+app.config.setdefault('TIME_LOG_BUFFER', os.environ.get('TIME_LOG_BUFFER', '0') == '1')
+app.config.setdefault('TIME_LOG_BATCH_SIZE', int(os.environ.get('TIME_LOG_BATCH_SIZE', 500)))
+app.config.setdefault('TIME_LOG_FLUSH_INTERVAL', float(os.environ.get('TIME_LOG_FLUSH_INTERVAL', 0.05)))
+app.config.setdefault('TIME_LOG_QUEUE_SIZE', int(os.environ.get('TIME_LOG_QUEUE_SIZE', 10000)))
+app.config.setdefault('TIME_LOG_ENQUEUE_TIMEOUT', float(os.environ.get('TIME_LOG_ENQUEUE_TIMEOUT', 1.0)))
+app.config.setdefault('TIME_LOG_FLUSH_RETRIES', int(os.environ.get('TIME_LOG_FLUSH_RETRIES', 5)))
+# Instrumentation: per-route latency histograms are always recorded when METRICS_ENABLED is on;
+# SQL_TRACE_SAMPLE_RATE is the fraction of statements timed, and statements slower than SLOW_QUERY_MS are flagged
+app.config.setdefault('METRICS_ENABLED', os.environ.get('METRICS_ENABLED', '1') != '0')
+app.config.setdefault('SQL_TRACE_SAMPLE_RATE', float(os.environ.get('SQL_TRACE_SAMPLE_RATE', 0.05)))
+app.config.setdefault('SLOW_QUERY_MS', float(os.environ.get('SLOW_QUERY_MS', 100)))
+# Change feed: how many recent events are kept for resuming clients, how many undelivered events a
+# subscriber may queue before it is told to reload, seconds between SSE keepalives, and the longest long-poll wait
+app.config.setdefault('CHANGE_FEED_HISTORY', int(os.environ.get('CHANGE_FEED_HISTORY', 10000)))
+app.config.setdefault('CHANGE_FEED_QUEUE_SIZE', int(os.environ.get('CHANGE_FEED_QUEUE_SIZE', 1000)))
+app.config.setdefault('CHANGE_FEED_HEARTBEAT', float(os.environ.get('CHANGE_FEED_HEARTBEAT', 15)))
+app.config.setdefault('CHANGE_FEED_POLL_TIMEOUT', float(os.environ.get('CHANGE_FEED_POLL_TIMEOUT', 25)))
+# Time report rollup cache: number of cached reports, seconds before one is recomputed, and the largest report (in rows) worth caching
+app.config.setdefault('REPORT_CACHE_SIZE', int(os.environ.get('REPORT_CACHE_SIZE', 256)))
+app.config.setdefault('REPORT_CACHE_TTL', float(os.environ.get('REPORT_CACHE_TTL', 3600)))
+app.config.setdefault('REPORT_CACHE_MAX_ROWS', int(os.environ.get('REPORT_CACHE_MAX_ROWS', 10000)))
+# Workload dashboard: seconds between refreshes of the users whose tasks or time logs changed,
+# and seconds between refreshes of every user (to pick up changes made outside the API)
+app.config.setdefault('WORKLOAD_REFRESH_INTERVAL', float(os.environ.get('WORKLOAD_REFRESH_INTERVAL', 2.0)))
+app.config.setdefault('WORKLOAD_FULL_REFRESH_SECONDS', float(os.environ.get('WORKLOAD_FULL_REFRESH_SECONDS', 900)))
+# ASGI server (asgi.py): executor threads, each pinned to one pooled connection (keep DB_POOL_SIZE above it:
+# exports, the time log buffer and the workload refresher take connections from the pool too), the most requests
+# waiting for or holding a thread before new ones get a 503, how long (seconds) a request may wait for a thread,
+# and the most response streams (exports, /events) open at once
+app.config.setdefault('ASGI_THREADS', int(os.environ.get('ASGI_THREADS', 4)))
+app.config.setdefault('ASGI_MAX_PENDING', int(os.environ.get('ASGI_MAX_PENDING', 64)))
+app.config.setdefault('ASGI_QUEUE_TIMEOUT', float(os.environ.get('ASGI_QUEUE_TIMEOUT', 5.0)))
+app.config.setdefault('ASGI_MAX_STREAMS', int(os.environ.get('ASGI_MAX_STREAMS', 64)))
+
+# Lock held while a shared resource is created on first use, so concurrent first requests create it once
+_init_lock = threading.RLock()
+
+# Connection pinned to the current thread by pin_connection (the ASGI server's executor threads)
+_pinned = threading.local()
+
+
+
+# function to get (and lazily create) the metrics registry for this app
+def get_metrics():
+    registry = app.extensions.get('metrics')
+
+    if registry is None:
+        with _init_lock:
+            registry = app.extensions.get('metrics')
+            if registry is None:
+                registry = MetricsRegistry(sample_rate=app.config['SQL_TRACE_SAMPLE_RATE'],
+                                           slow_query_seconds=app.config['SLOW_QUERY_MS'] / 1000.0)
+
+                # Expose the state of the shared components alongside the request and SQL metrics
+                registry.add_gauge_source('db_pool', lambda: get_pool().stats())
+                registry.add_gauge_source('user_cache', lambda: get_user_cache().stats())
+                registry.add_gauge_source('session_denylist', lambda: get_session_denylist().stats())
+                registry.add_gauge_source('time_log_buffer', lambda: app.extensions['time_log_buffer'].stats()
+                                          if 'time_log_buffer' in app.extensions else {})
+                registry.add_gauge_source('change_feed', lambda: get_change_feed().stats())
+                registry.add_gauge_source('report_cache', lambda: get_report_cache().stats())
+                registry.add_gauge_source('workload', lambda: get_workload_refresher().stats())
+                app.extensions['metrics'] = registry
+
+    return registry
+
+
+
+# function to get (and lazily create) the user identity cache for this app
+def get_user_cache():
+    cache = app.extensions.get('user_cache')
+
+    if cache is None:
+        with _init_lock:
+            cache = app.extensions.get('user_cache')
+            if cache is None:
+                cache = LRUTTLCache(max_size=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+                app.extensions['user_cache'] = cache
+
+    return cache
+
 
 
 # Helper function to get user role from the database based on authenticated session or token
 def get_user_role(user_id):
-    # Connect to the database to fetch user details
-    conn = get_db_connection()
-    
-    # Execute a query to get the role of the user with the provided user_id
-    user = conn.execute('SELECT role FROM users WHERE user_id = ?', (user_id,)).fetchone()
-    
-    # Close the database connection to free up resources
-    conn.close()
+    # Serve the role from the cache when possible; users are only added to the users table by other
+    # processes (seed_database.py, generate_data.py), so an unknown user is looked up again on every request
+    # rather than cached, and a role change takes effect once the cached entry expires (USER_CACHE_TTL)
+    cache = get_user_cache()
+    role = cache.get(str(user_id))
+
+    if role is LRUTTLCache.MISSING:
+        # Connect to the database to fetch user details
+        conn = get_db_connection()
+        
+        # Execute a query to get the role of the user with the provided user_id
+        user = conn.execute('SELECT role FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        
+        # Close the database connection to free up resources
+        conn.close()
+
+        role = user['role'] if user else None
+        if role is not None:
+            cache.set(str(user_id), role)
 
     # Return the user's role if found; otherwise, default to 'Team Member'
-    return user['role'] if user else 'Team Member'
+    return role if role is not None else 'Team Member'
 
 
 
-# Helper function that checks if the user making a request has the necessary role to perform a specific action
-def check_role(required_role):
-    # Extract user ID from the request headers (assuming it's sent with headers)
+# function to get (and lazily create) the session token signer for this app
+def get_token_signer():
+    signer = app.extensions.get('token_signer')
+
+    if signer is None:
+        with _init_lock:
+            signer = app.extensions.get('token_signer')
+            if signer is None:
+                signer = TokenSigner(app.config['SECRET_KEY'], ttl=app.config['TOKEN_TTL'])
+                app.extensions['token_signer'] = signer
+
+    return signer
+
+
+
+# function to get (and lazily create) the revoked session denylist for this app
+def get_session_denylist():
+    denylist = app.extensions.get('session_denylist')
+
+    if denylist is None:
+        with _init_lock:
+            denylist = app.extensions.get('session_denylist')
+            if denylist is None:
+                denylist = SessionDenylist(get_pool().acquire, sync_interval=app.config['DENYLIST_SYNC_SECONDS'])
+                app.extensions['session_denylist'] = denylist
+
+    return denylist
+
+
+
+# Helper function that identifies the user making a request
+# Returns (user_id, role, claims, error_response); `user_id` is an int, `claims` is None for the legacy header
+def authenticate():
+    # Preferred: a signed session token, verified in memory without touching the database
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        claims = get_token_signer().verify(authorization[len('Bearer '):].strip())
+        if claims is None or get_session_denylist().is_revoked(claims['sid']):
+            return None, None, None, (jsonify({"message": "Unauthorized: Invalid or expired token"}), 401)
+        return int(claims['uid']), claims['role'], claims, None
+
+    # Legacy: a bare user ID header, whose role is looked up (through the cache)
     user_id = request.headers.get('user_id')
     
     # If user_id is missing, return unauthorized response
-    if not user_id:
-        return jsonify({"message": "Unauthorized: User ID is missing"}), 401
+    if not user_id or not app.config['ALLOW_USER_ID_HEADER']:
+        return None, None, None, (jsonify({"message": "Unauthorized: User ID is missing"}), 401)
+
+    # A user ID is a number; anything else identifies nobody
+    if not user_id.strip().isdecimal():
+        return None, None, None, (jsonify({"message": "Unauthorized: Invalid user ID"}), 401)
 
-    # Get the user's role from the database
-    role = get_user_role(user_id)
+    user_id = int(user_id)
+    return user_id, get_user_role(user_id), None, None
+
+
+
+# Helper function that checks if the user making a request has the necessary role to perform a specific action
+def check_role(required_role):
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, role, _, auth_error = authenticate()
+    
+    # If the user could not be identified, return unauthorized response
+    if auth_error:
+        return auth_error
     
     # If the user's role does not match the required role, return a permission error response
     if role != required_role:
@@ -53,15 +285,269 @@ def check_role(required_role):
 
 
 
+# function to get (and lazily create) the connection pool for this app
+def get_pool():
+    pool = app.extensions.get('db_pool')
+
+    # Build the pool from the app configuration the first time it is needed
+    if pool is None:
+        with _init_lock:
+            pool = app.extensions.get('db_pool')
+            if pool is None:
+                # Bring the schema up to date before any request touches it
+                if app.config['AUTO_MIGRATE']:
+                    migrations.migrate(app.config['DATABASE'])
+
+                pool = ConnectionPool(
+                    app.config['DATABASE'],
+                    max_size=app.config['DB_POOL_SIZE'],
+                    timeout=app.config['DB_POOL_TIMEOUT'],
+                    synchronous=app.config['DB_SYNCHRONOUS'],
+                    mmap_size=app.config['DB_MMAP_SIZE'],
+                    cache_size=app.config['DB_CACHE_SIZE'],
+                    statement_cache_size=app.config['DB_STATEMENT_CACHE_SIZE'],
+                    busy_timeout=app.config['DB_BUSY_TIMEOUT'],
+                    busy_retries=app.config['DB_BUSY_RETRIES'],
+                    busy_backoff=app.config['DB_BUSY_BACKOFF'],
+                    # Sampled per-statement timing, when instrumentation is on
+                    tracer=get_metrics() if app.config['METRICS_ENABLED'] else None,
+                )
+                app.extensions['db_pool'] = pool
+
+    return pool
+
+
+
 # function to get a connection to the SQLite database
 def get_db_connection():
 
-    # create a connection to the projects (SQLite) database
-    connection = sqlite3.connect('../projects.db')
-    # configure connection to return rows as dictionaries, allowing access by column name
-    connection.row_factory = sqlite3.Row 
-    
-    return connection
+    # Outside of a request (scripts, shell), hand out a pooled connection directly;
+    # calling `close()` on it returns it to the pool
+    if not has_request_context():
+        return get_pool().acquire()
+
+    # Within a request, every helper shares the same connection: the thread's pinned connection if it has one,
+    # otherwise one from the pool (rows are returned as dictionaries, allowing access by column name)
+    if 'db' not in g:
+        connection = getattr(_pinned, 'connection', None) or get_pool().acquire()
+        # `close()` is a no-op for a request-scoped connection; it is released on teardown
+        connection.request_scoped = True
+        g.db = connection
+
+    return g.db
+
+
+
+# Take a pooled connection for good and pin it to the calling thread: requests served on this thread use it,
+# so the connection is only ever used from one thread (see asgi.py)
+def pin_connection():
+    _pinned.connection = get_pool().acquire()
+    return _pinned.connection
+
+
+
+# Give the calling thread's pinned connection back to the pool (when its thread is about to end)
+def unpin_connection():
+    connection = getattr(_pinned, 'connection', None)
+    if connection is not None:
+        del _pinned.connection
+        get_pool().release(connection)
+
+
+
+# The connection pinned to the calling thread, or None
+def pinned_connection():
+    return getattr(_pinned, 'connection', None)
+
+
+
+# function to get (and lazily start) the time log write-behind buffer for this app
+def get_time_log_buffer():
+    buffer = app.extensions.get('time_log_buffer')
+
+    if buffer is None:
+        with _init_lock:
+            buffer = app.extensions.get('time_log_buffer')
+            if buffer is None:
+                buffer = TimeLogBuffer(
+                    get_pool().acquire,
+                    batch_size=app.config['TIME_LOG_BATCH_SIZE'],
+                    flush_interval=app.config['TIME_LOG_FLUSH_INTERVAL'],
+                    max_queue=app.config['TIME_LOG_QUEUE_SIZE'],
+                    enqueue_timeout=app.config['TIME_LOG_ENQUEUE_TIMEOUT'],
+                    on_flush=lambda user_ids: get_workload_refresher().mark_dirty(user_ids),
+                    max_retries=app.config['TIME_LOG_FLUSH_RETRIES'],
+                ).start()
+                app.extensions['time_log_buffer'] = buffer
+
+                # Write out everything still queued when the process exits
+                atexit.register(buffer.stop)
+
+    return buffer
+
+
+
+# function to get (and lazily create) the change feed for this app
+def get_change_feed():
+    feed = app.extensions.get('change_feed')
+
+    if feed is None:
+        with _init_lock:
+            feed = app.extensions.get('change_feed')
+            if feed is None:
+                feed = ChangeFeed(history_size=app.config['CHANGE_FEED_HISTORY'],
+                                  subscriber_queue_size=app.config['CHANGE_FEED_QUEUE_SIZE'])
+                app.extensions['change_feed'] = feed
+
+    return feed
+
+
+
+# Helper function that publishes a change event to /events subscribers, and marks the users whose tasks
+# it concerns for a workload refresh
+# Must be called after the change has been committed, so subscribers never see a change that was rolled back;
+# for the same reason it never raises: the write has happened, and the client is told so
+def publish_change(event_type, project_id=None, user_ids=(), **data):
+    try:
+        get_change_feed().publish(event_type, project_id=project_id, user_ids=user_ids, **data)
+        get_workload_refresher().mark_dirty(user_ids)
+    except Exception:
+        app.logger.exception('Failed to publish %s', event_type)
+
+
+
+# function to get (and lazily start) the workload summary refresher for this app
+def get_workload_refresher():
+    refresher = app.extensions.get('workload_refresher')
+
+    if refresher is None:
+        with _init_lock:
+            refresher = app.extensions.get('workload_refresher')
+            if refresher is None:
+                refresher = WorkloadRefresher(get_pool().acquire,
+                                              interval=app.config['WORKLOAD_REFRESH_INTERVAL'],
+                                              full_refresh_interval=app.config['WORKLOAD_FULL_REFRESH_SECONDS']).start()
+                app.extensions['workload_refresher'] = refresher
+                atexit.register(refresher.stop)
+
+    return refresher
+
+
+
+# function to get (and lazily create) the cache of time report rollups for closed periods
+def get_report_cache():
+    cache = app.extensions.get('report_cache')
+
+    if cache is None:
+        with _init_lock:
+            cache = app.extensions.get('report_cache')
+            if cache is None:
+                cache = LRUTTLCache(max_size=app.config['REPORT_CACHE_SIZE'], ttl=app.config['REPORT_CACHE_TTL'])
+                app.extensions['report_cache'] = cache
+
+    return cache
+
+
+
+# Statements that read the hot indexes once, so their pages are in the OS page cache (shared by every worker
+# through mmap) before the first request; each one reads an index rather than the table rows
+WARM_UP_QUERIES = [
+    'SELECT COUNT(*) FROM tasks INDEXED BY idx_tasks_assigned_version',
+    'SELECT COUNT(*) FROM tasks INDEXED BY idx_tasks_project_status',
+    'SELECT COUNT(*) FROM project_progress',
+]
+
+
+
+# Create this process's shared components ahead of the first request and preload what they serve
+# Called by serve.py in every worker after it has been forked (pools and threads must not be shared across a fork)
+# Returns a summary of what was warmed
+def warm_up():
+    pool = get_pool()
+
+    # Open the pooled connections now, so requests do not pay for the pragmas and schema parsing
+    connections = [pool.acquire() for _ in range(pool.max_size)]
+    try:
+        conn = connections[0]
+
+        # Fill the role cache with as many users as it holds
+        cache = get_user_cache()
+        users = conn.execute('SELECT user_id, role FROM users LIMIT ?', (app.config['USER_CACHE_SIZE'],)).fetchall()
+        for user in users:
+            cache.set(str(user['user_id']), user['role'])
+
+        for statement in WARM_UP_QUERIES:
+            conn.execute(statement).fetchall()
+    finally:
+        for connection in connections:
+            connection.close()
+
+    # Revocations are pulled now rather than by the first authenticated request
+    get_session_denylist().sync()
+    get_token_signer()
+    get_change_feed()
+    get_report_cache()
+    get_workload_refresher()
+    if app.config['METRICS_ENABLED']:
+        get_metrics()
+
+    return {"connections": len(connections), "cached_users": len(users)}
+
+
+
+# Answer 503 with Retry-After when the database stayed locked by other writers (after busy_timeout and the
+# BEGIN IMMEDIATE retries) or no pooled connection became free; both are transient overload, not server errors
+@app.errorhandler(sqlite3.OperationalError)
+@app.errorhandler(PoolTimeout)
+def database_unavailable(error):
+    if isinstance(error, sqlite3.OperationalError) and not is_busy(error):
+        raise error
+    response = jsonify({"message": "Service unavailable: the database is busy, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+
+# Return the request's connection to the pool once the request is finished
+# (a pinned connection stays with its thread, and is only made ready for the next request)
+@app.teardown_appcontext
+def release_db_connection(exception):
+    connection = g.pop('db', None)
+    if connection is None:
+        return
+    if connection is pinned_connection():
+        connection.request_scoped = False
+        if connection.in_transaction:
+            connection.rollback()
+    else:
+        get_pool().release(connection)
+
+
+
+# Start the request timer
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+
+# Record the request's latency under its route pattern (e.g. /tasks/<int:task_id>), method and status
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None and app.config['METRICS_ENABLED']:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        get_metrics().observe_request(request.method, route, response.status_code, time.perf_counter() - started)
+    return response
+
+
+
+# Metrics in the Prometheus text exposition format
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({"message": "Metrics are disabled"}), 404
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
 
 
 
@@ -87,16 +573,47 @@ def login_user():
     # Connect to the database
     conn = get_db_connection()
 
-    # Retrieves user information from the database for matching credentials and closes the connection
+    # Retrieves user information from the database for matching credentials
     user = conn.execute('SELECT * FROM users WHERE username = ? AND password = ?', (username, password)).fetchone()
-    conn.close()
     
-    # Checks if user exists; 
-    # if so, returns success message with role and user ID, otherwise returns an error message for invalid credentials
-    if user:
-        return jsonify({"message": "Login successful", "role": user['role'], "user_id": user['user_id']}), 200
-    else:
+    # Returns an error message for invalid credentials
+    if not user:
+        conn.close()
         return jsonify({"message": "Invalid credentials"}), 401
+
+    # Record the session, then issue a signed token that carries the user ID, role and expiry
+    signer = get_token_signer()
+    now = time.time()
+    cursor = conn.execute('INSERT INTO login_sessions (user_id, expires_at) VALUES (?, ?)', (user['user_id'], sql_timestamp(now + signer.ttl)))
+    conn.commit()
+    conn.close()
+    token, expires = signer.issue(user['user_id'], user['role'], cursor.lastrowid, now=now)
+
+    # Returns success message with role, user ID and the session token
+    return jsonify({"message": "Login successful", "role": user['role'], "user_id": user['user_id'],
+                    "token": token, "expires_at": expires}), 200
+
+
+
+# Log out: revoke the session behind the token
+@app.route('/logout', methods=['POST'])
+def logout_user():
+    user_id, _, claims, auth_error = authenticate()
+    if auth_error:
+        return auth_error
+
+    # Only token-based sessions can be revoked
+    if claims is None:
+        return jsonify({"message": "Invalid input: a session token is required to log out"}), 400
+
+    # Mark the session revoked for every worker, and deny it in this process right away
+    conn = get_db_connection()
+    conn.execute('UPDATE login_sessions SET revoked_at = CURRENT_TIMESTAMP WHERE session_id = ? AND user_id = ?', (claims['sid'], user_id))
+    conn.commit()
+    conn.close()
+    get_session_denylist().add(claims['sid'], claims['exp'])
+
+    return jsonify({"message": "Logout successful"}), 200
     
 
 
@@ -125,15 +642,16 @@ def create_project():
     # Connect to the database
     conn = get_db_connection()
     # Inserts a new project into the database with the provided project details (name, description, start date, end date)
-    conn.execute('INSERT INTO projects (project_name, description, start_date, end_date) VALUES (?, ?, ?, ?)',
+    cursor = conn.execute('INSERT INTO projects (project_name, description, start_date, end_date) VALUES (?, ?, ?, ?)',
                  (project_name, description, start_date, end_date))
     
     # Commits the transaction to save changes and closes the database connection
     conn.commit()
     conn.close()
+    publish_change('project.created', project_id=cursor.lastrowid, project_name=project_name)
 
-    # Returns a success message indicating the project was created, with a 201 status code 
-    return jsonify({"message": "Project created successfully"}), 201
+    # Returns a success message indicating the project was created (with its new id), with a 201 status code 
+    return jsonify({"message": "Project created successfully", "project_id": cursor.lastrowid}), 201
 
 
 
@@ -148,22 +666,143 @@ def view_project(project_id):
     # Connect to the database
     conn = get_db_connection()
 
+    # Conditional GET: if the client's copy is current, answer 304 from the version alone
+    if request.if_none_match:
+        current = (conn.execute('SELECT version FROM projects WHERE project_id = ?', (project_id,)).fetchone()
+                   or conn.execute('SELECT version FROM archived_projects WHERE project_id = ?', (project_id,)).fetchone())
+        if current and project_etag(project_id, current['version']) in request.if_none_match:
+            conn.close()
+            return not_modified(project_etag(project_id, current['version']))
+
     # Retrieve the project from the database
     project = conn.execute('SELECT * FROM projects WHERE project_id = ?', (project_id,)).fetchone()
 
+    # A project missing from the hot table may have been archived (see archive.py); it then carries archived_at
+    if not project:
+        project = conn.execute('SELECT * FROM archived_projects WHERE project_id = ?', (project_id,)).fetchone()
+
     # Return error if the project does not exist
     if not project:
         conn.close()
         return jsonify({"message": "Project not found"}), 404
 
-    # Return the project details
+    # Return the project details, tagged with its version
     project_details = dict(project)
     conn.close()
-    return jsonify(project_details), 200
+    response = jsonify(project_details)
+    response.set_etag(project_etag(project_id, project_details['version']))
+    return response, 200
+
+
+
+# Strong ETag of a project row (versions come from a database-wide counter, see migration 6)
+def project_etag(project_id, version):
+    return f'project-{project_id}-v{version}'
+
+
+
+# Empty 304 Not Modified response carrying the current ETag
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+
+# Strong ETag of a task row
+def task_etag(task_id, version):
+    return f'task-{task_id}-v{version}'
+
+
+
+# Helper function that reads an optimistic concurrency precondition from the If-Match header:
+# the row's ETag (e.g. "project-5-v42") or its bare version number ("42")
+# Returns (expected version or None when there is no precondition, error_response)
+def read_if_match(kind, row_id):
+    if not request.if_match or request.if_match.star_tag:
+        return None, None
+
+    prefix = f'{kind}-{row_id}-v'
+    for tag in request.if_match.as_set():
+        version = tag[len(prefix):] if tag.startswith(prefix) else tag
+        if version.isdigit():
+            return int(version), None
+
+    # A tag for another row (or in another format) can never match
+    return None, (jsonify({"message": "Precondition failed: If-Match does not name a version of this resource"}), 412)
+
+
+
+# Helper function that takes the next row version (see migration 6) for a write that stamps it itself
+# Must be called inside the write transaction; a statement that changes `version` skips the version trigger
+def next_row_version(conn):
+    return conn.execute('UPDATE row_version_counter SET value = value + 1 WHERE id = 1 RETURNING value').fetchone()[0]
+
+
+
+# Helper function that explains why a conditional write matched no row, after rolling it back:
+# 412 with the current version when the row exists but the precondition failed, 409 when the row has been
+# archived (archived rows are read-only), 404 otherwise
+def write_missed(conn, table, key, row_id, expected, etag, not_found_message, extra_condition='', extra_params=()):
+    conn.rollback()
+
+    # Only the failure path reads the row, and only when a precondition could be the reason
+    if expected is not None:
+        current = conn.execute(f'SELECT version FROM {table} WHERE {key} = ?{extra_condition}', (row_id, *extra_params)).fetchone()
+        if current:
+            conn.close()
+            response = jsonify({"message": "Precondition failed: the resource was modified by someone else", "version": current[0]})
+            response.set_etag(etag(row_id, current[0]))
+            return response, 412
+
+    archived = conn.execute(f'SELECT 1 FROM {archive.ARCHIVE_TABLES[table]} WHERE {key} = ?{extra_condition}', (row_id, *extra_params)).fetchone()
+    conn.close()
+    if archived:
+        return jsonify({"message": "Conflict: archived projects and tasks are read-only (restore the project first)"}), 409
+    return jsonify({"message": not_found_message}), 404
+
+
+
+# Success response of a write that stamped a new version, carrying the row's new ETag
+def written(message, etag, version):
+    response = jsonify({"message": message, "version": version})
+    response.set_etag(etag)
+    return response, 200
+
+
+
+# View Project Progress (Manager Access Only)
+# Served from the per-project counters maintained by triggers, so the cost does not depend on the number of tasks
+@app.route('/projects/<int:project_id>/progress', methods=['GET'])
+def view_project_progress(project_id):
+    # Check if the user has 'Manager' access
+    access_error = check_role('Manager')
+    if access_error:
+        return access_error
+
+    # Connect to the database and read the project's counters
+    conn = get_db_connection()
+    progress = conn.execute('SELECT * FROM project_progress WHERE project_id = ?', (project_id,)).fetchone()
+
+    # An archived project keeps the counters it had when it was archived
+    if not progress:
+        progress = conn.execute('SELECT * FROM archived_project_progress WHERE project_id = ?', (project_id,)).fetchone()
+    conn.close()
+
+    # Return error if the project does not exist
+    if not progress:
+        return jsonify({"message": "Project not found"}), 404
+
+    # Completion percentage is the share of tasks marked 'Completed'
+    progress_details = dict(progress)
+    total = progress_details['total_tasks']
+    progress_details['completion_percentage'] = round(100.0 * progress_details['completed'] / total, 2) if total else 0.0
+    return jsonify(progress_details), 200
 
 
 
 # Update Project Details (Manager Access Only)
+# Send If-Match with the project's ETag (or version) to update only if nobody changed it in the meantime
 @app.route('/projects/<int:project_id>', methods=['PUT'])
 def update_project(project_id):
     # Check if the user has 'Manager' access
@@ -171,42 +810,58 @@ def update_project(project_id):
     if access_error:
         return access_error
 
+    expected, precondition_error = read_if_match('project', project_id)
+    if precondition_error:
+        return precondition_error
+
     # Get the updated project data from the request
     data = request.get_json()
     project_name = data.get('project_name', None)
     description = data.get('description', None)
     start_date = data.get('start_date', None)
     end_date = data.get('end_date', None)
+    status = data.get('status', None)
 
-    # Connect to the database and retrieve the project
-    conn = get_db_connection()
-    project = conn.execute('SELECT * FROM projects WHERE project_id = ?', (project_id,)).fetchone()
-
-    # Return error if the project does not exist
-    if not project:
-        conn.close()
-        return jsonify({"message": "Project not found"}), 404
+    # Validate that the status is one of the allowed values, if provided (completed projects can be archived)
+    allowed_statuses = ['In Progress', 'Completed']
+    if status and status not in allowed_statuses:
+        return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
 
-    # Update the project with the new values or retain the old ones if not provided
-    conn.execute('''
+    # Update the project in one statement, with the new values or the old ones if not provided;
+    # a missing project (or a failed precondition) shows up as no row returned
+    conn = get_db_connection()
+    conn.begin_immediate()
+    version = next_row_version(conn)
+    updated = conn.execute('''
         UPDATE projects
         SET project_name = COALESCE(?, project_name),
             description = COALESCE(?, description),
             start_date = COALESCE(?, start_date),
-            end_date = COALESCE(?, end_date)
-        WHERE project_id = ?
-    ''', (project_name, description, start_date, end_date, project_id))
+            end_date = COALESCE(?, end_date),
+            status = COALESCE(?, status),
+            version = ?
+        WHERE project_id = ? AND (? IS NULL OR version = ?)
+        RETURNING project_id
+    ''', (project_name, description, start_date, end_date, status, version, project_id, expected, expected)).fetchone()
+
+    if not updated:
+        return write_missed(conn, 'projects', 'project_id', project_id, expected, project_etag, "Project not found")
 
     # Commit the changes and close the connection
     conn.commit()
     conn.close()
+    publish_change('project.updated', project_id=project_id, version=version,
+                   changes={name: value for name, value in (('project_name', project_name), ('description', description),
+                                                            ('start_date', start_date), ('end_date', end_date), ('status', status))
+                            if value is not None})
 
-    # Return a success message indicating the project was updated
-    return jsonify({"message": "Project updated successfully"}), 200
+    # Return a success message indicating the project was updated, with its new version
+    return written("Project updated successfully", project_etag(project_id, version), version)
 
 
 
 # Delete a Project (Manager Access Only)
+# Send If-Match with the project's ETag (or version) to delete only if nobody changed it in the meantime
 @app.route('/projects/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
     # Check if the user has 'Manager' access
@@ -214,24 +869,46 @@ def delete_project(project_id):
     if access_error:
         return access_error
 
-    # Connect to the database and check if the project exists
-    conn = get_db_connection()
-    project = conn.execute('SELECT * FROM projects WHERE project_id = ?', (project_id,)).fetchone()
-
-    # Return error if the project does not exist
-    if not project:
-        conn.close()
-        return jsonify({"message": "Project not found"}), 404
+    expected, precondition_error = read_if_match('project', project_id)
+    if precondition_error:
+        return precondition_error
 
-    # Delete the project from the database
-    conn.execute('DELETE FROM projects WHERE project_id = ?', (project_id,))
+    # Delete the project in one statement; no row returned means it does not exist (or the precondition failed)
+    # An archived project can be deleted too, from the archive tables
+    conn = get_db_connection()
+    conn.begin_immediate()
+    archived = False
+    deleted = conn.execute('DELETE FROM projects WHERE project_id = ? AND (? IS NULL OR version = ?) RETURNING project_id',
+                           (project_id, expected, expected)).fetchone()
+    if not deleted:
+        archived = True
+        deleted = conn.execute('DELETE FROM archived_projects WHERE project_id = ? AND (? IS NULL OR version = ?) RETURNING project_id',
+                               (project_id, expected, expected)).fetchone()
+
+    if not deleted:
+        # Deleting is the one write allowed on an archived project, so its stale version is a failed precondition
+        stale = expected is not None and conn.execute('SELECT version FROM archived_projects WHERE project_id = ?', (project_id,)).fetchone()
+        if stale:
+            conn.rollback()
+            conn.close()
+            response = jsonify({"message": "Precondition failed: the resource was modified by someone else", "version": stale[0]})
+            response.set_etag(project_etag(project_id, stale[0]))
+            return response, 412
+        return write_missed(conn, 'projects', 'project_id', project_id, expected, project_etag, "Project not found")
+
+    # Delete its tasks, time logs, team memberships and counters with one statement per table
+    removed = archive.delete_project_dependents(conn, project_id, archived=archived)
 
     # Commit the changes and close the connection
     conn.commit()
     conn.close()
+    publish_change('project.deleted', project_id=project_id)
+    # The deleted tasks' assignees are not known here, so every workload row is recomputed
+    if removed['tasks']:
+        get_workload_refresher().mark_all_dirty()
 
-    # Return a success message indicating the project was deleted
-    return jsonify({"message": "Project deleted successfully"}), 200
+    # Return a success message indicating the project was deleted, with the number of tasks deleted with it
+    return jsonify({"message": "Project deleted successfully", "deleted_tasks": removed['tasks']}), 200
 
 
 
@@ -255,30 +932,37 @@ def create_task():
     description = data.get('description', '')
     due_date = data.get('due_date', None)
     status = data.get('status', 'Not Started')  # Default status is 'Not Started' if not provided
-    assigned_user_id = data.get('assigned_user_id', None)
+    assigned_user_id = parse_id(data.get('assigned_user_id', None))
     
     # Validate that the status is one of the allowed values
     allowed_statuses = ['Not Started', 'In Progress', 'Completed']
     if status not in allowed_statuses:
         return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
 
+    # Validate the assignee before writing (an integer, or a string of digits)
+    if assigned_user_id is INVALID_ID:
+        return jsonify({"message": "Invalid input: assigned_user_id must be an integer"}), 400
+
     # Connect to the database
     conn = get_db_connection()
 
     # Inserts a new task into the database linked to a project, using the provided details (project ID, task name, description, due date, status, assigned user)
-    conn.execute('INSERT INTO tasks (project_id, task_name, description, due_date, status, assigned_user_id) VALUES (?, ?, ?, ?, ?, ?)',
+    cursor = conn.execute('INSERT INTO tasks (project_id, task_name, description, due_date, status, assigned_user_id) VALUES (?, ?, ?, ?, ?, ?)',
         (project_id, task_name, description, due_date, status, assigned_user_id))
     
     # Commits the transaction to save changes and closes the database connection
     conn.commit()
     conn.close()
+    publish_change('task.created', project_id=project_id, user_ids=[assigned_user_id], task_id=cursor.lastrowid,
+                   task_name=task_name, status=status, assigned_user_id=assigned_user_id)
 
-    # Returns a success message indicating the task was created, with a 201 status code 
-    return jsonify({"message": "Task created successfully"}), 201
+    # Returns a success message indicating the task was created (with its new id), with a 201 status code 
+    return jsonify({"message": "Task created successfully", "task_id": cursor.lastrowid}), 201
 
 
 
 # Assign or Reassign a Task (Manager Access Only)
+# Send If-Match with the task's version to reassign only if nobody changed it in the meantime
 @app.route('/tasks/<int:task_id>/assign', methods=['PUT'])
 def assign_task(task_id):
 
@@ -287,36 +971,265 @@ def assign_task(task_id):
     if access_error:
         return access_error
 
+    expected, precondition_error = read_if_match('task', task_id)
+    if precondition_error:
+        return precondition_error
+
     # Get the assigned user ID from the request data
     data = request.get_json()
-    assigned_user_id = data.get('assigned_user_id')
+    assigned_user_id = parse_id(data.get('assigned_user_id'))
 
-    # Validate that assigned_user_id is provided
+    # Validate that assigned_user_id is provided, as an integer (or a string of digits)
     if not assigned_user_id:
         return jsonify({"message": "Invalid input: assigned_user_id must be provided"}), 400
+    if assigned_user_id is INVALID_ID:
+        return jsonify({"message": "Invalid input: assigned_user_id must be an integer"}), 400
 
-    # Connect to the database
+    # Connect to the database and take the write lock
     conn = get_db_connection()
+    conn.begin_immediate()
 
-    # Check if the task exists
-    task = conn.execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
-    if not task:
-        conn.close()
-        return jsonify({"message": "Task not found"}), 404
+    # The previous assignee is only needed to notify them through the change feed (RETURNING reports new values)
+    previous = conn.execute('SELECT assigned_user_id FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+
+    # Update the assigned_user_id of the task; no row returned means it does not exist (or the precondition failed)
+    version = next_row_version(conn)
+    updated = conn.execute('UPDATE tasks SET assigned_user_id = ?, version = ? WHERE task_id = ? AND (? IS NULL OR version = ?) RETURNING project_id',
+                           (assigned_user_id, version, task_id, expected, expected)).fetchone()
 
-    # Update the assigned_user_id of the task
-    conn.execute('UPDATE tasks SET assigned_user_id = ? WHERE task_id = ?', (assigned_user_id, task_id))
+    if not updated:
+        return write_missed(conn, 'tasks', 'task_id', task_id, expected, task_etag, "Task not found")
 
     # Commit the changes and close the connection
     conn.commit()
     conn.close()
 
+    # Both the previous and the new assignee are told about the reassignment
+    previous_user_id = previous['assigned_user_id'] if previous else None
+    publish_change('task.assigned', project_id=updated['project_id'], user_ids=[previous_user_id, assigned_user_id],
+                   task_id=task_id, assigned_user_id=assigned_user_id, previous_user_id=previous_user_id, version=version)
+
     # Return a success message indicating the task was assigned or reassigned
-    return jsonify({"message": "Task assigned/reassigned successfully"}), 200
+    return written("Task assigned/reassigned successfully", task_etag(task_id, version), version)
+
+
+
+# Largest number of items accepted by a bulk endpoint in one request
+MAX_BULK_SIZE = 1000
+
+
+
+# Placeholder for an id given in a form that is not an integer (a 400, or a bulk item's error)
+INVALID_ID = object()
+
+
+
+# Helper function that reads an id from a request body or bulk item: an integer or a string of digits, None when not given
+def parse_id(value):
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdecimal():
+        return int(value)
+    return INVALID_ID
+
+
+
+# Helper function that reads a bulk request body: the list of items under `key` and the `atomic` flag
+# The body must be an object and every item an object; the `id_fields` of each item are read with parse_id
+# Returns (items, atomic, error_response)
+def read_bulk_request(key, id_fields):
+    data = request.get_json(silent=True)
+    items = data.get(key) if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or not items:
+        return None, None, (jsonify({"message": f"Invalid input: {key} must be a non-empty list"}), 400)
+    if len(items) > MAX_BULK_SIZE:
+        return None, None, (jsonify({"message": f"Invalid input: at most {MAX_BULK_SIZE} {key} per request"}), 400)
+    if not all(isinstance(item, dict) for item in items):
+        return None, None, (jsonify({"message": f"Invalid input: each of the {key} must be an object"}), 400)
+
+    # All-or-nothing by default; with "atomic": false the valid items are written and the invalid ones reported
+    atomic = data.get('atomic', True)
+    if not isinstance(atomic, bool):
+        return None, None, (jsonify({"message": "Invalid input: atomic must be true or false"}), 400)
+
+    items = [dict(item, **{field: parse_id(item.get(field)) for field in id_fields}) for item in items]
+    return items, atomic, None
+
+
+
+# Helper function that returns which of the given ids exist in a table (one set-based query)
+# Ids that parse_id could not read are left out; they never exist
+def existing_ids(conn, table, column, ids):
+    ids = list({value for value in ids if isinstance(value, int)})
+    if not ids:
+        return set()
+    placeholders = ', '.join('?' * len(ids))
+    rows = conn.execute(f'SELECT {column} FROM {table} WHERE {column} IN ({placeholders})', ids).fetchall()
+    return {row[0] for row in rows}
+
+
+
+# Helper function that builds the response of a bulk endpoint from its per-item results
+def bulk_response(results, atomic, written_status):
+    failed = sum(1 for result in results if result['status'] == 'error')
+
+    # An atomic batch with any invalid item writes nothing
+    if failed and atomic:
+        for result in results:
+            if result['status'] != 'error':
+                result['status'] = 'skipped'
+        return jsonify({"message": "Batch rejected: no changes were made", "failed": failed, "results": results}), 400
+
+    # 207 Multi-Status tells the client that some, but not all, items were written
+    code = 207 if failed else written_status
+    return jsonify({"succeeded": len(results) - failed, "failed": failed, "results": results}), code
+
+
+
+# Create many Tasks in one request (Manager Access Only)
+@app.route('/tasks/bulk', methods=['POST'])
+def create_tasks_bulk():
+
+    # Check if the user has 'Manager' access (once for the whole batch)
+    access_error = check_role('Manager')
+    if access_error:
+        return access_error
+
+    # Get the list of tasks from the request data
+    tasks, atomic, error = read_bulk_request('tasks', ['project_id', 'assigned_user_id'])
+    if error:
+        return error
+
+    conn = get_db_connection()
+
+    # Look up every referenced project and user up front, with one query each
+    project_ids = existing_ids(conn, 'projects', 'project_id', [task['project_id'] for task in tasks])
+    user_ids = existing_ids(conn, 'users', 'user_id', [task['assigned_user_id'] for task in tasks])
+
+    # Validate the whole batch before writing anything
+    allowed_statuses = ['Not Started', 'In Progress', 'Completed']
+    results = []
+    rows = []
+    for index, task in enumerate(tasks):
+        if not task.get('task_name'):
+            message = "Invalid input: task_name must be provided"
+        elif not isinstance(task['task_name'], str) or not isinstance(task.get('status', 'Not Started'), str):
+            message = "Invalid input: task_name and status must be strings"
+        elif any(task.get(field) is not None and not isinstance(task[field], str) for field in ('description', 'due_date')):
+            message = "Invalid input: description and due_date must be strings or null"
+        elif task['project_id'] is INVALID_ID or task['assigned_user_id'] is INVALID_ID:
+            message = "Invalid input: project_id and assigned_user_id must be integers"
+        elif task['project_id'] not in project_ids:
+            message = "Project not found"
+        elif task.get('status', 'Not Started') not in allowed_statuses:
+            message = f"Invalid status. Allowed values are: {allowed_statuses}"
+        elif task['assigned_user_id'] is not None and task['assigned_user_id'] not in user_ids:
+            message = "Assigned user not found"
+        else:
+            message = None
+
+        if message:
+            results.append({"index": index, "status": "error", "message": message})
+            continue
+
+        results.append({"index": index, "status": "created"})
+        rows.append((task['project_id'], task['task_name'], task.get('description', ''), task.get('due_date', None),
+                     task.get('status', 'Not Started'), task['assigned_user_id']))
+
+    # Write every valid task in a single transaction (one commit for the whole batch)
+    if rows and not (atomic and len(rows) != len(tasks)):
+        conn.begin_immediate()
+        conn.executemany('INSERT INTO tasks (project_id, task_name, description, due_date, status, assigned_user_id) VALUES (?, ?, ?, ?, ?, ?)',
+            rows)
+
+        # AUTOINCREMENT ids are handed out consecutively while we hold the write lock
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        conn.commit()
+
+        created = [result for result in results if result['status'] == 'created']
+        for offset, result in enumerate(created):
+            result['task_id'] = last_id - len(created) + 1 + offset
+
+        for result, row in zip(created, rows):
+            publish_change('task.created', project_id=row[0], user_ids=[row[5]], task_id=result['task_id'],
+                           task_name=row[1], status=row[4], assigned_user_id=row[5])
+
+    conn.close()
+    return bulk_response(results, atomic, 201)
+
+
+
+# Assign or Reassign many Tasks in one request (Manager Access Only)
+@app.route('/tasks/assign/bulk', methods=['PUT'])
+def assign_tasks_bulk():
+
+    # Check if the user has 'Manager' access (once for the whole batch)
+    access_error = check_role('Manager')
+    if access_error:
+        return access_error
+
+    # Get the list of assignments ({"task_id": ..., "assigned_user_id": ...}) from the request data
+    assignments, atomic, error = read_bulk_request('assignments', ['task_id', 'assigned_user_id'])
+    if error:
+        return error
+
+    conn = get_db_connection()
+
+    # Look up every referenced task (with its project and current assignee, for the change feed) and user up front
+    requested = list({item['task_id'] for item in assignments if isinstance(item['task_id'], int)})
+    current = {}
+    if requested:
+        placeholders = ', '.join('?' * len(requested))
+        current = {row['task_id']: (row['project_id'], row['assigned_user_id']) for row in conn.execute(
+            f'SELECT task_id, project_id, assigned_user_id FROM tasks WHERE task_id IN ({placeholders})', requested)}
+    task_ids = set(current)
+    user_ids = existing_ids(conn, 'users', 'user_id', [item['assigned_user_id'] for item in assignments])
+
+    # Validate the whole batch before writing anything
+    results = []
+    rows = []
+    for index, item in enumerate(assignments):
+        if not item['assigned_user_id']:
+            message = "Invalid input: assigned_user_id must be provided"
+        elif item['task_id'] is INVALID_ID or item['assigned_user_id'] is INVALID_ID:
+            message = "Invalid input: task_id and assigned_user_id must be integers"
+        elif item['task_id'] not in task_ids:
+            message = "Task not found"
+        elif item['assigned_user_id'] not in user_ids:
+            message = "Assigned user not found"
+        else:
+            message = None
+
+        if message:
+            results.append({"index": index, "status": "error", "message": message})
+            continue
+
+        results.append({"index": index, "status": "assigned", "task_id": item['task_id']})
+        rows.append((item['assigned_user_id'], item['task_id']))
+
+    # Apply every valid assignment in a single transaction
+    if rows and not (atomic and len(rows) != len(assignments)):
+        conn.begin_immediate()
+        conn.executemany('UPDATE tasks SET assigned_user_id = ? WHERE task_id = ?', rows)
+        conn.commit()
+
+        for assigned_user_id, task_id in rows:
+            project_id, previous_user_id = current[task_id]
+            publish_change('task.assigned', project_id=project_id, user_ids=[previous_user_id, assigned_user_id],
+                           task_id=task_id, assigned_user_id=assigned_user_id, previous_user_id=previous_user_id)
+            # A task listed twice in one batch ends up with the last assignment
+            current[task_id] = (project_id, assigned_user_id)
+
+    conn.close()
+    return bulk_response(results, atomic, 200)
 
 
 
 # Edit a Task (Manager Only)
+# Send If-Match with the task's version to edit only if nobody changed it in the meantime
 @app.route('/tasks/<int:task_id>', methods=['PUT'])
 def edit_task(task_id):
 
@@ -325,49 +1238,68 @@ def edit_task(task_id):
     if access_error:
         return access_error
 
+    expected, precondition_error = read_if_match('task', task_id)
+    if precondition_error:
+        return precondition_error
+
     # Get the updated task data from the request
     data = request.get_json()
     task_name = data.get('task_name', None)
     description = data.get('description', None)
     due_date = data.get('due_date', None)
     status = data.get('status', None)
-    assigned_user_id = data.get('assigned_user_id', None)
+    assigned_user_id = parse_id(data.get('assigned_user_id', None))
 
     # Validate that the status is one of the allowed values, if provided
     allowed_statuses = ['Not Started', 'In Progress', 'Completed']
     if status and status not in allowed_statuses:
         return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
+    if assigned_user_id is INVALID_ID:
+        return jsonify({"message": "Invalid input: assigned_user_id must be an integer"}), 400
     
-    # Connect to the database and retrieve the specified task
+    # Connect to the database and take the write lock
     conn = get_db_connection()
-    task = conn.execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+    conn.begin_immediate()
 
-    # Return error if the task does not exist
-    if not task:
-        conn.close()
-        return jsonify({"message": "Task not found"}), 404
+    # When the task is reassigned, the previous assignee is notified through the change feed
+    previous = None
+    if assigned_user_id is not None:
+        previous = conn.execute('SELECT assigned_user_id FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
 
-    # Update the task with the new values or retain the old ones if not provided
-    conn.execute('''
+    # Update the task with the new values or retain the old ones if not provided;
+    # no row returned means it does not exist (or the precondition failed)
+    version = next_row_version(conn)
+    updated = conn.execute('''
         UPDATE tasks 
         SET task_name = COALESCE(?, task_name),
             description = COALESCE(?, description),
             due_date = COALESCE(?, due_date),
             status = COALESCE(?, status),
-            assigned_user_id = COALESCE(?, assigned_user_id)
-        WHERE task_id = ?
-    ''', (task_name, description, due_date, status, assigned_user_id, task_id))
+            assigned_user_id = COALESCE(?, assigned_user_id),
+            version = ?
+        WHERE task_id = ? AND (? IS NULL OR version = ?)
+        RETURNING project_id, assigned_user_id
+    ''', (task_name, description, due_date, status, assigned_user_id, version, task_id, expected, expected)).fetchone()
+
+    if not updated:
+        return write_missed(conn, 'tasks', 'task_id', task_id, expected, task_etag, "Task not found")
 
     # Save changes and close the connection
     conn.commit()
     conn.close()
+    changes = {name: value for name, value in (('task_name', task_name), ('description', description), ('due_date', due_date),
+                                               ('status', status), ('assigned_user_id', assigned_user_id)) if value is not None}
+    publish_change('task.updated', project_id=updated['project_id'],
+                   user_ids=[previous['assigned_user_id'] if previous else None, updated['assigned_user_id']],
+                   task_id=task_id, changes=changes, version=version)
 
     # Return a success message
-    return jsonify({"message": "Task updated successfully"}), 200
+    return written("Task updated successfully", task_etag(task_id, version), version)
 
 
 
 # Delete a Task (Manager Only)
+# Send If-Match with the task's version to delete only if nobody changed it in the meantime
 @app.route('/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
 
@@ -376,58 +1308,379 @@ def delete_task(task_id):
     if access_error:
         return access_error
 
-    # Connect to the database
+    expected, precondition_error = read_if_match('task', task_id)
+    if precondition_error:
+        return precondition_error
+
+    # Delete the task in one statement; no row returned means it does not exist (or the precondition failed)
     conn = get_db_connection()
+    conn.begin_immediate()
+    deleted = conn.execute('DELETE FROM tasks WHERE task_id = ? AND (? IS NULL OR version = ?) RETURNING project_id, assigned_user_id',
+                           (task_id, expected, expected)).fetchone()
 
-    # Check if the task exists
-    task = conn.execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
-    if not task:
-        conn.close()
-        return jsonify({"message": "Task not found"}), 404
+    if not deleted:
+        return write_missed(conn, 'tasks', 'task_id', task_id, expected, task_etag, "Task not found")
+
+    # Its time logs go with it, so reports do not count hours against a task that no longer exists
+    conn.execute('DELETE FROM task_logs WHERE task_id = ?', (task_id,))
 
-    # Delete the task
-    conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
     conn.commit()
     conn.close()
+    publish_change('task.deleted', project_id=deleted['project_id'], user_ids=[deleted['assigned_user_id']], task_id=task_id)
 
     # Return a success message indicating the task was deleted
     return jsonify({"message": "Task deleted successfully"}), 200
 
 
 
+# Columns a client may request from the tasks table, the largest page size, and how many rows a stream fetches at a time
+TASK_COLUMNS = ['task_id', 'project_id', 'task_name', 'description', 'due_date', 'status', 'assigned_user_id', 'hours_logged', 'version']
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+
+# Sections of the project overview and the columns each one may return (users never expose passwords)
+OVERVIEW_COLUMNS = {
+    'project': ['project_id', 'project_name', 'description', 'start_date', 'end_date', 'status', 'version'],
+    'progress': ['total_tasks', 'not_started', 'in_progress', 'completed', 'hours_logged'],
+    'tasks': TASK_COLUMNS,
+    'team_members': ['user_id', 'username', 'name', 'email', 'role'],
+    'assignees': ['user_id', 'username', 'name', 'email', 'role'],
+}
+
+
+
+# Helper function that reads a `fields` parameter of the form "section" or "section.column", comma-separated
+# Returns ({section: [columns]}, error_response); without the parameter every section and column is selected
+def read_overview_fields(value):
+    if not value:
+        return {section: list(columns) for section, columns in OVERVIEW_COLUMNS.items()}, None
+
+    selected = {}
+    for item in (item.strip() for item in value.split(',')):
+        if not item:
+            continue
+        section, _, column = item.partition('.')
+        if section not in OVERVIEW_COLUMNS or (column and column not in OVERVIEW_COLUMNS[section]):
+            return None, (jsonify({"message": f"Invalid field: {item}. Allowed sections are: {list(OVERVIEW_COLUMNS)}"}), 400)
+        columns = selected.setdefault(section, [])
+        if column and column not in columns:
+            columns.append(column)
+
+    # A bare section means all of its columns; the key column is always returned
+    for section, columns in selected.items():
+        if not columns:
+            selected[section] = list(OVERVIEW_COLUMNS[section])
+        key = {'project': 'project_id', 'tasks': 'task_id', 'team_members': 'user_id', 'assignees': 'user_id'}.get(section)
+        if key and key not in selected[section]:
+            selected[section].insert(0, key)
+    return selected, None
+
+
+
+# Project overview (Manager Access Only)
+# Everything a project page renders in one request: the project, its progress counters, its tasks with hours,
+# its team members and the users its tasks are assigned to. At most four set-based queries, whatever the size
+# of the project; `fields` selects sections and columns (e.g. fields=project,tasks.task_name,tasks.status,assignees)
+@app.route('/projects/<int:project_id>/overview', methods=['GET'])
+def view_project_overview(project_id):
+    # Check if the user has 'Manager' access
+    access_error = check_role('Manager')
+    if access_error:
+        return access_error
+
+    fields, error = read_overview_fields(request.args.get('fields'))
+    if error:
+        return error
+
+    conn = get_db_connection()
+
+    # 1. The project and its counters (the project row is always read, to report a missing project)
+    # An archived project is read from the archive tables, which the remaining queries then use too
+    project_columns = ', '.join(f'p.{column}' for column in fields.get('project', ['project_id']))
+    progress_columns = ''.join(f', g.{column}' for column in fields.get('progress', []))
+    for tables in (archive.HOT_TABLES, archive.ARCHIVE_TABLES):
+        row = conn.execute(f"SELECT {project_columns}{progress_columns} FROM {tables['projects']} p "
+                           f"LEFT JOIN {tables['project_progress']} g ON g.project_id = p.project_id WHERE p.project_id = ?", (project_id,)).fetchone()
+        if row:
+            break
+    if not row:
+        conn.close()
+        return jsonify({"message": "Project not found"}), 404
+
+    overview = {}
+    row = dict(row)
+    if 'project' in fields:
+        overview['project'] = {column: row[column] for column in fields['project']}
+    if 'progress' in fields:
+        overview['progress'] = {column: row[column] for column in fields['progress']}
+    if tables is archive.ARCHIVE_TABLES:
+        overview['archived'] = True
+
+    # 2. Every task of the project, with its running hours total
+    if 'tasks' in fields:
+        tasks = conn.execute(f"SELECT {', '.join(fields['tasks'])} FROM {tables['tasks']} WHERE project_id = ? ORDER BY task_id", (project_id,)).fetchall()
+        overview['tasks'] = [dict(task) for task in tasks]
+
+    # 3. Team members, joined from users
+    if 'team_members' in fields:
+        columns = ', '.join(f'u.{column}' for column in fields['team_members'])
+        members = conn.execute(f"SELECT {columns} FROM {tables['project_team_members']} m JOIN users u ON u.user_id = m.user_id "
+                               f"WHERE m.project_id = ? ORDER BY u.user_id", (project_id,)).fetchall()
+        overview['team_members'] = [dict(member) for member in members]
+
+    # 4. Users the project's tasks are assigned to, looked up in one query rather than one per task
+    if 'assignees' in fields:
+        columns = ', '.join(f'u.{column}' for column in fields['assignees'])
+        assignees = conn.execute(f"SELECT {columns} FROM users u WHERE u.user_id IN "
+                                 f"(SELECT assigned_user_id FROM {tables['tasks']} WHERE project_id = ?) ORDER BY u.user_id", (project_id,)).fetchall()
+        overview['assignees'] = [dict(assignee) for assignee in assignees]
+
+    conn.close()
+    return jsonify(overview), 200
+
+
+
 # View assigned tasks (Team Members)
 @app.route('/tasks/assigned', methods=['GET'])
 def view_assigned_tasks():
-    # Extract user ID from the request headers
-    user_id = request.headers.get('user_id')
-
-    # If user_id is missing, return unauthorized response
-    if not user_id:
-        return jsonify({"message": "Unauthorized: User ID is missing"}), 401
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, role, _, auth_error = authenticate()
+    if auth_error:
+        return auth_error
     
     # Ensure that only Team Members can view assigned tasks
-    if get_user_role(user_id) != 'Team Member':
+    if role != 'Team Member':
         return jsonify({"message": "Permission denied: Only Team Members can view assigned tasks"}), 403
 
-    # Connect to the database and retrieve tasks assigned to the user
+    # Optional query parameters:
+    #   limit, cursor          keyset pagination on task_id (cursor is the last task_id of the previous page)
+    #   status                 only tasks with this status
+    #   due_before, due_after  only tasks due on/before or on/after a date (YYYY-MM-DD)
+    #   fields                 comma-separated list of columns to return
+    #   stream                 stream the result as a JSON array instead of building it in memory
+    args = request.args
+
+    # Project only the requested columns (task_id is always included as it is the pagination key)
+    fields = TASK_COLUMNS
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in TASK_COLUMNS]
+        if unknown:
+            return jsonify({"message": f"Invalid fields: {unknown}. Allowed values are: {TASK_COLUMNS}"}), 400
+        if 'task_id' not in fields:
+            fields = ['task_id'] + fields
+
+    # Build the filters; every value is passed as a parameter
+    conditions = ['assigned_user_id = ?']
+    params = [user_id]
+
+    status = args.get('status')
+    if status is not None:
+        allowed_statuses = ['Not Started', 'In Progress', 'Completed']
+        if status not in allowed_statuses:
+            return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
+        conditions.append('status = ?')
+        params.append(status)
+
+    for name, operator in (('due_before', '<='), ('due_after', '>=')):
+        value = args.get(name)
+        if value is None:
+            continue
+        try:
+            date.fromisoformat(value)
+        except ValueError:
+            return jsonify({"message": f"Invalid input: {name} must be a date in YYYY-MM-DD format"}), 400
+        conditions.append(f'due_date {operator} ?')
+        params.append(value)
+
+    try:
+        cursor = int(args['cursor']) if 'cursor' in args else None
+        limit = int(args['limit']) if 'limit' in args else None
+    except ValueError:
+        return jsonify({"message": "Invalid input: limit and cursor must be integers"}), 400
+
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"Invalid input: limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    # Keyset pagination: continue right after the last task_id the client has seen
+    if cursor is not None:
+        conditions.append('task_id > ?')
+        params.append(cursor)
+
+    query = f"SELECT {', '.join(fields)} FROM tasks WHERE {' AND '.join(conditions)} ORDER BY task_id"
+
+    # Connect to the database
     conn = get_db_connection()
-    tasks = conn.execute('SELECT * FROM tasks WHERE assigned_user_id = ?', (user_id,)).fetchall()
+
+    # Collection version of the user's tasks: any insert, update, reassignment or delete changes the
+    # count or the highest row version (read from the index alone); the query string is folded in so
+    # each page, filter and projection gets its own tag
+    count, max_version = conn.execute('SELECT COUNT(*), MAX(version) FROM tasks WHERE assigned_user_id = ?', (user_id,)).fetchone()
+    variant = hashlib.sha1(request.query_string).hexdigest()[:12]
+    etag = f'tasks-{user_id}-{count}-{max_version or 0}-{variant}'
+
+    # Conditional GET: nothing changed, so nothing is fetched or serialized
+    if etag in request.if_none_match:
+        conn.close()
+        return not_modified(etag)
+
+    # Streaming mode: yield the JSON array row by row from the cursor so memory stays flat
+    # The request's connection goes back to the pool when the view returns, before the body is read, so the
+    # stream takes a pooled connection of its own now (an exhausted pool is a 503 before any header is sent)
+    # and gives it back when the response is closed
+    if args.get('stream') in ('1', 'true'):
+        conn.close()
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        stream_conn = get_pool().acquire()
+        response = Response(stream_json_array(stream_conn, query, params), mimetype='application/json')
+        response.call_on_close(stream_conn.close)
+        response.set_etag(etag)
+        return response
+
+    # Without a limit, return the plain list of assigned tasks
+    if limit is None:
+        tasks = conn.execute(query, params).fetchall()
+        conn.close()
+        response = jsonify([dict(task) for task in tasks])
+        response.set_etag(etag)
+        return response, 200
+
+    # Paginated mode: return one page plus the cursor for the next one
+    tasks = conn.execute(query + ' LIMIT ?', params + [limit]).fetchall()
     conn.close()
-   
-    # Return the list of assigned tasks
-    return jsonify([dict(task) for task in tasks]), 200
+
+    next_cursor = tasks[-1]['task_id'] if len(tasks) == limit else None
+    response = jsonify({"tasks": [dict(task) for task in tasks], "next_cursor": next_cursor})
+    response.set_etag(etag)
+    return response, 200
+
+
+
+# Generator that serializes a query's rows as a JSON array, one row at a time, from `conn`, a pooled
+# connection of its own (it keeps running after the view function has returned; the caller gives it back)
+def stream_json_array(conn, query, params):
+    rows = conn.execute(query, params)
+    try:
+        yield '['
+        first = True
+        while True:
+            batch = rows.fetchmany(STREAM_BATCH_SIZE)
+            if not batch:
+                break
+            for row in batch:
+                yield ('' if first else ',') + app.json.dumps(dict(row))
+                first = False
+        yield ']'
+    finally:
+        rows.close()
+
+
+
+# Default and largest number of search results per page
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Columns returned for each kind of search result
+SEARCH_COLUMNS = {
+    'tasks': ['task_id', 'project_id', 'task_name', 'description', 'due_date', 'status', 'assigned_user_id'],
+    'projects': ['project_id', 'project_name', 'description', 'start_date', 'end_date', 'status'],
+}
+
+
+
+# Full-text search over tasks or projects, best matches first
+# Managers can search everything; Team Members can only search the tasks assigned to them
+@app.route('/search', methods=['GET'])
+def search():
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, role, _, auth_error = authenticate()
+    if auth_error:
+        return auth_error
+
+    # Query parameters:
+    #   q                 words that must all appear in the name or description (`word*` matches a prefix)
+    #   type              'tasks' (default) or 'projects'
+    #   project_id        only results in this project
+    #   status            only results with this status
+    #   assigned_user_id  only tasks assigned to this user
+    #   limit, offset     pagination over the ranked results
+    args = request.args
+
+    kind = args.get('type', 'tasks')
+    if kind not in SEARCH_COLUMNS:
+        return jsonify({"message": f"Invalid type. Allowed values are: {list(SEARCH_COLUMNS)}"}), 400
+
+    try:
+        limit = int(args.get('limit', SEARCH_PAGE_SIZE))
+        offset = int(args.get('offset', 0))
+        project_id = int(args['project_id']) if 'project_id' in args else None
+        assignee = int(args['assigned_user_id']) if 'assigned_user_id' in args else None
+    except ValueError:
+        return jsonify({"message": "Invalid input: limit, offset, project_id and assigned_user_id must be integers"}), 400
+
+    if not 1 <= limit <= MAX_SEARCH_PAGE_SIZE or offset < 0:
+        return jsonify({"message": f"Invalid input: limit must be between 1 and {MAX_SEARCH_PAGE_SIZE} and offset must not be negative"}), 400
+
+    # Team Members only see their own tasks
+    if role != 'Manager':
+        if kind != 'tasks' or (assignee is not None and assignee != user_id):
+            return jsonify({"message": "Permission denied: Team Members can only search their assigned tasks"}), 403
+        assignee = user_id
+
+    if kind == 'projects' and assignee is not None:
+        return jsonify({"message": "Invalid input: assigned_user_id only applies to tasks"}), 400
+
+    status = args.get('status')
+    if status is not None:
+        allowed_statuses = ['Not Started', 'In Progress', 'Completed'] if kind == 'tasks' else ['In Progress', 'Completed']
+        if status not in allowed_statuses:
+            return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
+
+    # The filters are part of the full-text query (facet tokens), so the index answers them without reading the table
+    facets = search_index.facet_tokens(project_id=project_id, status=status, assigned_user_id=assignee)
+    match = search_index.match_expression(args.get('q'), kind, facets)
+    if match is None:
+        return jsonify({"message": "Invalid input: q must contain at least one word"}), 400
+
+    # Rank (bm25, lower is better; name matches weigh more, see migration 7) and page inside the index, ties broken
+    # by id so pages are stable, then read only the page's rows from the table. One extra row tells whether there is a next page
+    table = search_index.FTS_TABLES[kind]
+    key = 'task_id' if kind == 'tasks' else 'project_id'
+    columns = ', '.join(f'r.{column}' for column in SEARCH_COLUMNS[kind])
+    query = (f"SELECT {columns}, -m.rank AS score FROM (SELECT rowid, rank FROM {table} WHERE {table} MATCH ? "
+             f"ORDER BY rank, rowid LIMIT ? OFFSET ?) m JOIN {kind} r ON r.{key} = m.rowid ORDER BY m.rank, m.rowid")
+
+    conn = get_db_connection()
+    rows = conn.execute(query, (match, limit + 1, offset)).fetchall()
+    conn.close()
+
+    results = []
+    for row in rows[:limit]:
+        result = dict(row)
+        result['score'] = round(result['score'], 4)
+        results.append(result)
+
+    next_offset = offset + limit if len(rows) > limit else None
+    return jsonify({"results": results, "next_offset": next_offset}), 200
 
 
 
 #  Update the Status of an Assigned Task (Team Member)
+# Send If-Match with the task's version to update only if nobody changed it in the meantime
 @app.route('/tasks/<int:task_id>/status', methods=['PUT'])
 def update_task_status(task_id):
-    # Extract user ID from the request headers
-    user_id = request.headers.get('user_id')
-    
-    # If user_id is missing, return unauthorized response
-    if not user_id:
-        return jsonify({"message": "Unauthorized: User ID is missing"}), 401
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, _, _, auth_error = authenticate()
+    if auth_error:
+        return auth_error
+
+    expected, precondition_error = read_if_match('task', task_id)
+    if precondition_error:
+        return precondition_error
 
     # Get the updated status from the request
     data = request.get_json()
@@ -438,29 +1691,26 @@ def update_task_status(task_id):
     if new_status not in allowed_statuses:
         return jsonify({"message": f"Invalid status. Allowed values are: {allowed_statuses}"}), 400
 
-    # Connect to the database and retrieve the specified task
+    # Update the task status in one statement, only if the task is assigned to the requesting user;
+    # no row returned means the task does not exist, is not theirs, or the precondition failed
     conn = get_db_connection()
-    task = conn.execute('SELECT * FROM tasks WHERE task_id = ? AND assigned_user_id = ?', (task_id, user_id)).fetchone()
-
-    # Return error if the task does not exist or is not assigned to the user
-    if not task:
-        conn.close()
-        return jsonify({"message": "Task not found or not assigned to the user"}), 404
-    
-    # Return error if the task is not assigned to the requesting user
-    if task['assigned_user_id'] != int(user_id):
-        conn.close()
-        return jsonify({"message": "Permission denied: You are not assigned to this task"}), 403
-
-    # Update the task status
-    conn.execute('UPDATE tasks SET status = ? WHERE task_id = ?', (new_status, task_id))
+    conn.begin_immediate()
+    version = next_row_version(conn)
+    updated = conn.execute('UPDATE tasks SET status = ?, version = ? WHERE task_id = ? AND assigned_user_id = ? AND (? IS NULL OR version = ?) RETURNING project_id',
+                           (new_status, version, task_id, user_id, expected, expected)).fetchone()
+
+    if not updated:
+        return write_missed(conn, 'tasks', 'task_id', task_id, expected, task_etag, "Task not found or not assigned to the user",
+                            ' AND assigned_user_id = ?', (user_id,))
     
     # Commit the changes and close the connection
     conn.commit()
     conn.close()
+    publish_change('task.status_changed', project_id=updated['project_id'], user_ids=[user_id],
+                   task_id=task_id, status=new_status, version=version)
 
     # Return a success message
-    return jsonify({"message": "Task status updated successfully"}), 200
+    return written("Task status updated successfully", task_etag(task_id, version), version)
 
 
 
@@ -468,15 +1718,13 @@ def update_task_status(task_id):
 # Endpoint for Team Members to log time spent on their assigned tasks
 @app.route('/tasks/<int:task_id>/log-time', methods=['POST'])
 def log_time_on_task(task_id):
-    # Extract user ID from the request headers
-    user_id = request.headers.get('user_id')
-    
-    # If user_id is missing, return unauthorized response
-    if not user_id:
-        return jsonify({"message": "Unauthorized: User ID is missing"}), 401
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, role, _, auth_error = authenticate()
+    if auth_error:
+        return auth_error
 
     # Check if the user is a 'Team Member'
-    if get_user_role(user_id) != 'Team Member':
+    if role != 'Team Member':
         return jsonify({"message": "Permission denied: Only Team Members can log time"}), 403
 
     # Get the time log data from the request
@@ -491,25 +1739,361 @@ def log_time_on_task(task_id):
     conn = get_db_connection()
     task = conn.execute('SELECT * FROM tasks WHERE task_id = ? AND assigned_user_id = ?', (task_id, user_id)).fetchone()
 
-    # Return error if the task does not exist or is not assigned to the user
+    # Return error if the task does not exist or is not assigned to the user (time cannot be logged on archived tasks)
     if not task:
+        archived = conn.execute('SELECT 1 FROM archived_tasks WHERE task_id = ? AND assigned_user_id = ?', (task_id, user_id)).fetchone()
         conn.close()
+        if archived:
+            return jsonify({"message": "Conflict: archived projects and tasks are read-only (restore the project first)"}), 409
         return jsonify({"message": "Task not found or not assigned to the user"}), 404
     
     # Return error if the task is not assigned to the requesting user
-    if task['assigned_user_id'] != int(user_id):
+    if task['assigned_user_id'] != user_id:
         conn.close()
         return jsonify({"message": "Permission denied: You are not assigned to this task"}), 403
 
-    # Log the time spent on the task by inserting a record in the task_logs table
+    # Write-behind mode: queue the entry; it is written (and rolled up into hours_logged) with the next batch
+    if app.config['TIME_LOG_BUFFER']:
+        conn.close()
+        try:
+            get_time_log_buffer().add(task_id, task['assigned_user_id'], hours_spent)
+        except BufferFull:
+            return jsonify({"message": "Time log queue is full, please retry"}), 503
+        return jsonify({"message": "Time log accepted"}), 202
+
+    # Log the time spent on the task by inserting a record in the task_logs table,
+    # and add it to the task's running total in the same transaction
     conn.execute('INSERT INTO task_logs (task_id, user_id, hours_spent) VALUES (?, ?, ?)', (task_id, user_id, hours_spent))
+    conn.execute('UPDATE tasks SET hours_logged = COALESCE(hours_logged, 0) + ? WHERE task_id = ?', (hours_spent, task_id))
 
     # Commit the changes and close the connection
     conn.commit()
     conn.close()
+    get_workload_refresher().mark_dirty([user_id])
 
     # Return a success message
     return jsonify({"message": "Time logged successfully"}), 201
 
+
+
+# Dimensions a time report can be grouped by: output column and the SQL expression it is computed from
+# (weeks start on Monday and are labelled with that Monday's date; timestamps are UTC)
+REPORT_DIMENSIONS = {
+    'user': ('user_id', 'l.user_id'),
+    'project': ('project_id', 'l.project_id'),
+    'task': ('task_id', 'l.task_id'),
+    'day': ('day', 'date(l.timestamp)'),
+    'week': ('week', "date(l.timestamp, 'weekday 0', '-6 days')"),
+    'month': ('month', "strftime('%Y-%m', l.timestamp)"),
+}
+REPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+
+# Time report: hours logged between two dates, grouped by user, project, task, day, week or month
+# Streams CSV or NDJSON row by row; Managers can report on anyone, Team Members only on themselves
+@app.route('/reports/time', methods=['GET'])
+def time_report():
+    # Identify the user from the session token (or the legacy user_id header)
+    user_id, role, _, auth_error = authenticate()
+    if auth_error:
+        return auth_error
+
+    # Query parameters:
+    #   start, end   first and last day of the period (YYYY-MM-DD, inclusive, UTC)
+    #   group_by     comma-separated dimensions (default: user,project,week)
+    #   user_id      only logs by this user
+    #   project_id   only logs on this project's tasks
+    #   format       csv (default) or ndjson
+    args = request.args
+
+    try:
+        start = date.fromisoformat(args.get('start', ''))
+        end = date.fromisoformat(args.get('end', ''))
+    except ValueError:
+        return jsonify({"message": "Invalid input: start and end must be dates in YYYY-MM-DD format"}), 400
+    if end < start:
+        return jsonify({"message": "Invalid input: end must not be before start"}), 400
+
+    group_by = [name.strip() for name in args.get('group_by', 'user,project,week').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in REPORT_DIMENSIONS]
+    if not group_by or unknown or len(set(group_by)) != len(group_by):
+        return jsonify({"message": f"Invalid group_by. Allowed values are: {list(REPORT_DIMENSIONS)}"}), 400
+
+    fmt = args.get('format', 'csv')
+    if fmt not in REPORT_FORMATS:
+        return jsonify({"message": f"Invalid format. Allowed values are: {list(REPORT_FORMATS)}"}), 400
+
+    try:
+        report_user = int(args['user_id']) if 'user_id' in args else None
+        report_project = int(args['project_id']) if 'project_id' in args else None
+    except ValueError:
+        return jsonify({"message": "Invalid input: user_id and project_id must be integers"}), 400
+
+    # Team Members only get their own timesheet
+    if role != 'Manager':
+        if report_user is not None and report_user != user_id:
+            return jsonify({"message": "Permission denied: Team Members can only report their own time"}), 403
+        report_user = user_id
+
+    # Aggregate in SQL over a timestamp range (idx_task_logs_timestamp, or idx_task_logs_user for one user);
+    # tasks is only joined when the project is needed. Logs of archived projects are read from the archive
+    # tables with the same filters, so moving a project to the archive does not change a report
+    conditions = ['l.timestamp >= ?', 'l.timestamp < ?']
+    params = [start.isoformat(), (end + timedelta(days=1)).isoformat()]
+    if report_user is not None:
+        conditions.append('l.user_id = ?')
+        params.append(report_user)
+    if report_project is not None:
+        conditions.append('t.project_id = ?')
+        params.append(report_project)
+    with_project = 'project' in group_by or report_project is not None
+    branches = []
+    for tables in (archive.HOT_TABLES, archive.ARCHIVE_TABLES):
+        source = f"{tables['task_logs']} l JOIN {tables['tasks']} t ON t.task_id = l.task_id" if with_project else f"{tables['task_logs']} l"
+        branches.append(f"SELECT l.user_id, l.task_id, l.hours_spent, l.timestamp{', t.project_id' if with_project else ''} "
+                        f"FROM {source} WHERE {' AND '.join(conditions)}")
+    params = params * len(branches)
+
+    columns = [REPORT_DIMENSIONS[name][0] for name in group_by] + ['hours', 'entries']
+    keys = ', '.join(f'{REPORT_DIMENSIONS[name][1]} AS {REPORT_DIMENSIONS[name][0]}' for name in group_by)
+    positions = ', '.join(str(index + 1) for index in range(len(group_by)))
+    query = (f"SELECT {keys}, ROUND(SUM(l.hours_spent), 2) AS hours, COUNT(*) AS entries FROM ({' UNION ALL '.join(branches)}) l "
+             f"GROUP BY {positions} ORDER BY {positions}")
+
+    # A period that ended before today (UTC) no longer changes, so its rollup can be cached. The key includes the
+    # report generation (migration 11), which triggers bump whenever a past time log is deleted, edited, archived
+    # or restored, so such a change (made by any worker or by archive.py) is never answered from the cache
+    closed = end < datetime.now(timezone.utc).date()
+    cache_key = None
+    if closed:
+        generation = get_db_connection().execute('SELECT generation FROM report_generation WHERE id = 1').fetchone()[0]
+        cache_key = (generation, query, tuple(params))
+    cached = get_report_cache().get(cache_key) if closed else LRUTTLCache.MISSING
+
+    if cached is not LRUTTLCache.MISSING:
+        batches = (cached[index:index + STREAM_BATCH_SIZE] for index in range(0, len(cached), STREAM_BATCH_SIZE))
+        response = Response(stream_report_rows(columns, batches, fmt), mimetype=REPORT_FORMATS[fmt])
+    else:
+        # The export's connection is taken before any header is sent, so an exhausted pool is a clean 503
+        # (PoolTimeout) rather than a stream cut off after its 200; it goes back when the response is closed
+        conn = get_pool().acquire()
+        response = Response(stream_report_rows(columns, fetch_report_batches(conn, query, params, cache_key), fmt),
+                            mimetype=REPORT_FORMATS[fmt])
+        response.call_on_close(conn.close)
+
+    response.headers['Content-Disposition'] = f'attachment; filename=time-report-{start}-{end}.{fmt}'
+    response.headers['X-Report-Cache'] = 'hit' if cached is not LRUTTLCache.MISSING else 'miss'
+    return response
+
+
+
+# Generator that yields a report query's rows in batches from `conn`, a pooled connection of its own
+# (it keeps running after the view function has returned; the caller gives the connection back). When
+# `cache_key` is given and the report is small enough, the rows are kept and stored in the rollup cache
+# once the query has finished
+def fetch_report_batches(conn, query, params, cache_key):
+    kept = [] if cache_key is not None else None
+    rows = conn.execute(query, params)
+    try:
+        while True:
+            batch = [tuple(row) for row in rows.fetchmany(STREAM_BATCH_SIZE)]
+            if not batch:
+                break
+            if kept is not None:
+                kept.extend(batch)
+                if len(kept) > app.config['REPORT_CACHE_MAX_ROWS']:
+                    kept = None
+            yield batch
+    finally:
+        rows.close()
+
+    if kept is not None:
+        get_report_cache().set(cache_key, kept)
+
+
+
+# Generator that formats batches of report rows as CSV (with a header line) or NDJSON, one chunk per batch
+def stream_report_rows(columns, batches, fmt):
+    if fmt == 'csv':
+        yield ','.join(columns) + '\r\n'
+    for batch in batches:
+        if fmt == 'csv':
+            chunk = io.StringIO()
+            csv.writer(chunk).writerows(batch)
+            yield chunk.getvalue()
+        else:
+            yield ''.join(app.json.dumps(dict(zip(columns, row))) + '\n' for row in batch)
+
+
+
+# Manager workload dashboard (Manager Access Only)
+# Per Team Member: tasks by status, open and overdue tasks, and hours logged this week (UTC, from Monday),
+# served from the user_workload summary. `user_id` selects one member; `refresh=1` recomputes the rows
+# before answering. The response reports how far behind the summary may be:
+#   stale_seconds   age of the oldest change this worker has seen that is not in the rows yet (0: up to date)
+#   pending_users   how many of the returned users have such changes
+@app.route('/dashboard/workload', methods=['GET'])
+def workload_dashboard():
+    # Check if the user has 'Manager' access
+    access_error = check_role('Manager')
+    if access_error:
+        return access_error
+
+    try:
+        member = int(request.args['user_id']) if 'user_id' in request.args else None
+    except ValueError:
+        return jsonify({"message": "Invalid input: user_id must be an integer"}), 400
+
+    refresher = get_workload_refresher()
+    refreshed = request.args.get('refresh') == '1'
+    if refreshed:
+        refresher.refresh([member] if member is not None else None)
+
+    query = ('SELECT u.user_id, u.name, w.not_started, w.in_progress, w.completed, w.overdue, w.hours_this_week, '
+             "w.as_of, w.refreshed_at FROM users u LEFT JOIN user_workload w ON w.user_id = u.user_id WHERE u.role = 'Team Member'")
+    params = ()
+    if member is not None:
+        query += ' AND u.user_id = ?'
+        params = (member,)
+    query += ' ORDER BY u.user_id'
+
+    conn = get_db_connection()
+    rows = conn.execute(query, params).fetchall()
+
+    # Rows computed on an earlier day (overdue counts and weekly hours have moved) or never computed are
+    # brought up to date before they are served
+    day = workload.today()
+    outdated = [row['user_id'] for row in rows if row['as_of'] != day]
+    if outdated:
+        refresher.refresh(outdated)
+        refreshed = True
+        rows = conn.execute(query, params).fetchall()
+    conn.close()
+
+    if member is not None and not rows:
+        return jsonify({"message": "Team Member not found"}), 404
+
+    users = []
+    for row in rows:
+        user = dict(row)
+        user['open_tasks'] = user['not_started'] + user['in_progress']
+        del user['as_of']
+        users.append(user)
+
+    pending, stale_seconds = refresher.pending([user['user_id'] for user in users])
+    return jsonify({"users": users, "as_of": day, "week_start": workload.week_start(), "refreshed": refreshed,
+                    "stale_seconds": round(stale_seconds, 3), "pending_users": pending}), 200
+
+
+
+# Helper function that reads the subscription of an /events request: which events the caller may see,
+# and the sequence number to resume after (the `since` parameter, or the Last-Event-ID header sent by EventSource)
+# Returns (user_id filter, project_id filter, since, error_response)
+def read_change_subscription():
+    user_id, role, _, auth_error = authenticate()
+    if auth_error:
+        return None, None, None, auth_error
+
+    try:
+        project_id = int(request.args['project_id']) if 'project_id' in request.args else None
+        user_filter = int(request.args['user_id']) if 'user_id' in request.args else None
+        since = request.args.get('since', request.headers.get('Last-Event-ID'))
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return None, None, None, (jsonify({"message": "Invalid input: project_id, user_id and since must be integers"}), 400)
+
+    # Managers may watch everything, a project or a user; Team Members only see changes to their own tasks
+    if role != 'Manager':
+        if user_filter is not None and user_filter != user_id:
+            return None, None, None, (jsonify({"message": "Permission denied: Team Members can only follow their own tasks"}), 403)
+        user_filter = user_id
+
+    return user_filter, project_id, since, None
+
+
+
+# Format one event as a server-sent event; the id lets EventSource resume with Last-Event-ID
+def sse_message(event):
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {app.json.dumps(event)}\n\n"
+
+
+
+# Change feed as server-sent events (text/event-stream)
+# Optional query parameters: project_id, user_id (Managers only) and since (or the Last-Event-ID header)
+@app.route('/events', methods=['GET'])
+def stream_changes():
+    user_id, project_id, since, error = read_change_subscription()
+    if error:
+        return error
+
+    # Subscribe before the response starts, so nothing published in between is missed
+    subscription, missed, complete = get_change_feed().subscribe(user_id=user_id, project_id=project_id, since=since)
+    heartbeat = app.config['CHANGE_FEED_HEARTBEAT']
+
+    # The request (and its pooled connection) is finished before the stream starts,
+    # so an open stream holds no database connection
+    def events():
+        try:
+            # Tell the client where the feed stands; when its position has fallen out of the history
+            # it must reload instead of resuming
+            if not complete:
+                yield sse_message({"seq": subscription.feed.last_seq, "type": "reset", "data": {}})
+            else:
+                yield f"retry: 3000\nid: {since if since is not None else subscription.feed.last_seq}\nevent: ready\ndata: {{}}\n\n"
+                for event in missed:
+                    yield sse_message(event)
+
+            while True:
+                event = subscription.next_event(heartbeat)
+                if subscription.overflowed:
+                    # The client fell too far behind and events were dropped: ask it to reload
+                    yield sse_message({"seq": subscription.feed.last_seq, "type": "reset", "data": {}})
+                    return
+                # A comment line keeps proxies from closing an idle connection
+                yield sse_message(event) if event is not None else ': keepalive\n\n'
+        finally:
+            subscription.close()
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+
+# Change feed as a long poll: returns the events after `since` right away, or waits up to `timeout`
+# seconds for the next one (for clients that cannot keep a stream open)
+@app.route('/events/poll', methods=['GET'])
+def poll_changes():
+    user_id, project_id, since, error = read_change_subscription()
+    if error:
+        return error
+
+    try:
+        timeout = min(float(request.args.get('timeout', app.config['CHANGE_FEED_POLL_TIMEOUT'])), app.config['CHANGE_FEED_POLL_TIMEOUT'])
+    except ValueError:
+        return jsonify({"message": "Invalid input: timeout must be a number"}), 400
+
+    feed = get_change_feed()
+    if since is None:
+        since = feed.last_seq
+
+    subscription, missed, complete = feed.subscribe(user_id=user_id, project_id=project_id, since=since)
+    try:
+        if complete and not missed and timeout > 0:
+            event = subscription.next_event(timeout)
+            missed = [event] if event is not None else []
+    finally:
+        subscription.close()
+
+    # `last_seq` is what the client passes as `since` next time; `reset` means it must reload first
+    last_seq = missed[-1]['seq'] if missed else (since if complete else feed.last_seq)
+    return jsonify({"events": missed, "last_seq": last_seq, "reset": not complete}), 200
+
+
+
+
+# Development server only; serve.py is the production entry point (several workers, warmed caches)
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
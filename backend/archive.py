@@ -0,0 +1,212 @@
+# Hot/cold archival of completed projects
+# A completed project and everything that hangs off it (progress counters, team memberships, tasks and
+# their time logs) is moved from the hot tables to the archive tables of migration 9, a batch of projects
+# per transaction, so the working tables and their indexes only hold live work. The API reads through to
+# the archive when a project is not in the hot tables; archived rows are read-only until restored.
+#
+# Usage (from the backend directory):
+#   python archive.py run [--older-than DAYS] [--batch-size N] [--limit N] [--db PATH]
+#                                        archive completed projects (optionally only those that ended DAYS ago)
+#   python archive.py status  [--db PATH]               count the rows in the hot and archive tables
+#   python archive.py restore PROJECT_ID [--db PATH]    move an archived project back to the hot tables
+
+# import sqlite3 to move the rows, json to pass a batch of ids as one parameter, time to pause between
+# batches, date/timedelta for the age cutoff, and argparse/os/sys for the command line interface
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+# import the migration runner so the archive tables exist before rows are moved
+import migrations
+
+# Archive table holding the archived rows of each hot table
+ARCHIVE_TABLES = {
+    'projects': 'archived_projects',
+    'project_progress': 'archived_project_progress',
+    'project_team_members': 'archived_project_team_members',
+    'tasks': 'archived_tasks',
+    'task_logs': 'archived_task_logs',
+}
+HOT_TABLES = {table: table for table in ARCHIVE_TABLES}
+
+# Columns copied between a hot table and its archive table (archived_projects adds archived_at)
+COLUMNS = {
+    'projects': ['project_id', 'project_name', 'description', 'start_date', 'end_date', 'status', 'version'],
+    'project_progress': ['project_id', 'total_tasks', 'not_started', 'in_progress', 'completed', 'hours_logged'],
+    'project_team_members': ['project_team_member_id', 'project_id', 'user_id'],
+    'tasks': ['task_id', 'project_id', 'task_name', 'description', 'due_date', 'status', 'assigned_user_id', 'hours_logged', 'version'],
+    'task_logs': ['log_id', 'task_id', 'user_id', 'hours_spent', 'timestamp'],
+}
+
+# Rows are deleted in this order: counters first (so deleting tasks does not update counters about to go),
+# and time logs while the tasks they are found through still exist
+DELETE_ORDER = ['project_progress', 'task_logs', 'project_team_members', 'tasks', 'projects']
+
+# Completed projects still in the hot tables, oldest end date first (idx_projects_status)
+CANDIDATES_QUERY = '''
+    SELECT project_id FROM projects
+    WHERE status = 'Completed' AND (? IS NULL OR end_date < ?)
+    ORDER BY end_date, project_id
+    LIMIT ?
+'''
+
+
+
+# WHERE clause selecting the rows of a set of projects (a JSON array of ids bound as the only parameter)
+# in `table`, where `tables` maps table names to the hot or the archive tables
+def _batch_filter(table, tables):
+    projects = 'project_id IN (SELECT value FROM json_each(?))'
+    if table == 'task_logs':
+        return f"task_id IN (SELECT task_id FROM {tables['tasks']} WHERE {projects})"
+    return projects
+
+
+
+# Copy the rows of a set of projects from one table set to the other, then delete them from the source
+# `copied` lists the tables whose rows are copied; every table's rows are deleted from the source
+# Runs inside the caller's transaction; returns the number of rows copied per table
+def _transfer(conn, project_ids, source, target, copied):
+    ids = json.dumps(project_ids)
+    moved = {}
+    for table in copied:
+        columns = ', '.join(COLUMNS[table])
+        cursor = conn.execute(f'INSERT INTO {target[table]} ({columns}) SELECT {columns} FROM {source[table]} '
+                              f'WHERE {_batch_filter(table, source)}', (ids,))
+        moved[table] = cursor.rowcount
+    for table in DELETE_ORDER:
+        conn.execute(f'DELETE FROM {source[table]} WHERE {_batch_filter(table, source)}', (ids,))
+    return moved
+
+
+
+# Delete a project's dependent rows (counters, time logs, team memberships, tasks) with one set-based
+# statement per table, from the hot tables or, with `archived`, from the archive tables
+# Runs inside the caller's transaction; the caller deletes the project row itself
+# Returns the number of rows deleted per table
+def delete_project_dependents(conn, project_id, archived=False):
+    tables = ARCHIVE_TABLES if archived else HOT_TABLES
+    ids = json.dumps([project_id])
+    return {table: conn.execute(f'DELETE FROM {tables[table]} WHERE {_batch_filter(table, tables)}', (ids,)).rowcount
+            for table in DELETE_ORDER if table != 'projects'}
+
+
+
+# Move completed projects to the archive, `batch_size` projects per transaction
+#   older_than_days  only projects whose end date is at least this many days ago (None: every completed project)
+#   limit            stop after this many projects (None: until none are left)
+#   pause            seconds to sleep between batches, leaving the write lock to the API
+# Returns the number of projects and of rows moved per table, and the number of batches
+def archive_completed(conn, older_than_days=None, batch_size=20, limit=None, pause=0.0):
+    cutoff = (date.today() - timedelta(days=older_than_days)).isoformat() if older_than_days is not None else None
+    totals = {"projects": 0, "batches": 0, "rows": dict.fromkeys(COLUMNS, 0)}
+
+    while limit is None or totals['projects'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - totals['projects'])
+
+        # Candidates are picked inside the write transaction, so a project reopened meanwhile is not moved
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            project_ids = [row[0] for row in conn.execute(CANDIDATES_QUERY, (cutoff, cutoff, size))]
+            if not project_ids:
+                conn.rollback()
+                break
+            moved = _transfer(conn, project_ids, HOT_TABLES, ARCHIVE_TABLES, list(COLUMNS))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        totals['projects'] += len(project_ids)
+        totals['batches'] += 1
+        for table, count in moved.items():
+            totals['rows'][table] += count
+        if pause:
+            time.sleep(pause)
+
+    return totals
+
+
+
+# Move an archived project back to the hot tables (e.g. to reopen it)
+# Progress counters are not copied back: the insert triggers rebuild them, and the rows get new versions
+# Returns the number of rows restored per table, or None if the project is not archived
+def restore(conn, project_id):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if not conn.execute('SELECT 1 FROM archived_projects WHERE project_id = ?', (project_id,)).fetchone():
+            conn.rollback()
+            return None
+        moved = _transfer(conn, [project_id], ARCHIVE_TABLES, HOT_TABLES, ['projects', 'project_team_members', 'tasks', 'task_logs'])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return moved
+
+
+
+# Number of rows in each hot table and its archive table
+def status(conn):
+    return {table: {"hot": conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0],
+                    "archived": conn.execute(f'SELECT COUNT(*) FROM {archived}').fetchone()[0]}
+            for table, archived in ARCHIVE_TABLES.items()}
+
+
+
+def main(argv=None):
+    # --db is accepted after every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=os.environ.get('PROJECTS_DB', migrations.DEFAULT_DATABASE), help='path to the SQLite database')
+
+    parser = argparse.ArgumentParser(description='Archive completed projects, or restore archived ones')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', parents=[common], help='move completed projects to the archive tables')
+    run_parser.add_argument('--older-than', type=int, help='only projects whose end date is at least this many days ago')
+    run_parser.add_argument('--batch-size', type=int, default=20, help='projects moved per transaction')
+    run_parser.add_argument('--limit', type=int, help='archive at most this many projects')
+    run_parser.add_argument('--pause', type=float, default=0.05, help='seconds between batches, so API writes can proceed')
+
+    commands.add_parser('status', parents=[common], help='count the rows in the hot and archive tables')
+
+    restore_parser = commands.add_parser('restore', parents=[common], help='move an archived project back to the hot tables')
+    restore_parser.add_argument('project_id', type=int)
+
+    args = parser.parse_args(argv)
+
+    migrations.migrate(args.db)
+    conn = sqlite3.connect(args.db, timeout=30)
+
+    try:
+        if args.command == 'run':
+            started = time.perf_counter()
+            totals = archive_completed(conn, older_than_days=args.older_than, batch_size=args.batch_size,
+                                       limit=args.limit, pause=args.pause)
+            rows = ', '.join(f'{count} {table}' for table, count in totals['rows'].items())
+            print(f"Archived {totals['projects']} projects in {totals['batches']} batches "
+                  f"({time.perf_counter() - started:.1f}s): {rows}")
+            return 0
+
+        if args.command == 'restore':
+            moved = restore(conn, args.project_id)
+            if moved is None:
+                print(f'Project {args.project_id} is not archived')
+                return 1
+            print(f'Restored project {args.project_id}: ' + ', '.join(f'{count} {table}' for table, count in moved.items()))
+            return 0
+
+        print(f"{'table':24} {'hot':>12} {'archived':>12}")
+        for table, counts in status(conn).items():
+            print(f"{table:24} {counts['hot']:12d} {counts['archived']:12d}")
+        return 0
+    finally:
+        conn.close()
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+# Async entry point: serves the same routes and responses as app.py on an ASGI server (uvicorn)
+# The event loop owns the client connections. It reads request bodies and writes responses, so a slow client
+# waits on the loop instead of holding a thread. The Flask handlers are unchanged and still block on SQLite.
+# They run on a bounded set of executor lanes: each lane is one thread with one pooled connection pinned to it
+# (app.pin_connection), so every SQLite call and commit of a request runs on the thread that owns the connection.
+# A request keeps its lane until the handler returns. Streamed responses (stream=1 task lists, time report
+# exports, /events) never read the lane's connection: a stream that needs the database takes a pooled
+# connection of its own in the view. They are produced on a separate bounded pool, and the lane is free for
+# the next request.
+#
+# Admission control: at most ASGI_MAX_PENDING requests may wait for or hold a lane. Beyond that, or after
+# waiting ASGI_QUEUE_TIMEOUT seconds for a lane, a request is answered 503 with Retry-After, instead of queueing
+# without bound while every client's latency grows. ASGI_MAX_STREAMS caps the open response streams the same way.
+#
+# Usage (from the backend directory):
+#   SECRET_KEY=... python asgi.py --workers 1 --host 0.0.0.0 --port 5000
+# or under any ASGI server, after `python migrations.py migrate`:
+#   uvicorn asgi:application
+
+# import argparse/logging/os/sys for the command line interface, asyncio to serve requests, io to hand
+# request bodies to the WSGI app, json to write the 503 bodies, and ThreadPoolExecutor for the lanes
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# uvicorn configures this logger in every worker process it starts
+logger = logging.getLogger('uvicorn.error')
+
+# Status codes whose responses never have a body
+BODYLESS_STATUSES = {204, 304}
+
+
+
+# ASGI application running the Flask app (imported on startup, once SECRET_KEY is settled)
+class ASGIApplication:
+
+    def __init__(self):
+        self.backend = None
+        self._lanes = None
+        self._streams = None
+        self._starting = None
+
+        # Requests waiting for or holding a lane, open streams, and requests turned away
+        self.pending = 0
+        self.open_streams = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._start()
+            await self._serve(scope, receive, send)
+
+    # Start on `lifespan.startup`, so the worker is warm before it accepts connections
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self._start()
+                except Exception as error:
+                    logger.exception('Startup failed')
+                    await send({'type': 'lifespan.startup.failed', 'message': str(error)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Import and warm up the app, then create the lanes (on the first request if the server has no lifespan)
+    async def _start(self):
+        if self._lanes is not None:
+            return
+        if self._starting is None:
+            self._starting = asyncio.Lock()
+        async with self._starting:
+            if self._lanes is not None:
+                return
+
+            import app as backend
+
+            # Each lane pins a pooled connection for good; streams, the time log buffer and the workload refresher
+            # share what is left. A database stream takes its connection before its headers are sent, so one that finds
+            # none is answered 503 after DB_POOL_TIMEOUT rather than cut off mid-stream
+            config = backend.app.config
+            free = config['DB_POOL_SIZE'] - config['ASGI_THREADS']
+            if free < 1:
+                raise RuntimeError(f"DB_POOL_SIZE ({config['DB_POOL_SIZE']}) must be larger than ASGI_THREADS ({config['ASGI_THREADS']})")
+            if config['ASGI_MAX_STREAMS'] > free:
+                logger.warning('ASGI_MAX_STREAMS is %d but only %d pooled connections are left beside the lanes: '
+                               'database streams (stream=1 task lists, time report exports) beyond that are answered 503', config['ASGI_MAX_STREAMS'], free)
+
+            # Warm-up briefly takes every pooled connection, so it runs before the lanes pin theirs
+            loop = asyncio.get_running_loop()
+            warmed = await loop.run_in_executor(None, backend.warm_up)
+
+            lanes = asyncio.Queue()
+            for index in range(config['ASGI_THREADS']):
+                lanes.put_nowait(ThreadPoolExecutor(1, thread_name_prefix=f'lane-{index}', initializer=backend.pin_connection))
+            self._streams = ThreadPoolExecutor(config['ASGI_MAX_STREAMS'], thread_name_prefix='stream')
+            if config['METRICS_ENABLED']:
+                backend.get_metrics().add_gauge_source('asgi', self.stats)
+            self.backend, self._lanes = backend, lanes
+
+            logger.info('Worker %d ready (%d lanes, %d cached users)', os.getpid(), lanes.qsize(), warmed['cached_users'])
+
+    def _stop(self):
+        if self._lanes is None:
+            return
+        # Each lane gives its pinned connection back to the pool before its thread ends
+        while not self._lanes.empty():
+            lane = self._lanes.get_nowait()
+            lane.submit(self.backend.unpin_connection)
+            lane.shutdown(wait=True)
+        # Open streams (e.g. /events waiting for the next event) are not waited for
+        self._streams.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve(self, scope, receive, send):
+        config = self.backend.app.config
+        loop = asyncio.get_running_loop()
+
+        # Admission control: turn the request away now rather than queue it behind too many others
+        if self.pending >= config['ASGI_MAX_PENDING']:
+            await self._reject(send, 'Service unavailable: too many requests in progress, please retry')
+            return
+
+        self.pending += 1
+        admitted = True
+        lane = None
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                return
+
+            try:
+                lane = await asyncio.wait_for(self._lanes.get(), config['ASGI_QUEUE_TIMEOUT'])
+            except asyncio.TimeoutError:
+                await self._reject(send, 'Service unavailable: too many requests in progress, please retry')
+                return
+
+            status, headers, content, iterable = await loop.run_in_executor(
+                lane, self._call, self._environ(scope, body))
+            start = {'type': 'http.response.start', 'status': status,
+                     'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]}
+
+            if iterable is None:
+                await send(start)
+                await send({'type': 'http.response.body', 'body': content})
+            else:
+                # The stream no longer needs the lane: it is produced on the stream pool, within its own limit
+                self._lanes.put_nowait(lane)
+                lane = None
+                self.pending -= 1
+                admitted = False
+                if self.open_streams >= config['ASGI_MAX_STREAMS']:
+                    await loop.run_in_executor(self._streams, _close, iterable)
+                    await self._reject(send, 'Service unavailable: too many open streams, please retry')
+                    return
+                self.open_streams += 1
+                try:
+                    await send(start)
+                    await self._stream(iterable, self._streams, receive, send)
+                finally:
+                    self.open_streams -= 1
+        finally:
+            if lane is not None:
+                self._lanes.put_nowait(lane)
+            if admitted:
+                self.pending -= 1
+
+    # Run the WSGI app on a lane. A response of known length is read in full here and sent from the loop;
+    # otherwise the body iterable is returned, to be produced on the stream pool
+    def _call(self, environ):
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started[:] = [int(status.split(' ', 1)[0]), headers]
+            return None
+
+        iterable = self.backend.app(environ, start_response)
+        status, headers = started
+        if (environ['REQUEST_METHOD'] == 'HEAD' or status in BODYLESS_STATUSES
+                or any(name.lower() == 'content-length' for name, _ in headers)):
+            try:
+                content = b''.join(iterable)
+            finally:
+                _close(iterable)
+            return status, headers, content, None
+
+        return status, headers, None, iterable
+
+    # Send the body chunk by chunk, each produced on `executor`; stops early when the client disconnects
+    async def _stream(self, iterable, executor, receive, send):
+        loop = asyncio.get_running_loop()
+        iterator = iter(iterable)
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            while True:
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+                if chunk is None or disconnected.done():
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await loop.run_in_executor(executor, _close, iterable)
+
+    # Read the whole request body (None if the client went away first)
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    # WSGI environ for an ASGI request scope
+    def _environ(self, scope, body):
+        root_path = scope.get('root_path', '')
+        path = scope['path'][len(root_path):] if scope['path'].startswith(root_path) else scope['path']
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name, value = name.decode('latin-1'), value.decode('latin-1')
+            # Like werkzeug's server, drop header names with underscores (they would alias the dashed spelling)
+            if '_' in name:
+                continue
+            key = name.upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_' + key
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        environ['CONTENT_LENGTH'] = str(len(body))
+        return environ
+
+    # Answer 503 with Retry-After, the same shape as the app's own 503 responses
+    async def _reject(self, send, message):
+        self.rejected += 1
+        body = (json.dumps({"message": message}) + '\n').encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 503,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                                (b'retry-after', b'1')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    # Snapshot of the admission control state, for /metrics
+    def stats(self):
+        return {
+            "lanes": self.backend.app.config['ASGI_THREADS'],
+            "idle_lanes": self._lanes.qsize(),
+            "pending": self.pending,
+            "open_streams": self.open_streams,
+            "rejected": self.rejected,
+        }
+
+
+
+# Close a WSGI body iterable (which gives a stream's own connection back to the pool)
+def _close(iterable):
+    if hasattr(iterable, 'close'):
+        iterable.close()
+
+
+
+# Wait until the client disconnects
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+
+application = ASGIApplication()
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the Project Management API on uvicorn (ASGI)')
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', 1)), help='number of worker processes')
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s[%(process)d] %(message)s')
+
+    try:
+        import uvicorn
+    except ImportError:
+        print('asgi.py needs uvicorn: pip install uvicorn', file=sys.stderr)
+        return 1
+
+    # Workers inherit the environment, so a key generated here is shared by all of them
+    if not os.environ.get('SECRET_KEY'):
+        os.environ['SECRET_KEY'] = os.urandom(32).hex()
+        logger.warning('SECRET_KEY is not set; using a key generated for this run (sessions end when the server restarts)')
+
+    # Migrate once here instead of letting every worker race to do it
+    import app as backend
+    import migrations
+    if backend.app.config['AUTO_MIGRATE']:
+        migrations.migrate(backend.app.config['DATABASE'])
+        backend.app.config['AUTO_MIGRATE'] = False
+        os.environ['AUTO_MIGRATE'] = '0'
+
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers, lifespan='on',
+                access_log=args.access_log)
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# In-process change feed for task and project updates
+# Write handlers publish events after they commit; each event gets a monotonically increasing
+# sequence number and is fanned out to the subscribers whose filter (user or project) matches.
+# A bounded history of recent events lets a reconnecting client resume from the last sequence
+# number it saw instead of reloading everything.
+
+# import threading/queue/time for the fan-out, and deque for the bounded event history
+import queue
+import threading
+import time
+from collections import deque
+
+
+
+# The integer user ids among `user_ids`; None and values that are not ids are left out
+def _user_id_set(user_ids):
+    ids = set()
+    for user_id in user_ids:
+        try:
+            ids.add(int(user_id))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+
+# One connected client: a bounded queue of matching events plus its filter
+class Subscription:
+
+    def __init__(self, feed, user_id=None, project_id=None, max_queue=1000):
+        self.feed = feed
+        self.user_id = user_id
+        self.project_id = project_id
+        self.events = queue.Queue(maxsize=max_queue)
+        # Set when the client fell too far behind and events had to be dropped
+        self.overflowed = False
+
+    # Does the event concern this subscriber? (no filter means every event)
+    def matches(self, event):
+        if self.user_id is not None and self.user_id not in event['user_ids']:
+            return False
+        if self.project_id is not None and event['project_id'] != self.project_id:
+            return False
+        return True
+
+    # Wait up to `timeout` seconds for the next event (None on timeout)
+    def next_event(self, timeout):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+
+class ChangeFeed:
+
+    def __init__(self, history_size=10000, subscriber_queue_size=1000):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+
+        # Counters
+        self.published = 0
+        self.dropped = 0
+
+    # Publish an event after the change it describes has been committed
+    #   event_type  e.g. 'task.created', 'task.updated', 'project.deleted'
+    #   project_id  project the change belongs to (None if unknown)
+    #   user_ids    users the change concerns (e.g. old and new assignee)
+    def publish(self, event_type, project_id=None, user_ids=(), **data):
+        with self._lock:
+            self._seq += 1
+            event = {
+                "seq": self._seq,
+                "type": event_type,
+                "project_id": project_id,
+                "user_ids": sorted(_user_id_set(user_ids)),
+                "at": time.time(),
+                "data": data,
+            }
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+
+        # Fan out without holding the lock; a subscriber that cannot keep up is marked overflowed
+        for subscription in subscribers:
+            if subscription.overflowed or not subscription.matches(event):
+                continue
+            try:
+                subscription.events.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+                with self._lock:
+                    self.dropped += 1
+        return event
+
+    # Register a subscriber and return it with the events it missed since `since`
+    # Returns (subscription, missed events, complete) where complete is False when `since`
+    # is older than the retained history (the client must reload instead of resuming)
+    def subscribe(self, user_id=None, project_id=None, since=None):
+        subscription = Subscription(self, user_id=user_id, project_id=project_id, max_queue=self.subscriber_queue_size)
+        with self._lock:
+            missed, complete = self._replay(subscription, since)
+            self._subscribers.add(subscription)
+        return subscription, missed, complete
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    # Events after `since` matching a filter, without subscribing (long polling)
+    def events_since(self, since, user_id=None, project_id=None):
+        probe = Subscription(self, user_id=user_id, project_id=project_id)
+        with self._lock:
+            return self._replay(probe, since)
+
+    # Must be called with the lock held
+    def _replay(self, subscription, since):
+        if since is None:
+            return [], True
+        oldest = self._history[0]['seq'] if self._history else self._seq + 1
+        # A position ahead of the feed comes from before a restart (sequence numbers start over)
+        complete = oldest - 1 <= since <= self._seq
+        missed = [event for event in self._history if event['seq'] > since and subscription.matches(event)]
+        return missed, complete
+
+    # Latest sequence number handed out
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def stats(self):
+        with self._lock:
+            return {
+                "last_seq": self._seq,
+                "published": self.published,
+                "dropped": self.dropped,
+                "subscribers": len(self._subscribers),
+                "history": len(self._history),
+            }
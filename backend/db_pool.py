@@ -0,0 +1,271 @@
+# import sqlite3 to open and tune the SQLite connections handed out by the pool
+import sqlite3
+
+# import threading to guard the pool's bookkeeping, and queue to hold the idle connections
+import threading
+import queue
+
+# import time to measure sampled statements and to back off when the database is busy, and random to add jitter
+import random
+import time
+
+# import the cursor wrapper that times and counts rows of sampled SELECT statements
+from metrics import TracedCursor
+
+
+
+# Is this sqlite3 error SQLITE_BUSY (another connection, possibly in another process, holds the write lock)?
+def is_busy(error):
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # Extended codes (e.g. SQLITE_BUSY_SNAPSHOT) keep the primary code in the low byte
+        return code & 0xff == sqlite3.SQLITE_BUSY
+    return 'database is locked' in str(error)
+
+
+
+# Connection class used for every pooled connection
+# Handlers still call `conn.close()` when they are done; for a pooled connection that means
+# "give it back" rather than actually closing the underlying SQLite handle
+class PooledConnection(sqlite3.Connection):
+
+    # The pool that owns this connection, and whether it is currently tied to a Flask request
+    pool = None
+    request_scoped = False
+
+    def close(self):
+        # A request-scoped connection is released once, when the request is torn down
+        if self.request_scoped:
+            return
+
+        # Otherwise return the connection to its pool (or close it if it has no pool)
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    # Really close the underlying SQLite handle
+    def close_for_real(self):
+        super().close()
+
+    # Start a write transaction, taking the write lock up front
+    # busy_timeout already waits for the lock; when it expires under heavy write contention (many workers),
+    # the BEGIN is retried with jittered exponential backoff before SQLITE_BUSY is raised to the caller.
+    # Retrying is safe here because nothing has been written yet, and once BEGIN IMMEDIATE succeeds the
+    # rest of the transaction cannot fail with SQLITE_BUSY.
+    def begin_immediate(self):
+        retries = self.pool.busy_retries if self.pool is not None else 0
+        delay = self.pool.busy_backoff if self.pool is not None else 0.0
+        for attempt in range(retries + 1):
+            try:
+                return super().execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError as error:
+                if not is_busy(error) or attempt == retries:
+                    raise
+                self.pool.record_busy_retry()
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay *= 2
+
+    # Statement tracing: when the pool has a tracer, a sample of statements is timed and their rows counted
+    def execute(self, sql, parameters=()):
+        tracer = self.pool.tracer if self.pool is not None else None
+        if tracer is None or not tracer.should_sample():
+            return super().execute(sql, parameters)
+
+        started = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        elapsed = time.perf_counter() - started
+
+        # Statements without a result set (INSERT/UPDATE/DELETE) are recorded right away
+        if cursor.description is None:
+            tracer.observe_statement(sql, elapsed, cursor.rowcount)
+            return cursor
+
+        # Queries are recorded once their rows have been fetched
+        return TracedCursor(cursor, tracer, sql, elapsed)
+
+    def executemany(self, sql, parameters):
+        tracer = self.pool.tracer if self.pool is not None else None
+        if tracer is None or not tracer.should_sample():
+            return super().executemany(sql, parameters)
+
+        started = time.perf_counter()
+        cursor = super().executemany(sql, parameters)
+        tracer.observe_statement(sql, time.perf_counter() - started, cursor.rowcount)
+        return cursor
+
+    def commit(self):
+        tracer = self.pool.tracer if self.pool is not None else None
+        if tracer is None or not tracer.should_sample():
+            return super().commit()
+
+        started = time.perf_counter()
+        super().commit()
+        tracer.observe_statement('COMMIT', time.perf_counter() - started, 0)
+
+
+
+# Raised when no connection becomes available before the acquire timeout expires
+class PoolTimeout(Exception):
+    pass
+
+
+
+# Bounded, thread-safe pool of pre-tuned SQLite connections
+class ConnectionPool:
+
+    def __init__(self, database, max_size=8, timeout=5.0, synchronous='NORMAL',
+                 mmap_size=268435456, cache_size=-16000, statement_cache_size=256, busy_timeout=5000,
+                 busy_retries=3, busy_backoff=0.05, tracer=None):
+        # Where the database lives and how connections should be tuned
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout = busy_timeout
+        # How often (and after how long a first pause, in seconds) a BEGIN IMMEDIATE that found the database busy is retried
+        self.busy_retries = busy_retries
+        self.busy_backoff = busy_backoff
+
+        # Optional metrics registry used to time a sample of statements (see PooledConnection.execute)
+        self.tracer = tracer
+
+        # Idle connections ready to be handed out (LIFO keeps the warmest connection in use)
+        self._idle = queue.LifoQueue(maxsize=max_size)
+
+        # Lock protecting the counters below
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+        # Hit/miss statistics
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.busy = 0
+
+    # Open a new connection and apply all pragmas once, for the lifetime of the connection
+    def _connect(self):
+        # `cached_statements` controls sqlite3's prepared-statement cache per connection
+        # `check_same_thread=False` lets a connection be reused by whichever thread acquires it next
+        connection = sqlite3.connect(self.database, factory=PooledConnection,
+                                     cached_statements=self.statement_cache_size,
+                                     check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.pool = self
+
+        # WAL lets readers proceed while a writer commits
+        connection.execute('PRAGMA journal_mode = WAL')
+        # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+        connection.execute(f'PRAGMA synchronous = {self.synchronous}')
+        connection.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        connection.execute(f'PRAGMA cache_size = {int(self.cache_size)}')
+        connection.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        connection.execute('PRAGMA temp_store = MEMORY')
+
+        return connection
+
+    # Hand out a connection, reusing an idle one when possible
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError('Connection pool is closed')
+
+        # Fast path: an idle connection is available
+        try:
+            connection = self._idle.get_nowait()
+            with self._lock:
+                self.hits += 1
+            return connection
+        except queue.Empty:
+            pass
+
+        # Slow path: open a new connection if we are still below the bound
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                self.misses += 1
+                create = True
+            else:
+                self.waits += 1
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool is exhausted: wait for another thread to release a connection
+        try:
+            connection = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f'No database connection available within {self.timeout} seconds')
+
+        with self._lock:
+            self.hits += 1
+        return connection
+
+    # Give a connection back to the pool
+    def release(self, connection):
+        connection.request_scoped = False
+
+        # Never hand out a connection with a half-finished transaction
+        if connection.in_transaction:
+            connection.rollback()
+
+        if self._closed:
+            self._discard(connection)
+            return
+
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            self._discard(connection)
+
+    # Count a write transaction that had to be retried because the database was busy
+    def record_busy_retry(self):
+        with self._lock:
+            self.busy += 1
+
+    # Close a connection and forget about it
+    def _discard(self, connection):
+        with self._lock:
+            self._created -= 1
+        connection.close_for_real()
+
+    # Close every idle connection and refuse further acquires
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    # Snapshot of the pool's hit/miss counters
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "database": self.database,
+                "max_size": self.max_size,
+                "open_connections": self._created,
+                "idle_connections": self._idle.qsize(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "busy_retries": self.busy,
+                "hit_rate": (self.hits / requests) if requests else 0.0,
+            }
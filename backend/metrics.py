@@ -0,0 +1,241 @@
+# In-process metrics for the API: per-route latency histograms and per-statement SQL timings,
+# rendered in the Prometheus text exposition format by the /metrics endpoint
+
+# import logging to report slow queries, and random/re/threading/time for sampling, normalization and timing
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Collapses `IN (?, ?, ?)` lists so statements built for different batch sizes share one series
+_PLACEHOLDER_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE)
+
+
+
+# Cumulative histogram with fixed buckets (not thread-safe on its own; callers hold the registry lock)
+class Histogram:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    # Yield (upper bound label, cumulative count) pairs, ending with +Inf
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            yield bound, running
+
+
+
+# Timing and row counts for one normalized SQL statement
+class StatementStats:
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.rows = 0
+        self.slow = 0
+
+
+
+# Escape a Prometheus label value
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+
+class MetricsRegistry:
+
+    def __init__(self, sample_rate=0.1, slow_query_seconds=0.1, max_statements=500):
+        # Fraction of SQL statements that are timed (0 disables per-statement tracing)
+        self.sample_rate = sample_rate
+        self.slow_query_seconds = slow_query_seconds
+        self.max_statements = max_statements
+
+        self._lock = threading.Lock()
+        self.routes = {}
+        self.statements = {}
+        self.recent_slow_queries = deque(maxlen=50)
+
+        # Extra gauges supplied by other components (connection pool, caches, buffers), read at render time
+        self._gauge_sources = {}
+
+    # Cheap per-statement sampling decision
+    def should_sample(self):
+        rate = self.sample_rate
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    # Record one request's latency
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route, status)
+        with self._lock:
+            histogram = self.routes.get(key)
+            if histogram is None:
+                histogram = self.routes[key] = Histogram()
+            histogram.observe(seconds)
+
+    # Record one sampled statement's execution time and the number of rows it returned or changed
+    def observe_statement(self, sql, seconds, rows):
+        statement = _PLACEHOLDER_LIST.sub('IN (?)', ' '.join(sql.split()))
+        rows = max(rows, 0)
+        slow = seconds >= self.slow_query_seconds
+
+        with self._lock:
+            stats = self.statements.get(statement)
+            if stats is None:
+                # Bound the number of series; anything beyond it is folded into one bucket
+                if len(self.statements) >= self.max_statements:
+                    statement = 'other'
+                    stats = self.statements.setdefault(statement, StatementStats())
+                else:
+                    stats = self.statements[statement] = StatementStats()
+            stats.histogram.observe(seconds)
+            stats.rows += rows
+            if slow:
+                stats.slow += 1
+                self.recent_slow_queries.append({"sql": statement, "seconds": seconds, "rows": rows, "at": time.time()})
+
+        if slow:
+            logger.warning('Slow query (%.1f ms, %d rows): %s', seconds * 1000, rows, statement)
+
+    # Register a callable returning {name: value} gauges to include in the output
+    def add_gauge_source(self, prefix, source):
+        self._gauge_sources[prefix] = source
+
+    # Render every metric in the Prometheus text format
+    def render(self):
+        lines = []
+
+        with self._lock:
+            routes = {key: (list(histogram.cumulative()), histogram.total, histogram.count) for key, histogram in self.routes.items()}
+            statements = {sql: (list(stats.histogram.cumulative()), stats.histogram.total, stats.histogram.count, stats.rows, stats.slow)
+                          for sql, stats in self.statements.items()}
+
+        lines.append('# HELP http_request_duration_seconds Request latency by route')
+        lines.append('# TYPE http_request_duration_seconds histogram')
+        for (method, route, status), (buckets, total, count) in sorted(routes.items()):
+            labels = f'method="{_label(method)}",route="{_label(route)}",status="{status}"'
+            for bound, cumulative in buckets:
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append('# HELP sql_statement_duration_seconds Execution time of sampled SQL statements')
+        lines.append('# TYPE sql_statement_duration_seconds histogram')
+        for sql, (buckets, total, count, _, _) in sorted(statements.items()):
+            labels = f'statement="{_label(sql)}"'
+            for bound, cumulative in buckets:
+                lines.append(f'sql_statement_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'sql_statement_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'sql_statement_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append('# HELP sql_statement_rows_total Rows returned or changed by sampled SQL statements')
+        lines.append('# TYPE sql_statement_rows_total counter')
+        for sql, (_, _, _, rows, _) in sorted(statements.items()):
+            lines.append(f'sql_statement_rows_total{{statement="{_label(sql)}"}} {rows}')
+
+        lines.append('# HELP sql_slow_statements_total Sampled SQL statements slower than the slow query threshold')
+        lines.append('# TYPE sql_slow_statements_total counter')
+        for sql, (_, _, _, _, slow) in sorted(statements.items()):
+            lines.append(f'sql_slow_statements_total{{statement="{_label(sql)}"}} {slow}')
+
+        lines.append('# HELP sql_trace_sample_rate Fraction of SQL statements that are timed')
+        lines.append('# TYPE sql_trace_sample_rate gauge')
+        lines.append(f'sql_trace_sample_rate {self.sample_rate}')
+
+        # Gauges from other components (numeric values only)
+        for prefix, source in sorted(self._gauge_sources.items()):
+            try:
+                values = source()
+            except Exception:
+                logger.exception('Metrics source %s failed', prefix)
+                continue
+            for name, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# TYPE {prefix}_{name} gauge')
+                lines.append(f'{prefix}_{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+
+# Cursor wrapper used for sampled SELECT statements: times the fetches and counts the rows returned
+class TracedCursor:
+
+    def __init__(self, cursor, registry, sql, elapsed):
+        self._cursor = cursor
+        self._registry = registry
+        self._sql = sql
+        self._elapsed = elapsed
+        self._rows = 0
+        self._done = False
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._registry.observe_statement(self._sql, self._elapsed, self._rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - started
+        self._rows += row is not None
+        # Single-row lookups are recorded after the first fetch
+        self._finish()
+        return row
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self._next_row()
+            if row is None:
+                return
+            yield row
+
+    def _next_row(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - started
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,658 @@
+# Schema migrations for the projects database
+# Each migration is applied once, in order, inside its own transaction, and recorded in `schema_migrations`
+# so an existing projects.db can be brought up to date in place.
+#
+# Usage (from the backend directory):
+#   python migrations.py status   [--db PATH]   show applied and pending migrations
+#   python migrations.py migrate  [--db PATH]   apply pending migrations
+#   python migrations.py check                  fail if a hot query in app.py scans a table (QUERY_TEMPLATES
+#                                               stands in for the statements app.py builds at run time)
+
+# import sqlite3 to apply migrations, and argparse/sys/os/ast/re for the command line interface and the query plan check
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import sys
+
+# Paths used by the command line interface and the query plan check
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATABASE = os.path.join(BACKEND_DIR, '..', 'projects.db')
+SCHEMA_PATH = os.path.join(BACKEND_DIR, '..', 'projects_schema.sql')
+APP_PATH = os.path.join(BACKEND_DIR, 'app.py')
+
+
+
+# Ordered list of migrations: (version, name, SQL script)
+# Never edit a migration once it has shipped; add a new one instead
+MIGRATIONS = [
+    (1, 'index tasks by assignee and project', '''
+        -- view_assigned_tasks, update_task_status and log_time_on_task filter on assigned_user_id (and task_id)
+        CREATE INDEX IF NOT EXISTS idx_tasks_assigned_user ON tasks (assigned_user_id, task_id);
+        -- Lookups of a project's tasks, optionally narrowed by status
+        CREATE INDEX IF NOT EXISTS idx_tasks_project_status ON tasks (project_id, status);
+    '''),
+    (2, 'index task logs by task and user', '''
+        -- Time logged on a task, and time logged by a user, both ordered by time
+        CREATE INDEX IF NOT EXISTS idx_task_logs_task ON task_logs (task_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_task_logs_user ON task_logs (user_id, timestamp);
+    '''),
+    (3, 'per-project progress counters', '''
+        -- One row per project, maintained by the triggers below so progress reads are O(1)
+        CREATE TABLE IF NOT EXISTS project_progress (
+            project_id INTEGER PRIMARY KEY,
+            total_tasks INTEGER NOT NULL DEFAULT 0,
+            not_started INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            hours_logged REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (project_id) REFERENCES projects (project_id)
+        );
+
+        -- Backfill from the existing rows
+        INSERT OR REPLACE INTO project_progress (project_id, total_tasks, not_started, in_progress, completed, hours_logged)
+        SELECT p.project_id,
+               COUNT(t.task_id),
+               COALESCE(SUM(t.status = 'Not Started'), 0),
+               COALESCE(SUM(t.status = 'In Progress'), 0),
+               COALESCE(SUM(t.status = 'Completed'), 0),
+               COALESCE(SUM(t.hours_logged), 0)
+        FROM projects p LEFT JOIN tasks t ON t.project_id = p.project_id
+        GROUP BY p.project_id;
+
+        CREATE TRIGGER IF NOT EXISTS project_progress_project_insert AFTER INSERT ON projects
+        BEGIN
+            INSERT OR IGNORE INTO project_progress (project_id) VALUES (NEW.project_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS project_progress_project_delete AFTER DELETE ON projects
+        BEGIN
+            DELETE FROM project_progress WHERE project_id = OLD.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS project_progress_task_insert AFTER INSERT ON tasks
+        WHEN NEW.project_id IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO project_progress (project_id) VALUES (NEW.project_id);
+            UPDATE project_progress
+            SET total_tasks = total_tasks + 1,
+                not_started = not_started + (NEW.status = 'Not Started'),
+                in_progress = in_progress + (NEW.status = 'In Progress'),
+                completed = completed + (NEW.status = 'Completed'),
+                hours_logged = hours_logged + COALESCE(NEW.hours_logged, 0)
+            WHERE project_id = NEW.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS project_progress_task_delete AFTER DELETE ON tasks
+        WHEN OLD.project_id IS NOT NULL
+        BEGIN
+            UPDATE project_progress
+            SET total_tasks = total_tasks - 1,
+                not_started = not_started - (OLD.status = 'Not Started'),
+                in_progress = in_progress - (OLD.status = 'In Progress'),
+                completed = completed - (OLD.status = 'Completed'),
+                hours_logged = hours_logged - COALESCE(OLD.hours_logged, 0)
+            WHERE project_id = OLD.project_id;
+        END;
+
+        -- An update is "remove the old row, add the new one", split in two so NULL project ids are skipped
+        CREATE TRIGGER IF NOT EXISTS project_progress_task_update_old AFTER UPDATE OF project_id, status, hours_logged ON tasks
+        WHEN OLD.project_id IS NOT NULL
+        BEGIN
+            UPDATE project_progress
+            SET total_tasks = total_tasks - 1,
+                not_started = not_started - (OLD.status = 'Not Started'),
+                in_progress = in_progress - (OLD.status = 'In Progress'),
+                completed = completed - (OLD.status = 'Completed'),
+                hours_logged = hours_logged - COALESCE(OLD.hours_logged, 0)
+            WHERE project_id = OLD.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS project_progress_task_update_new AFTER UPDATE OF project_id, status, hours_logged ON tasks
+        WHEN NEW.project_id IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO project_progress (project_id) VALUES (NEW.project_id);
+            UPDATE project_progress
+            SET total_tasks = total_tasks + 1,
+                not_started = not_started + (NEW.status = 'Not Started'),
+                in_progress = in_progress + (NEW.status = 'In Progress'),
+                completed = completed + (NEW.status = 'Completed'),
+                hours_logged = hours_logged + COALESCE(NEW.hours_logged, 0)
+            WHERE project_id = NEW.project_id;
+        END;
+    '''),
+    (4, 'backfill tasks.hours_logged from task_logs', '''
+        -- log_time_on_task now keeps hours_logged up to date; bring existing rows in line with their logs
+        UPDATE tasks
+        SET hours_logged = (SELECT SUM(hours_spent) FROM task_logs WHERE task_logs.task_id = tasks.task_id)
+        WHERE task_id IN (SELECT task_id FROM task_logs);
+    '''),
+    (5, 'session expiry and revocation', '''
+        -- Signed session tokens reference a login_sessions row; revoking it puts the token on the denylist
+        ALTER TABLE login_sessions ADD COLUMN expires_at TIMESTAMP;
+        ALTER TABLE login_sessions ADD COLUMN revoked_at TIMESTAMP;
+        CREATE INDEX IF NOT EXISTS idx_login_sessions_revoked ON login_sessions (revoked_at);
+    '''),
+    (6, 'row versions for projects and tasks', '''
+        -- Every insert or update stamps the row with the next value of one database-wide counter,
+        -- so a row's version changes on every write and MAX(version) over a set of rows changes
+        -- whenever any of them is written (used for ETags)
+        ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+        CREATE TABLE IF NOT EXISTS row_version_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO row_version_counter (id, value) VALUES (1, 0);
+
+        -- Collection version of a user's tasks: COUNT(*) and MAX(version) from the index alone
+        CREATE INDEX IF NOT EXISTS idx_tasks_assigned_version ON tasks (assigned_user_id, version);
+
+        CREATE TRIGGER IF NOT EXISTS projects_version_insert AFTER INSERT ON projects
+        BEGIN
+            UPDATE row_version_counter SET value = value + 1 WHERE id = 1;
+            UPDATE projects SET version = (SELECT value FROM row_version_counter WHERE id = 1) WHERE project_id = NEW.project_id;
+        END;
+
+        -- Statements that already moved the version (e.g. a version precondition) are left alone
+        CREATE TRIGGER IF NOT EXISTS projects_version_update AFTER UPDATE ON projects
+        WHEN NEW.version = OLD.version
+        BEGIN
+            UPDATE row_version_counter SET value = value + 1 WHERE id = 1;
+            UPDATE projects SET version = (SELECT value FROM row_version_counter WHERE id = 1) WHERE project_id = NEW.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS tasks_version_insert AFTER INSERT ON tasks
+        BEGIN
+            UPDATE row_version_counter SET value = value + 1 WHERE id = 1;
+            UPDATE tasks SET version = (SELECT value FROM row_version_counter WHERE id = 1) WHERE task_id = NEW.task_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS tasks_version_update AFTER UPDATE ON tasks
+        WHEN NEW.version = OLD.version
+        BEGIN
+            UPDATE row_version_counter SET value = value + 1 WHERE id = 1;
+            UPDATE tasks SET version = (SELECT value FROM row_version_counter WHERE id = 1) WHERE task_id = NEW.task_id;
+        END;
+    '''),
+    (7, 'full-text search over projects and tasks', '''
+        -- Search documents: the name and description, plus a `facets` column holding the filter values as tokens
+        -- (p<project_id>, s<status without spaces>, u<assigned_user_id>) so filters are answered by the index too
+        CREATE VIEW IF NOT EXISTS projects_search AS
+        SELECT project_id, project_name, description,
+               'p' || project_id || COALESCE(' s' || replace(lower(status), ' ', ''), '') AS facets
+        FROM projects;
+
+        CREATE VIEW IF NOT EXISTS tasks_search AS
+        SELECT task_id, task_name, description,
+               COALESCE('p' || project_id, '') || COALESCE(' s' || replace(lower(status), ' ', ''), '') || COALESCE(' u' || assigned_user_id, '') AS facets
+        FROM tasks;
+
+        -- External-content FTS5 indexes over the views: the text lives in projects/tasks, the index maps terms to rowids.
+        -- prefix='2 3' keeps short prefix queries (e.g. "mi*") from expanding over the whole term list
+        CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+            project_name, description, facets,
+            content='projects_search', content_rowid='project_id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            task_name, description, facets,
+            content='tasks_search', content_rowid='task_id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+
+        -- A match in the name counts ten times as much as one in the description; facets do not count
+        INSERT INTO projects_fts (projects_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)');
+        INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)');
+
+        -- Index the existing rows
+        INSERT INTO projects_fts (projects_fts) VALUES ('rebuild');
+        INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+
+        CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects
+        BEGIN
+            INSERT INTO projects_fts (rowid, project_name, description, facets)
+            SELECT project_id, project_name, description, facets FROM projects_search WHERE project_id = NEW.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects
+        BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, project_name, description, facets)
+            VALUES ('delete', OLD.project_id, OLD.project_name, OLD.description,
+                    'p' || OLD.project_id || COALESCE(' s' || replace(lower(OLD.status), ' ', ''), ''));
+        END;
+
+        -- Only changes to indexed values touch the index (version bumps do not)
+        CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF project_name, description, status ON projects
+        BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, project_name, description, facets)
+            VALUES ('delete', OLD.project_id, OLD.project_name, OLD.description,
+                    'p' || OLD.project_id || COALESCE(' s' || replace(lower(OLD.status), ' ', ''), ''));
+            INSERT INTO projects_fts (rowid, project_name, description, facets)
+            SELECT project_id, project_name, description, facets FROM projects_search WHERE project_id = NEW.project_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, task_name, description, facets)
+            SELECT task_id, task_name, description, facets FROM tasks_search WHERE task_id = NEW.task_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, task_name, description, facets)
+            VALUES ('delete', OLD.task_id, OLD.task_name, OLD.description,
+                    COALESCE('p' || OLD.project_id, '') || COALESCE(' s' || replace(lower(OLD.status), ' ', ''), '') || COALESCE(' u' || OLD.assigned_user_id, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task_name, description, project_id, status, assigned_user_id ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, task_name, description, facets)
+            VALUES ('delete', OLD.task_id, OLD.task_name, OLD.description,
+                    COALESCE('p' || OLD.project_id, '') || COALESCE(' s' || replace(lower(OLD.status), ' ', ''), '') || COALESCE(' u' || OLD.assigned_user_id, ''));
+            INSERT INTO tasks_fts (rowid, task_name, description, facets)
+            SELECT task_id, task_name, description, facets FROM tasks_search WHERE task_id = NEW.task_id;
+        END;
+    '''),
+    (8, 'index task logs by time', '''
+        -- Time reports aggregate every log in a time range; the index covers the columns they read,
+        -- so a range is summed without touching the table
+        CREATE INDEX IF NOT EXISTS idx_task_logs_timestamp ON task_logs (timestamp, user_id, task_id, hours_spent);
+    '''),
+    (9, 'archive tables for completed projects', '''
+        -- Completed projects are moved here with their progress counters, team, tasks and time logs (see archive.py),
+        -- so the hot tables and their indexes only hold live work. Each archive table mirrors its hot table's
+        -- columns and keeps the original ids (AUTOINCREMENT never hands them out again). No triggers: archived
+        -- rows are read-only and are not in the search index
+        CREATE TABLE IF NOT EXISTS archived_projects (
+            project_id INTEGER PRIMARY KEY,
+            project_name TEXT NOT NULL,
+            description TEXT,
+            start_date DATE,
+            end_date DATE,
+            status TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS archived_project_progress (
+            project_id INTEGER PRIMARY KEY,
+            total_tasks INTEGER NOT NULL DEFAULT 0,
+            not_started INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            hours_logged REAL NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS archived_project_team_members (
+            project_team_member_id INTEGER PRIMARY KEY,
+            project_id INTEGER,
+            user_id INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_archived_team_project ON archived_project_team_members (project_id, user_id);
+
+        CREATE TABLE IF NOT EXISTS archived_tasks (
+            task_id INTEGER PRIMARY KEY,
+            project_id INTEGER,
+            task_name TEXT NOT NULL,
+            description TEXT,
+            due_date DATE,
+            status TEXT,
+            assigned_user_id INTEGER,
+            hours_logged REAL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_archived_tasks_project ON archived_tasks (project_id, status);
+
+        CREATE TABLE IF NOT EXISTS archived_task_logs (
+            log_id INTEGER PRIMARY KEY,
+            task_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            hours_spent REAL NOT NULL,
+            timestamp DATETIME
+        );
+        CREATE INDEX IF NOT EXISTS idx_archived_task_logs_task ON archived_task_logs (task_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_archived_task_logs_user ON archived_task_logs (user_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_archived_task_logs_timestamp ON archived_task_logs (timestamp, user_id, task_id, hours_spent);
+
+        -- The archiver picks completed projects, oldest end date first
+        CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status, end_date);
+    '''),
+    (10, 'per-user workload summary', '''
+        -- One row per user behind the manager workload dashboard, recomputed by workload.py for the users whose
+        -- tasks or time logs changed. Overdue counts and weekly hours depend on the day: `as_of` is the day (UTC)
+        -- a row was computed for, and rows from an earlier day are recomputed before they are served
+        CREATE TABLE IF NOT EXISTS user_workload (
+            user_id INTEGER PRIMARY KEY,
+            not_started INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            overdue INTEGER NOT NULL DEFAULT 0,
+            hours_this_week REAL NOT NULL DEFAULT 0,
+            as_of DATE NOT NULL,
+            refreshed_at TIMESTAMP NOT NULL
+        );
+    '''),
+    (11, 'time report generation', '''
+        -- Cached rollups of closed periods (app.py) are keyed on this counter, which moves whenever a time log
+        -- of a past day can change: a log is deleted, edited, moved to or from the archive (archive.py, in any
+        -- process) or written with a timestamp before today (e.g. flushed by the time log buffer after midnight)
+        CREATE TABLE IF NOT EXISTS report_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO report_generation (id, generation) VALUES (1, 0);
+
+        CREATE TRIGGER IF NOT EXISTS report_generation_log_insert AFTER INSERT ON task_logs
+        WHEN NEW.timestamp < date('now')
+        BEGIN
+            UPDATE report_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS report_generation_log_update AFTER UPDATE ON task_logs
+        BEGIN
+            UPDATE report_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS report_generation_log_delete AFTER DELETE ON task_logs
+        BEGIN
+            UPDATE report_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS report_generation_archived_log_delete AFTER DELETE ON archived_task_logs
+        BEGIN
+            UPDATE report_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+    '''),
+]
+
+
+
+# Make sure the bookkeeping table exists
+def ensure_migrations_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+
+# Return the set of migration versions already applied to the database
+def applied_versions(conn):
+    ensure_migrations_table(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+
+
+
+# Return the highest applied version (0 for a database that has never been migrated)
+def current_version(conn):
+    versions = applied_versions(conn)
+    return max(versions) if versions else 0
+
+
+
+# Split a migration script into complete statements (trigger bodies contain semicolons of their own)
+def split_statements(script):
+    statements = []
+    pending = ''
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ''
+    if pending.strip():
+        statements.append(pending.strip())
+    return statements
+
+
+
+# Apply every pending migration to an open connection and return the versions applied
+def apply_migrations(conn):
+    done = applied_versions(conn)
+    applied = []
+
+    for version, name, script in MIGRATIONS:
+        if version in done:
+            continue
+
+        # Take the write lock, then check again: another process may have applied it in the meantime
+        conn.execute('BEGIN IMMEDIATE')
+        if conn.execute('SELECT 1 FROM schema_migrations WHERE version = ?', (version,)).fetchone():
+            conn.rollback()
+            continue
+
+        # The migration and its bookkeeping row are committed together, or not at all
+        try:
+            for statement in split_statements(script):
+                conn.execute(statement)
+            conn.execute('INSERT INTO schema_migrations (version, name) VALUES (?, ?)', (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
+
+
+
+# Apply every pending migration to the database at the given path
+def migrate(database):
+    conn = sqlite3.connect(database, timeout=30)
+    try:
+        return apply_migrations(conn)
+    finally:
+        conn.close()
+
+
+
+# Representative statements of every function in app.py that builds its SQL at run time, which the literal
+# extraction below cannot see: each filter a builder can add is present, and both the hot and the archive tables
+# where the builder picks one. `check` plans these like the literal statements, and reports a function that runs
+# built SQL without an entry here. Each template is the exact statement the app builds for some request;
+# test_migrations.py runs those requests and fails when a builder changes without its templates
+QUERY_TEMPLATES = {
+    'view_assigned_tasks': [
+        'SELECT task_id, task_name, status FROM tasks WHERE assigned_user_id = ? ORDER BY task_id',
+        'SELECT task_id, task_name, status FROM tasks WHERE assigned_user_id = ? AND status = ? AND due_date <= ? '
+        'AND due_date >= ? AND task_id > ? ORDER BY task_id LIMIT ?',
+    ],
+    # Runs the streaming variant of view_assigned_tasks's query
+    'stream_json_array': [
+        'SELECT task_id, task_name, status FROM tasks WHERE assigned_user_id = ? AND status = ? AND task_id > ? ORDER BY task_id LIMIT ?',
+    ],
+    'search': [
+        'SELECT r.task_id, r.project_id, r.task_name, r.description, r.due_date, r.status, r.assigned_user_id, -m.rank AS score '
+        'FROM (SELECT rowid, rank FROM tasks_fts WHERE tasks_fts MATCH ? '
+        'ORDER BY rank, rowid LIMIT ? OFFSET ?) m JOIN tasks r ON r.task_id = m.rowid ORDER BY m.rank, m.rowid',
+        'SELECT r.project_id, r.project_name, r.description, r.start_date, r.end_date, r.status, -m.rank AS score '
+        'FROM (SELECT rowid, rank FROM projects_fts WHERE projects_fts MATCH ? '
+        'ORDER BY rank, rowid LIMIT ? OFFSET ?) m JOIN projects r ON r.project_id = m.rowid ORDER BY m.rank, m.rowid',
+    ],
+    # time_report builds the statement and fetch_report_batches runs it
+    'fetch_report_batches': [
+        "SELECT l.user_id AS user_id, l.project_id AS project_id, date(l.timestamp, 'weekday 0', '-6 days') AS week, "
+        'ROUND(SUM(l.hours_spent), 2) AS hours, COUNT(*) AS entries FROM ('
+        'SELECT l.user_id, l.task_id, l.hours_spent, l.timestamp, t.project_id FROM task_logs l JOIN tasks t ON t.task_id = l.task_id '
+        'WHERE l.timestamp >= ? AND l.timestamp < ? UNION ALL '
+        'SELECT l.user_id, l.task_id, l.hours_spent, l.timestamp, t.project_id FROM archived_task_logs l JOIN archived_tasks t ON t.task_id = l.task_id '
+        'WHERE l.timestamp >= ? AND l.timestamp < ?) l GROUP BY 1, 2, 3 ORDER BY 1, 2, 3',
+        'SELECT date(l.timestamp) AS day, ROUND(SUM(l.hours_spent), 2) AS hours, COUNT(*) AS entries FROM ('
+        'SELECT l.user_id, l.task_id, l.hours_spent, l.timestamp FROM task_logs l WHERE l.timestamp >= ? AND l.timestamp < ? AND l.user_id = ? UNION ALL '
+        'SELECT l.user_id, l.task_id, l.hours_spent, l.timestamp FROM archived_task_logs l WHERE l.timestamp >= ? AND l.timestamp < ? AND l.user_id = ?'
+        ') l GROUP BY 1 ORDER BY 1',
+    ],
+    'view_project_overview': [statement for tables in ({'projects': 'projects', 'progress': 'project_progress', 'tasks': 'tasks', 'team': 'project_team_members'},
+                                                        {'projects': 'archived_projects', 'progress': 'archived_project_progress',
+                                                         'tasks': 'archived_tasks', 'team': 'archived_project_team_members'})
+                              for statement in (
+        f"SELECT p.project_id, p.project_name, g.total_tasks FROM {tables['projects']} p "
+        f"LEFT JOIN {tables['progress']} g ON g.project_id = p.project_id WHERE p.project_id = ?",
+        f"SELECT task_id, task_name, status FROM {tables['tasks']} WHERE project_id = ? ORDER BY task_id",
+        f"SELECT u.user_id, u.name FROM {tables['team']} m JOIN users u ON u.user_id = m.user_id WHERE m.project_id = ? ORDER BY u.user_id",
+        f"SELECT u.user_id, u.name FROM users u WHERE u.user_id IN (SELECT assigned_user_id FROM {tables['tasks']} WHERE project_id = ?) ORDER BY u.user_id",
+    )],
+    # The dashboard lists every Team Member, so reading all of users is the point of the unfiltered variant
+    'workload_dashboard': [
+        'SELECT u.user_id, u.name, w.not_started, w.in_progress, w.completed, w.overdue, w.hours_this_week, '
+        "w.as_of, w.refreshed_at FROM users u LEFT JOIN user_workload w ON w.user_id = u.user_id WHERE u.role = 'Team Member' "
+        'AND u.user_id = ? ORDER BY u.user_id',
+    ],
+    'write_missed': [
+        'SELECT version FROM projects WHERE project_id = ?',
+        'SELECT version FROM tasks WHERE task_id = ? AND assigned_user_id = ?',
+        'SELECT 1 FROM archived_projects WHERE project_id = ?',
+        'SELECT 1 FROM archived_tasks WHERE task_id = ? AND assigned_user_id = ?',
+    ],
+    'existing_ids': [
+        'SELECT project_id FROM projects WHERE project_id IN (?, ?)',
+        'SELECT user_id FROM users WHERE user_id IN (?, ?)',
+    ],
+    'assign_tasks_bulk': [
+        'SELECT task_id, project_id, assigned_user_id FROM tasks WHERE task_id IN (?, ?)',
+    ],
+    # WARM_UP_QUERIES read whole indexes on purpose, to pull their pages into the page cache
+    'warm_up': [],
+}
+
+
+
+# Collect the literal SQL passed to `.execute()` / `.executemany()` in a Python source file
+def extract_statements(path):
+    return _find_execute_calls(path)[0]
+
+
+
+# Collect the `.execute()` / `.executemany()` calls in a Python source file whose SQL is built at run time,
+# as (line number, name of the enclosing function)
+def extract_dynamic_statements(path):
+    return _find_execute_calls(path)[1]
+
+
+
+# Walk a source file once for both of the above
+def _find_execute_calls(path):
+    with open(path) as source:
+        tree = ast.parse(source.read(), filename=path)
+
+    # Line ranges of the functions, to name the one a dynamic statement is built in
+    functions = [(node.lineno, node.end_lineno, node.name) for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+
+    statements = []
+    dynamic = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ('execute', 'executemany') and node.args):
+            continue
+        if isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str):
+            statements.append((node.lineno, ' '.join(node.args[0].value.split())))
+        else:
+            enclosing = [name for first, last, name in functions if first <= node.lineno <= last]
+            dynamic.append((node.lineno, enclosing[-1] if enclosing else '<module>'))
+
+    return sorted(statements), sorted(dynamic)
+
+
+
+# Build an in-memory database from the schema file plus every migration
+def build_reference_database():
+    conn = sqlite3.connect(':memory:')
+    with open(SCHEMA_PATH) as schema:
+        conn.executescript(schema.read())
+    apply_migrations(conn)
+    return conn
+
+
+
+# Return why a statement's plan reads a whole table, or None when every table is searched through an index
+def plan_problems(conn, sql):
+    # Bind NULL for every parameter; the plan does not depend on the values
+    try:
+        plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', (None,) * sql.count('?')).fetchall()
+    except sqlite3.Error as error:
+        return [f'cannot be planned: {error}']
+
+    # Scanning the rows of a subquery (run as a co-routine or materialized) reads no table; the subquery's own rows are checked
+    subqueries = {match.group(1) for row in plan for match in [re.match(r'(?:CO-ROUTINE|MATERIALIZE) (\S+)$', row[-1])] if match}
+    problems = []
+    for row in plan:
+        detail = row[-1]
+        # A full-text MATCH is reported as a scan of the virtual table (index string M...), but it is served by the FTS index
+        if (detail.startswith('SCAN ') and not detail.startswith('SCAN CONSTANT ROW') and detail.split()[1] not in subqueries
+                and not re.search(r'VIRTUAL TABLE INDEX \d+:.*M', detail)):
+            problems.append(detail)
+    return problems
+
+
+
+# Run EXPLAIN QUERY PLAN on every filtered statement in app.py and on QUERY_TEMPLATES, and return the ones
+# that scan a table, plus the dynamic statements whose function has no templates
+# Problems are (location, SQL, detail)
+def find_table_scans(path=APP_PATH):
+    conn = build_reference_database()
+    problems = []
+
+    for lineno, sql in extract_statements(path):
+        # Only statements that look rows up can scan; plain INSERTs and PRAGMAs are skipped
+        if ' WHERE ' not in f' {sql.upper()} ':
+            continue
+        problems.extend((f'app.py:{lineno}', sql, detail) for detail in plan_problems(conn, sql))
+
+    for function, templates in QUERY_TEMPLATES.items():
+        for sql in templates:
+            problems.extend((f'QUERY_TEMPLATES[{function!r}]', sql, detail) for detail in plan_problems(conn, sql))
+
+    for lineno, function in extract_dynamic_statements(path):
+        if function not in QUERY_TEMPLATES:
+            problems.append((f'app.py:{lineno}', f'<SQL built in {function}()>', 'not covered by QUERY_TEMPLATES'))
+
+    conn.close()
+    return problems
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage schema migrations for the projects database')
+    parser.add_argument('command', choices=['status', 'migrate', 'check'])
+    parser.add_argument('--db', default=os.environ.get('PROJECTS_DB', DEFAULT_DATABASE), help='path to the SQLite database')
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        applied = migrate(args.db)
+        print(f'Applied migrations: {applied}' if applied else 'Database is up to date')
+        return 0
+
+    if args.command == 'status':
+        conn = sqlite3.connect(args.db)
+        done = applied_versions(conn)
+        conn.close()
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:4d}  {'applied' if version in done else 'pending'}  {name}")
+        return 0
+
+    # check: every filtered query in app.py, literal or built from a template, must be served by an index
+    dynamic = extract_dynamic_statements(APP_PATH)
+    templates = sum(len(statements) for statements in QUERY_TEMPLATES.values())
+    print(f'{len(dynamic)} statement(s) in app.py are built at run time; planned from {templates} template(s) instead:')
+    for lineno, function in dynamic:
+        print(f"    app.py:{lineno}  {function}()  {len(QUERY_TEMPLATES[function]) if function in QUERY_TEMPLATES else 'no'} template(s)")
+
+    problems = find_table_scans()
+    for location, sql, detail in problems:
+        print(f'{location}: {detail}\n    {sql}')
+    if problems:
+        print(f'{len(problems)} hot query plan(s) scan a table or are not covered')
+        return 1
+    print('All queries use an index')
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
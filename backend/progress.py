@@ -0,0 +1,99 @@
+# Maintenance commands for the per-project progress counters (project_progress table)
+# The counters are kept up to date by triggers (see migration 3 in migrations.py); these commands
+# recompute them from scratch to detect or repair drift.
+#
+# Usage (from the backend directory):
+#   python progress.py verify  [--db PATH]   report projects whose counters differ from the tasks table
+#   python progress.py rebuild [--db PATH]   recompute every counter from the tasks table
+
+# import sqlite3 to read and rewrite the counters, and argparse/os/sys for the command line interface
+import argparse
+import os
+import sqlite3
+import sys
+
+# import the migration runner so the counters table exists before it is checked
+import migrations
+
+# Counter columns, in table order
+COUNTER_COLUMNS = ['total_tasks', 'not_started', 'in_progress', 'completed', 'hours_logged']
+
+# Counters recomputed from the tasks table, one row per project
+EXPECTED_COUNTERS_QUERY = '''
+    SELECT p.project_id,
+           COUNT(t.task_id) AS total_tasks,
+           COALESCE(SUM(t.status = 'Not Started'), 0) AS not_started,
+           COALESCE(SUM(t.status = 'In Progress'), 0) AS in_progress,
+           COALESCE(SUM(t.status = 'Completed'), 0) AS completed,
+           COALESCE(SUM(t.hours_logged), 0) AS hours_logged
+    FROM projects p LEFT JOIN tasks t ON t.project_id = p.project_id
+    GROUP BY p.project_id
+'''
+
+
+
+# Compare the stored counters with freshly computed ones and return the differences
+# Each drift is (project_id, column, stored value, expected value)
+def verify(conn):
+    stored = {row[0]: row[1:] for row in conn.execute(
+        f"SELECT project_id, {', '.join(COUNTER_COLUMNS)} FROM project_progress")}
+
+    drifts = []
+    for row in conn.execute(EXPECTED_COUNTERS_QUERY):
+        project_id, expected = row[0], row[1:]
+        actual = stored.pop(project_id, None)
+
+        if actual is None:
+            drifts.append((project_id, 'row', None, 'missing'))
+            continue
+
+        for column, have, want in zip(COUNTER_COLUMNS, actual, expected):
+            # hours are REAL sums, so allow for floating point rounding
+            if abs((have or 0) - (want or 0)) > 1e-6:
+                drifts.append((project_id, column, have, want))
+
+    # Counters left over for projects that no longer exist
+    for project_id in stored:
+        drifts.append((project_id, 'row', 'orphaned', None))
+
+    return drifts
+
+
+
+# Recompute every counter from the tasks table in one transaction
+def rebuild(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('DELETE FROM project_progress')
+    conn.execute(f"INSERT INTO project_progress (project_id, {', '.join(COUNTER_COLUMNS)}) {EXPECTED_COUNTERS_QUERY}")
+    conn.commit()
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify or rebuild the per-project progress counters')
+    parser.add_argument('command', choices=['verify', 'rebuild'])
+    parser.add_argument('--db', default=os.environ.get('PROJECTS_DB', migrations.DEFAULT_DATABASE), help='path to the SQLite database')
+    args = parser.parse_args(argv)
+
+    migrations.migrate(args.db)
+    conn = sqlite3.connect(args.db)
+
+    try:
+        drifts = verify(conn)
+        for project_id, column, have, want in drifts:
+            print(f'project {project_id}: {column} is {have}, expected {want}')
+
+        if args.command == 'rebuild':
+            rebuild(conn)
+            print(f'Rebuilt counters ({len(drifts)} drift(s) corrected)')
+            return 0
+
+        print(f'{len(drifts)} drift(s) found' if drifts else 'Counters are consistent')
+        return 1 if drifts else 0
+    finally:
+        conn.close()
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
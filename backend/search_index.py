@@ -0,0 +1,124 @@
+# Full-text search over projects and tasks
+# The FTS5 indexes (projects_fts, tasks_fts) are kept in sync with their tables by triggers (see migration 7
+# in migrations.py). Besides the text, each index holds a `facets` column with the filter values as tokens
+# (p<project_id>, s<status>, u<assigned_user_id>), so filtered searches are answered from the index alone.
+# This module turns user input into a safe FTS5 query, and its commands check, rebuild or optimize the
+# indexes of an existing database.
+#
+# Usage (from the backend directory):
+#   python search_index.py check    [--db PATH]   verify the indexes against the projects and tasks tables
+#   python search_index.py rebuild  [--db PATH]   rebuild both indexes from the tables
+#   python search_index.py optimize [--db PATH]   merge index segments (after large imports)
+
+# import sqlite3 to maintain the indexes, re to tokenize search input, and argparse/os/sys for the command line interface
+import argparse
+import os
+import re
+import sqlite3
+import sys
+
+# import the migration runner so the indexes exist before they are maintained
+import migrations
+
+# FTS5 index of each searchable table, and the indexed text columns a search looks at
+FTS_TABLES = {'projects': 'projects_fts', 'tasks': 'tasks_fts'}
+TEXT_COLUMNS = {'projects': ['project_name', 'description'], 'tasks': ['task_name', 'description']}
+
+# Words of the search input; a trailing * asks for a prefix match
+_TERM = re.compile(r'(\w+)(\*?)', re.UNICODE)
+
+# Upper bound on the number of terms, so one request cannot build an arbitrarily expensive query
+MAX_TERMS = 16
+
+
+
+# Facet tokens for the given filters, written the way the projects_search/tasks_search views write them
+def facet_tokens(project_id=None, status=None, assigned_user_id=None):
+    tokens = []
+    if project_id is not None:
+        tokens.append(f'p{int(project_id)}')
+    if status is not None:
+        tokens.append('s' + status.lower().replace(' ', ''))
+    if assigned_user_id is not None:
+        tokens.append(f'u{int(assigned_user_id)}')
+    return tokens
+
+
+
+# Turn free text into an FTS5 MATCH expression over a table's text columns, plus the facet filters:
+# every word must appear, `word*` matches a prefix, and every facet token must be present
+# Each term is quoted, so FTS5 operators and column filters in the input are treated as plain text
+# Returns None when the input contains no searchable word
+def match_expression(text, kind, facets=()):
+    # Single-letter prefixes would expand to a large part of the vocabulary; they are matched as whole words
+    terms = [f'"{word}"{star if len(word) > 1 else ""}' for word, star in _TERM.findall(text or '')][:MAX_TERMS]
+    if not terms:
+        return None
+    expression = f"{{{' '.join(TEXT_COLUMNS[kind])}}} : ({' '.join(terms)})"
+    return ' AND '.join([expression] + [f'facets : "{token}"' for token in facets])
+
+
+
+# Compare every index with the rows of its table; raises sqlite3.DatabaseError on a mismatch
+def check(conn):
+    try:
+        for table in FTS_TABLES.values():
+            conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)")
+    finally:
+        # The check writes nothing, but the INSERT form opened a transaction
+        conn.rollback()
+
+
+
+# Rebuild every index from its table in one transaction
+def rebuild(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    for table in FTS_TABLES.values():
+        conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+    conn.commit()
+
+
+
+# Merge each index into a single segment, which makes queries faster after bulk loads
+def optimize(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    for table in FTS_TABLES.values():
+        conn.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    conn.commit()
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check, rebuild or optimize the full-text search indexes')
+    parser.add_argument('command', choices=['check', 'rebuild', 'optimize'])
+    parser.add_argument('--db', default=os.environ.get('PROJECTS_DB', migrations.DEFAULT_DATABASE), help='path to the SQLite database')
+    args = parser.parse_args(argv)
+
+    migrations.migrate(args.db)
+    conn = sqlite3.connect(args.db, timeout=30)
+
+    try:
+        if args.command == 'rebuild':
+            rebuild(conn)
+            print('Rebuilt search indexes')
+            return 0
+
+        if args.command == 'optimize':
+            optimize(conn)
+            print('Optimized search indexes')
+            return 0
+
+        try:
+            check(conn)
+        except sqlite3.DatabaseError as error:
+            print(f'Search index is out of sync: {error} (run `python search_index.py rebuild`)')
+            return 1
+        print('Search indexes are consistent')
+        return 0
+    finally:
+        conn.close()
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
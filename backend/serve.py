@@ -0,0 +1,194 @@
+# Production entry point: serves the API from several worker processes sharing one listening socket
+# `app.run(debug=True)` at the bottom of app.py starts Flask's single-process debug server with the reloader,
+# which is only meant for development. This runner binds the socket once, applies migrations, then forks
+# `--workers` processes. Each worker warms its own connection pool and caches (see app.warm_up) and serves
+# requests on a threaded WSGI server. SQLite handles the concurrency: WAL lets every worker read while one
+# writes; a writer that finds the database locked waits (busy_timeout) and retries (DB_BUSY_RETRIES).
+# The parent only supervises. It restarts a worker that dies and, on SIGTERM or Ctrl+C, stops them all.
+#
+# Usage (from the backend directory):
+#   SECRET_KEY=... python serve.py --workers 4 --host 0.0.0.0 --port 5000
+#
+# Every worker must sign and verify session tokens with the same SECRET_KEY. If it is not set, one is generated
+# for this run, and tokens stop working when the server restarts.
+#
+# Each worker keeps its own in-memory state: the change feed behind /events, the role and report caches, and
+# the time log buffer. The caches expire on their own. An /events client only sees the changes made through
+# the worker it is connected to, so run a single worker when clients rely on the change feed.
+
+# import argparse/logging/os/signal/socket/sys/time for the command line interface and the worker supervision
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger('serve')
+
+
+
+# Run one worker: warm up, then serve requests on the inherited socket until SIGTERM
+def run_worker(sock, threaded, access_log):
+    # import the WSGI server here, so only workers load it
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    import app as backend
+
+    class RequestHandler(WSGIRequestHandler):
+        # Per-request log lines are opt-in; they cost more than many of the requests they describe
+        def log_request(self, *args, **kwargs):
+            if access_log:
+                super().log_request(*args, **kwargs)
+
+    # SIGTERM ends serve_forever like Ctrl+C does; the worker then drains its background writers itself
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        warmed = backend.warm_up()
+    except KeyboardInterrupt:
+        return 0
+    logger.info('Worker %d ready (%d connections, %d cached users)', os.getpid(), warmed['connections'], warmed['cached_users'])
+
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, backend.app, threaded=threaded, request_handler=RequestHandler, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        # A second signal must not interrupt the drain, and the buffer's flusher is a daemon thread that atexit
+        # would only reach after the interpreter has started tearing down: stop the buffer first (its flushes mark
+        # users for the refresher), then the refresher, from this thread
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for name in ('time_log_buffer', 'workload_refresher'):
+            worker = backend.app.extensions.get(name)
+            if worker is not None:
+                worker.stop()
+    return 0
+
+
+
+# Fork a worker process and return its pid
+def spawn(sock, threaded, access_log):
+    pid = os.fork()
+    if pid == 0:
+        # Leave the child through sys.exit, so atexit handlers run,
+        # without ever returning into the parent's supervision loop
+        code = 1
+        try:
+            code = run_worker(sock, threaded, access_log)
+        except KeyboardInterrupt:
+            code = 0
+        except Exception:
+            logger.exception('Worker %d failed', os.getpid())
+        sys.exit(code)
+    return pid
+
+
+
+# Fork the workers and keep them running until the parent is asked to stop
+def supervise(sock, workers, threaded, access_log):
+    pids = set()
+
+    # The handler raises, because os.wait() is transparently resumed after a signal whose handler returns
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        for _ in range(workers):
+            pids.add(spawn(sock, threaded, access_log))
+
+        while pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in pids:
+                continue
+            pids.discard(pid)
+
+            # A worker that died is replaced; pause briefly so a worker that fails on startup does not spin
+            logger.warning('Worker %d exited with status %d, starting a new one', pid, os.waitstatus_to_exitcode(status))
+            time.sleep(1)
+            pids.add(spawn(sock, threaded, access_log))
+    except KeyboardInterrupt:
+        pass
+
+    # Further signals are ignored while the workers shut down
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Ask the remaining workers to finish and wait for them
+    logger.info('Stopping %d worker(s)', len(pids))
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in pids:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    return 0
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the Project Management API with several worker processes')
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', os.cpu_count() or 1)),
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--no-threads', dest='threaded', action='store_false',
+                        help='serve one request at a time per worker (open /events streams then block their worker)')
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s[%(process)d] %(message)s')
+
+    # Workers inherit the environment, so a key generated here is shared by all of them
+    if not os.environ.get('SECRET_KEY'):
+        os.environ['SECRET_KEY'] = os.urandom(32).hex()
+        logger.warning('SECRET_KEY is not set; using a key generated for this run (sessions end when the server restarts)')
+
+    # import the app only after SECRET_KEY is settled; nothing is opened at import time, so forking afterwards is safe
+    import app as backend
+    import migrations
+
+    # Migrate once here instead of letting every worker race to do it
+    if backend.app.config['AUTO_MIGRATE']:
+        applied = migrations.migrate(backend.app.config['DATABASE'])
+        if applied:
+            logger.info('Applied migrations: %s', applied)
+        backend.app.config['AUTO_MIGRATE'] = False
+
+    # The listening socket is created before forking, so the kernel spreads connections over the workers
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.set_inheritable(True)
+    logger.info('Listening on http://%s:%d with %d worker(s)', args.host, sock.getsockname()[1], args.workers)
+
+    # Without fork (Windows), serve from this process
+    if not hasattr(os, 'fork') or args.workers <= 1:
+        return run_worker(sock, args.threaded, args.access_log)
+    try:
+        return supervise(sock, args.workers, args.threaded, args.access_log)
+    finally:
+        sock.close()
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# Tests for the archive (archive.py, migration 9): a completed project moves with everything that hangs off it,
+# stays readable and read-only through the API, and can be restored or deleted with all of its rows
+# Run from the backend directory: python -m pytest -q test_archive.py (or python -m unittest)
+
+# import unittest for the tests, and date to select only this test's projects for archiving
+import unittest
+from datetime import date
+
+import archive
+from test_support import MANAGER, TEAM_MEMBER, create_project, create_task, fetch_one, load_app
+
+backend = load_app()
+
+# Long before any other project ends: archiving only the projects that ended over OLDER_THAN_DAYS ago selects this test's
+END_DATE = '1900-01-01'
+OLDER_THAN_DAYS = (date.today() - date(1900, 1, 2)).days
+
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+        # A completed project with two tasks, a team member and an hour logged
+        self.project_id = create_project(self.client, end_date=END_DATE)
+        self.client.put(f'/projects/{self.project_id}', headers=MANAGER, json={'status': 'Completed'})
+        self.task_id = create_task(self.client, self.project_id, assigned_user_id=3)
+        create_task(self.client, self.project_id, status='Completed')
+        self.client.post(f'/tasks/{self.task_id}/log-time', headers=TEAM_MEMBER, json={'hours_spent': 1})
+        self.run_on_connection(lambda connection: (
+            connection.execute('INSERT INTO project_team_members (project_id, user_id) VALUES (?, 3)', (self.project_id,)),
+            connection.commit()))
+
+    # Whether it is in the hot or the archive tables, the project is deleted with all of its rows
+    def tearDown(self):
+        self.client.delete(f'/projects/{self.project_id}', headers=MANAGER)
+
+    def run_on_connection(self, function):
+        connection = backend.get_pool().acquire()
+        try:
+            return function(connection)
+        finally:
+            connection.close()
+
+    def archive(self):
+        totals = self.run_on_connection(lambda connection: archive.archive_completed(connection, older_than_days=OLDER_THAN_DAYS))
+        self.assertEqual(totals['projects'], 1)
+        self.assertIsNone(fetch_one('SELECT 1 FROM projects WHERE project_id = ?', (self.project_id,)))
+
+    # Rows of this project in each table of the hot or the archive table set
+    def counts(self, tables):
+        counts = {}
+        for table in archive.COLUMNS:
+            key, value = ('task_id', self.task_id) if table == 'task_logs' else ('project_id', self.project_id)
+            counts[table] = fetch_one(f'SELECT COUNT(*) FROM {tables[table]} WHERE {key} = ?', (value,))[0]
+        return counts
+
+    def test_archive_moves_every_row_of_the_project(self):
+        before = self.counts(archive.HOT_TABLES)
+        self.assertEqual(before, {'projects': 1, 'project_progress': 1, 'project_team_members': 1, 'tasks': 2, 'task_logs': 1})
+
+        self.archive()
+        self.assertEqual(self.counts(archive.ARCHIVE_TABLES), before)
+        self.assertEqual(set(self.counts(archive.HOT_TABLES).values()), {0})
+
+    def test_archived_project_is_readable_and_read_only(self):
+        self.archive()
+
+        project = self.client.get(f'/projects/{self.project_id}', headers=MANAGER).get_json()
+        self.assertIsNotNone(project['archived_at'])
+        overview = self.client.get(f'/projects/{self.project_id}/overview', headers=MANAGER).get_json()
+        self.assertTrue(overview['archived'])
+        self.assertEqual(len(overview['tasks']), 2)
+        progress = self.client.get(f'/projects/{self.project_id}/progress', headers=MANAGER).get_json()
+        self.assertEqual((progress['total_tasks'], progress['hours_logged']), (2, 1))
+
+        self.assertEqual(self.client.put(f'/projects/{self.project_id}', headers=MANAGER, json={'description': 'x'}).status_code, 409)
+        self.assertEqual(self.client.put(f'/tasks/{self.task_id}/status', headers=TEAM_MEMBER, json={'status': 'Completed'}).status_code, 409)
+        self.assertEqual(self.client.post(f'/tasks/{self.task_id}/log-time', headers=TEAM_MEMBER, json={'hours_spent': 1}).status_code, 409)
+
+    def test_restore_brings_every_row_back(self):
+        before = self.counts(archive.HOT_TABLES)
+        self.archive()
+        self.assertIsNotNone(self.run_on_connection(lambda connection: archive.restore(connection, self.project_id)))
+
+        self.assertEqual(self.counts(archive.HOT_TABLES), before)
+        self.assertEqual(set(self.counts(archive.ARCHIVE_TABLES).values()), {0})
+        progress = self.client.get(f'/projects/{self.project_id}/progress', headers=MANAGER).get_json()
+        self.assertEqual((progress['total_tasks'], progress['completed'], progress['hours_logged']), (2, 1, 1))
+
+    def test_deleting_an_archived_project_deletes_its_archived_rows(self):
+        self.archive()
+        response = self.client.delete(f'/projects/{self.project_id}', headers=MANAGER)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['deleted_tasks'], 2)
+        self.assertEqual(set(self.counts(archive.ARCHIVE_TABLES).values()), {0})
+
+    def test_deleting_a_project_deletes_its_rows(self):
+        response = self.client.delete(f'/projects/{self.project_id}', headers=MANAGER)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.counts(archive.HOT_TABLES).values()), {0})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# Tests for the ASGI server (asgi.py), driven in process without uvicorn: the same responses as the WSGI app,
+# and a streamed response never reads the connection pinned to the lane that ran its handler
+# Run from the backend directory: python -m pytest -q test_asgi.py (or python -m unittest)
+
+# import asyncio to drive the application, json to read the bodies, and unittest for the tests
+import asyncio
+import json
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, load_app
+
+backend = load_app()
+
+import asgi
+
+
+
+class ASGIStreamTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.application = asgi.ASGIApplication()
+        cls.loop.run_until_complete(cls.application._start())
+        # A lane pins its connection when its thread starts, on its first request; start them all now
+        for lane in list(cls.application._lanes._queue):
+            lane.submit(lambda: None).result()
+        cls.pool = backend.get_pool()
+        cls.lanes = backend.app.config['ASGI_THREADS']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.application._stop()
+        cls.loop.close()
+
+    # Run one GET request; `on_chunk` is called with each body chunk while the response is still open
+    def get(self, path, headers, on_chunk=None):
+        path, _, query = path.partition('?')
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '', 'query_string': query.encode(),
+                 'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1),
+                 'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()]}
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        status, chunks = [], []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client never disconnects
+            return await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message.get('body'):
+                chunks.append(message['body'])
+                if on_chunk is not None:
+                    on_chunk(message['body'])
+
+        self.loop.run_until_complete(self.application(scope, receive, send))
+        return status[0], b''.join(chunks)
+
+    def in_use(self):
+        stats = self.pool.stats()
+        return stats['open_connections'] - stats['idle_connections']
+
+    def check_stream(self, path, headers):
+        during = []
+
+        # While the body is produced, every lane is free again and the stream holds one connection besides theirs
+        def on_chunk(chunk):
+            during.append((self.application._lanes.qsize(), self.in_use()))
+
+        status, body = self.get(path, headers, on_chunk)
+        self.assertEqual(status, 200)
+        self.assertTrue(during)
+        self.assertTrue(all(sample == (self.lanes, self.lanes + 1) for sample in during), during)
+        self.assertEqual(self.in_use(), self.lanes)
+
+        # Same body as the WSGI app
+        with backend.app.test_client().get(path, headers=headers) as response:
+            self.assertEqual(body, response.data)
+        return body
+
+    def test_task_stream_does_not_read_the_lane_connection(self):
+        self.assertIsInstance(json.loads(self.check_stream('/tasks/assigned?stream=1', TEAM_MEMBER)), list)
+
+    def test_report_export_does_not_read_the_lane_connection(self):
+        self.check_stream('/reports/time?start=2000-01-01&end=2999-12-31&format=ndjson', MANAGER)
+
+    def test_plain_response_matches_wsgi(self):
+        status, body = self.get('/projects/1', MANAGER)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), backend.app.test_client().get('/projects/1', headers=MANAGER).get_json())
+        self.assertEqual(self.in_use(), self.lanes)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# Tests for the bulk task endpoints: every item is validated before anything is written, and an invalid
+# item is reported in its own result instead of failing the whole request
+# Run from the backend directory: python -m pytest -q test_bulk.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from test_support import MANAGER, fetch_one, load_app
+
+backend = load_app()
+
+# Items of a bulk create that are objects but not valid tasks (one wrong field each)
+INVALID_TASKS = [
+    {'project_id': 1, 'task_name': ['a']},
+    {'project_id': 1, 'task_name': {'a': 1}},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'description': ['a']},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'description': 5},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'due_date': 20240101},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'due_date': {'day': 1}},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'status': ['Completed']},
+    {'project_id': 'one', 'task_name': 'bulk invalid'},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'assigned_user_id': '²'},
+    {'project_id': 1, 'task_name': 'bulk invalid', 'assigned_user_id': [3]},
+]
+
+
+
+class BulkCreateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def post(self, body):
+        return self.client.post('/tasks/bulk', headers=MANAGER, json=body)
+
+    def count_tasks(self, task_name):
+        return fetch_one('SELECT COUNT(*) FROM tasks WHERE task_name = ?', (task_name,))[0]
+
+    def test_invalid_items_are_reported_per_item(self):
+        valid = {'project_id': 1, 'task_name': 'bulk valid', 'description': None, 'due_date': '2030-01-01'}
+        response = self.post({'tasks': [valid] + INVALID_TASKS, 'atomic': False})
+        self.assertEqual(response.status_code, 207)
+
+        results = response.get_json()['results']
+        self.assertEqual(results[0]['status'], 'created')
+        for task, result in zip(INVALID_TASKS, results[1:]):
+            with self.subTest(task=task):
+                self.assertEqual(result['status'], 'error')
+        self.assertEqual(self.count_tasks('bulk valid'), 1)
+        self.assertEqual(self.count_tasks('bulk invalid'), 0)
+
+    def test_atomic_batch_with_an_invalid_item_writes_nothing(self):
+        response = self.post({'tasks': [{'project_id': 1, 'task_name': 'bulk atomic'}, INVALID_TASKS[0]]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.get_json()['results']], ['skipped', 'error'])
+        self.assertEqual(self.count_tasks('bulk atomic'), 0)
+
+    def test_atomic_must_be_a_boolean(self):
+        for atomic in ('false', 0, 1, None, [], {}):
+            with self.subTest(atomic=atomic):
+                response = self.post({'tasks': [{'project_id': 1, 'task_name': 'bulk flag'}], 'atomic': atomic})
+                self.assertEqual(response.status_code, 400)
+                response = self.client.put('/tasks/assign/bulk', headers=MANAGER,
+                                           json={'assignments': [{'task_id': 1, 'assigned_user_id': 3}], 'atomic': atomic})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.count_tasks('bulk flag'), 0)
+
+    def test_non_atomic_batch_writes_every_valid_item(self):
+        response = self.post({'tasks': [{'project_id': '1', 'task_name': 'bulk partial'}] * 2, 'atomic': False})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len({result['task_id'] for result in response.get_json()['results']}), 2)
+        self.assertEqual(self.count_tasks('bulk partial'), 2)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# Tests for the connection pool: connections are reused and bounded, a waiting acquire times out,
+# and a connection never goes back to the pool with a transaction open
+# Run from the backend directory: python -m pytest -q test_db_pool.py (or python -m unittest)
+
+# import os/shutil/tempfile for a throwaway database, threading for a waiting acquire, and unittest for the tests
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = ConnectionPool(os.path.join(self.directory, 'pool.db'), max_size=2, timeout=0.05)
+        connection = self.pool.acquire()
+        connection.execute('CREATE TABLE items (value INTEGER)')
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_released_connection_is_reused(self):
+        first = self.pool.acquire()
+        first.close()
+        self.assertIs(self.pool.acquire(), first)
+        stats = self.pool.stats()
+        self.assertEqual((stats['open_connections'], stats['misses']), (1, 1))
+
+    def test_exhausted_pool_times_out(self):
+        held = [self.pool.acquire(), self.pool.acquire()]
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+        for connection in held:
+            connection.close()
+
+    def test_waiting_acquire_gets_a_released_connection(self):
+        held = [self.pool.acquire(), self.pool.acquire()]
+        self.pool.timeout = 5
+        threading.Timer(0.05, held[0].close).start()
+        self.assertIs(self.pool.acquire(), held[0])
+        held[1].close()
+
+    def test_release_rolls_back_an_open_transaction(self):
+        connection = self.pool.acquire()
+        connection.execute('INSERT INTO items VALUES (1)')
+        self.assertTrue(connection.in_transaction)
+        connection.close()
+
+        connection = self.pool.acquire()
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(connection.execute('SELECT COUNT(*) FROM items').fetchone()[0], 0)
+
+    def test_request_scoped_connection_is_released_once(self):
+        connection = self.pool.acquire()
+        connection.request_scoped = True
+        connection.close()
+        self.assertEqual(self.pool.stats()['idle_connections'], 0)
+
+        self.pool.release(connection)
+        self.assertFalse(connection.request_scoped)
+        self.assertEqual(self.pool.stats()['idle_connections'], 1)
+
+    def test_closed_pool_refuses_acquires_and_closes_released_connections(self):
+        connection = self.pool.acquire()
+        self.pool.close()
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire()
+        connection.close()
+        self.assertEqual(self.pool.stats()['open_connections'], 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
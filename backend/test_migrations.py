@@ -0,0 +1,137 @@
+# Tests for the query plan check of migrations.py: QUERY_TEMPLATES must be the statements app.py actually builds
+# Each template is matched against the SQL the app runs for a request that takes the same branches
+# Run from the backend directory: python -m pytest -q test_migrations.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, load_app
+
+backend = load_app()
+
+import archive
+import migrations
+
+# A precondition no row can meet
+STALE = {'If-Match': '999999999'}
+MISSING_ID = 999999999
+
+
+
+# Records every statement a pooled connection runs (the pool's tracer hook, sampling everything)
+class StatementRecorder:
+
+    def __init__(self):
+        self.statements = set()
+
+    def should_sample(self):
+        return True
+
+    def observe_statement(self, sql, elapsed, rows):
+        self.statements.add(' '.join(sql.split()))
+
+
+
+class QueryTemplatesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = backend.app.test_client()
+
+        # A task of the Team Member, and a project in the archive (with a task, a team member and an assignee)
+        cls.task_id = cls.post('/tasks', {'project_id': 1, 'task_name': 'template task', 'assigned_user_id': 3})['task_id']
+        cls.archived_id = cls.post('/projects', {'project_name': 'template archive'})['project_id']
+        cls.post('/tasks', {'project_id': cls.archived_id, 'task_name': 'archived task', 'assigned_user_id': 3})
+        connection = backend.get_pool().acquire()
+        try:
+            connection.begin_immediate()
+            connection.execute('INSERT INTO project_team_members (project_id, user_id) VALUES (?, 3)', (cls.archived_id,))
+            archive._transfer(connection, [cls.archived_id], archive.HOT_TABLES, archive.ARCHIVE_TABLES, list(archive.COLUMNS))
+            connection.commit()
+        finally:
+            connection.close()
+
+    @classmethod
+    def post(cls, path, body):
+        response = cls.client.post(path, headers=MANAGER, json=body)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()
+
+    # Requests (method, path, headers, JSON body) that make each function build its templates
+    def requests(self):
+        overview = ('?fields=project.project_name,progress.total_tasks,tasks.task_name,tasks.status,'
+                    'team_members.name,assignees.name')
+        fields = 'fields=task_name,status'
+        return {
+            'view_assigned_tasks': [
+                ('get', f'/tasks/assigned?{fields}', TEAM_MEMBER, None),
+                ('get', f'/tasks/assigned?{fields}&status=Completed&due_before=2030-01-01&due_after=2000-01-01&cursor=1&limit=5',
+                 TEAM_MEMBER, None),
+            ],
+            'stream_json_array': [
+                ('get', f'/tasks/assigned?{fields}&status=Completed&cursor=1&limit=5&stream=1', TEAM_MEMBER, None),
+            ],
+            'search': [
+                ('get', '/search?q=task', MANAGER, None),
+                ('get', '/search?q=task&type=projects', MANAGER, None),
+            ],
+            'fetch_report_batches': [
+                ('get', '/reports/time?start=2000-01-01&end=2000-01-31', MANAGER, None),
+                ('get', '/reports/time?start=2000-01-01&end=2000-01-31&group_by=day&user_id=3', MANAGER, None),
+            ],
+            'view_project_overview': [
+                ('get', f'/projects/1/overview{overview}', MANAGER, None),
+                ('get', f'/projects/{self.archived_id}/overview{overview}', MANAGER, None),
+            ],
+            'workload_dashboard': [
+                ('get', '/dashboard/workload?user_id=3', MANAGER, None),
+            ],
+            'write_missed': [
+                ('put', '/projects/1', dict(MANAGER, **STALE), {'project_name': 'never written'}),
+                ('put', f'/projects/{MISSING_ID}', MANAGER, {'project_name': 'never written'}),
+                ('put', f'/tasks/{self.task_id}/status', dict(TEAM_MEMBER, **STALE), {'status': 'Completed'}),
+                ('put', f'/tasks/{MISSING_ID}/status', TEAM_MEMBER, {'status': 'Completed'}),
+            ],
+            # Atomic batches with an invalid item, so nothing is written
+            'existing_ids': [
+                ('post', '/tasks/bulk', MANAGER, {'tasks': [{'project_id': 1, 'task_name': 'never written', 'assigned_user_id': 3},
+                                                            {'project_id': 2, 'assigned_user_id': 4}]}),
+            ],
+            'assign_tasks_bulk': [
+                ('put', '/tasks/assign/bulk', MANAGER, {'assignments': [{'task_id': 1, 'assigned_user_id': 'x'},
+                                                                        {'task_id': 2, 'assigned_user_id': 'x'}]}),
+            ],
+            'warm_up': [],
+        }
+
+    def run_requests(self, requests):
+        pool = backend.get_pool()
+        tracer, recorder = pool.tracer, StatementRecorder()
+        pool.tracer = recorder
+        try:
+            for method, path, headers, body in requests:
+                with getattr(self.client, method)(path, headers=headers, json=body) as response:
+                    self.assertLess(response.status_code, 500, path)
+                    response.get_data()
+        finally:
+            pool.tracer = tracer
+        return recorder.statements
+
+    def test_every_template_is_a_statement_the_app_builds(self):
+        requests = self.requests()
+        self.assertEqual(set(requests), set(migrations.QUERY_TEMPLATES))
+
+        for function, templates in migrations.QUERY_TEMPLATES.items():
+            statements = self.run_requests(requests[function])
+            for sql in templates:
+                with self.subTest(function=function, sql=sql):
+                    self.assertIn(' '.join(sql.split()), statements)
+
+    def test_every_function_that_builds_sql_has_templates(self):
+        functions = {function for _, function in migrations.extract_dynamic_statements(migrations.APP_PATH)}
+        self.assertEqual(functions - set(migrations.QUERY_TEMPLATES), set())
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# Tests for the project progress counters kept by triggers (migration 3): every task write updates them
+# Run from the backend directory: python -m pytest -q test_progress.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, create_project, create_task, load_app
+
+backend = load_app()
+
+
+
+class ProjectProgressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.project_id = create_project(self.client)
+
+    def progress(self):
+        response = self.client.get(f'/projects/{self.project_id}/progress', headers=MANAGER)
+        self.assertEqual(response.status_code, 200)
+        progress = response.get_json()
+        return {name: progress[name] for name in ('total_tasks', 'not_started', 'in_progress', 'completed', 'completion_percentage')}
+
+    def test_new_project_has_no_tasks(self):
+        self.assertEqual(self.progress(), {'total_tasks': 0, 'not_started': 0, 'in_progress': 0, 'completed': 0,
+                                           'completion_percentage': 0.0})
+
+    def test_task_writes_update_the_counters(self):
+        first = create_task(self.client, self.project_id, assigned_user_id=3)
+        create_task(self.client, self.project_id, status='In Progress')
+        second = create_task(self.client, self.project_id, status='Completed')
+        self.assertEqual(self.progress(), {'total_tasks': 3, 'not_started': 1, 'in_progress': 1, 'completed': 1,
+                                           'completion_percentage': 33.33})
+
+        # A Team Member's status update, and a Manager's edit
+        self.client.put(f'/tasks/{first}/status', headers=TEAM_MEMBER, json={'status': 'Completed'})
+        self.client.put(f'/tasks/{second}', headers=MANAGER, json={'status': 'Not Started'})
+        self.assertEqual(self.progress(), {'total_tasks': 3, 'not_started': 1, 'in_progress': 1, 'completed': 1,
+                                           'completion_percentage': 33.33})
+
+        self.client.delete(f'/tasks/{second}', headers=MANAGER)
+        self.assertEqual(self.progress(), {'total_tasks': 2, 'not_started': 0, 'in_progress': 1, 'completed': 1,
+                                           'completion_percentage': 50.0})
+
+    def test_logged_time_is_rolled_up(self):
+        task_id = create_task(self.client, self.project_id, assigned_user_id=3)
+        for hours in (1.5, 2):
+            response = self.client.post(f'/tasks/{task_id}/log-time', headers=TEAM_MEMBER, json={'hours_spent': hours})
+            self.assertEqual(response.status_code, 201, response.get_json())
+        response = self.client.get(f'/projects/{self.project_id}/progress', headers=MANAGER)
+        self.assertEqual(response.get_json()['hours_logged'], 3.5)
+
+    def test_deleted_project_has_no_counters(self):
+        create_task(self.client, self.project_id)
+        self.assertEqual(self.client.delete(f'/projects/{self.project_id}', headers=MANAGER).status_code, 200)
+        self.assertEqual(self.client.get(f'/projects/{self.project_id}/progress', headers=MANAGER).status_code, 404)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# Tests for the time report export: rollups in SQL, CSV and NDJSON, the closed-period cache and its invalidation
+# Run from the backend directory: python -m pytest -q test_reports.py (or python -m unittest)
+
+# import json to read NDJSON exports, and unittest for the tests
+import json
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, create_project, create_task, load_app
+
+backend = load_app()
+
+# A closed period, and the time logged in it: (task, hours, timestamp) with the tasks of setUpClass
+PERIOD = 'start=2001-01-01&end=2001-01-31'
+LOGS = [('first', 1.5, '2001-01-01 09:00:00'), ('first', 2.0, '2001-01-10 09:00:00'), ('second', 0.25, '2001-01-10 12:00:00')]
+
+
+
+class TimeReportTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = backend.app.test_client()
+        cls.project_id = create_project(cls.client)
+        cls.tasks = {name: create_task(cls.client, cls.project_id, assigned_user_id=3) for name in ('first', 'second')}
+        cls.log_time([(cls.tasks[name], hours, timestamp) for name, hours, timestamp in LOGS])
+
+    # Insert (task_id, hours, timestamp) time logs of the Team Member directly, as the API only logs time now
+    @staticmethod
+    def log_time(logs):
+        connection = backend.get_pool().acquire()
+        try:
+            connection.executemany('INSERT INTO task_logs (task_id, user_id, hours_spent, timestamp) VALUES (?, 3, ?, ?)', logs)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def export(self, query, headers=MANAGER, project_id=None):
+        # The export's connection goes back to the pool when the response is closed
+        with self.client.get(f'/reports/time?{PERIOD}&project_id={project_id or self.project_id}&format=ndjson&{query}',
+                             headers=headers) as response:
+            self.assertEqual(response.status_code, 200)
+            return [json.loads(line) for line in response.get_data(as_text=True).splitlines()], response.headers['X-Report-Cache']
+
+    def test_rollup_by_task_and_week(self):
+        rows, _ = self.export('group_by=task,week')
+        self.assertEqual(rows, [
+            {'task_id': self.tasks['first'], 'week': '2001-01-01', 'hours': 1.5, 'entries': 1},
+            {'task_id': self.tasks['first'], 'week': '2001-01-08', 'hours': 2.0, 'entries': 1},
+            {'task_id': self.tasks['second'], 'week': '2001-01-08', 'hours': 0.25, 'entries': 1},
+        ])
+
+    def test_csv_export(self):
+        with self.client.get(f'/reports/time?{PERIOD}&project_id={self.project_id}&group_by=user', headers=MANAGER) as response:
+            self.assertEqual(response.get_data(as_text=True), 'user_id,hours,entries\r\n3,3.75,3\r\n')
+
+    def test_closed_period_is_cached_until_a_log_changes(self):
+        project_id = create_project(self.client)
+        kept, deleted = create_task(self.client, project_id), create_task(self.client, project_id)
+        self.log_time([(kept, 1.0, '2001-01-02 09:00:00'), (deleted, 2.0, '2001-01-03 09:00:00')])
+
+        self.assertEqual(self.export('group_by=project', project_id=project_id)[1], 'miss')
+        self.assertEqual(self.export('group_by=project', project_id=project_id),
+                         ([{'project_id': project_id, 'hours': 3.0, 'entries': 2}], 'hit'))
+
+        # Deleting a task deletes its past time logs, which bumps the report generation
+        self.client.delete(f'/tasks/{deleted}', headers=MANAGER)
+        self.assertEqual(self.export('group_by=project', project_id=project_id),
+                         ([{'project_id': project_id, 'hours': 1.0, 'entries': 1}], 'miss'))
+
+    def test_team_member_only_reports_own_time(self):
+        self.assertEqual(self.client.get(f'/reports/time?{PERIOD}&user_id=4', headers=TEAM_MEMBER).status_code, 403)
+        rows, _ = self.export('group_by=user', TEAM_MEMBER)
+        self.assertEqual([row['user_id'] for row in rows], [3])
+
+    def test_invalid_parameters_are_400(self):
+        for query in ('start=2001-01-31&end=2001-01-01', 'start=x&end=y', f'{PERIOD}&group_by=year',
+                      f'{PERIOD}&group_by=user,user', f'{PERIOD}&format=xml', f'{PERIOD}&project_id=x'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/reports/time?{query}', headers=MANAGER).status_code, 400)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# Tests for full-text search (migration 7): the index follows every write, filters are applied in the index,
+# and Team Members only find their own tasks
+# Run from the backend directory: python -m pytest -q test_search.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+import search_index
+from test_support import MANAGER, TEAM_MEMBER, create_project, create_task, load_app
+
+backend = load_app()
+
+
+
+class SearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = backend.app.test_client()
+        cls.project_id = create_project(cls.client, project_name='Quixotic harbour')
+
+    def search(self, query, headers=MANAGER):
+        response = self.client.get(f'/search?{query}', headers=headers)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return [result.get('task_id', result.get('project_id')) for result in response.get_json()['results']]
+
+    def test_index_follows_task_writes(self):
+        task_id = create_task(self.client, self.project_id, task_name='Calibrate zephyrometer')
+        self.assertEqual(self.search('q=zephyro*'), [task_id])
+
+        self.client.put(f'/tasks/{task_id}', headers=MANAGER, json={'task_name': 'Calibrate anemograph'})
+        self.assertEqual(self.search('q=zephyrometer'), [])
+        self.assertEqual(self.search('q=anemograph'), [task_id])
+
+        self.client.delete(f'/tasks/{task_id}', headers=MANAGER)
+        self.assertEqual(self.search('q=anemograph'), [])
+
+    def test_projects_are_searched_by_name(self):
+        self.assertEqual(self.search('q=quixotic&type=projects'), [self.project_id])
+
+    def test_filters_and_ranking(self):
+        in_name = create_task(self.client, self.project_id, task_name='Polish the gyroscope', status='Completed')
+        in_description = create_task(self.client, self.project_id, task_name='Other', description='the gyroscope')
+        create_task(self.client, 1, task_name='gyroscope elsewhere')
+
+        # A match in the name ranks first
+        self.assertEqual(self.search(f'q=gyroscope&project_id={self.project_id}'), [in_name, in_description])
+        self.assertEqual(self.search(f'q=gyroscope&project_id={self.project_id}&status=Completed'), [in_name])
+
+    def test_team_member_only_finds_assigned_tasks(self):
+        mine = create_task(self.client, self.project_id, task_name='Sextant alignment', assigned_user_id=3)
+        create_task(self.client, self.project_id, task_name='Sextant cleaning', assigned_user_id=4)
+        self.assertEqual(self.search('q=sextant', TEAM_MEMBER), [mine])
+        self.assertEqual(self.client.get('/search?q=sextant&assigned_user_id=4', headers=TEAM_MEMBER).status_code, 403)
+
+    def test_query_syntax_is_plain_text(self):
+        for query in ('q="', 'q=NEAR(a b)', 'q=task_name:x', 'q=a OR b*', 'q=-x'):
+            with self.subTest(query=query):
+                self.assertLess(self.client.get(f'/search?{query}', headers=MANAGER).status_code, 500)
+        self.assertEqual(self.client.get('/search?q=***', headers=MANAGER).status_code, 400)
+
+    def test_index_matches_the_tables(self):
+        connection = backend.get_pool().acquire()
+        try:
+            search_index.check(connection)
+        finally:
+            connection.close()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
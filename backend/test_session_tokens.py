@@ -0,0 +1,81 @@
+# Tests for the signed session tokens and the legacy user ID header: malformed credentials must be rejected, never raise
+# Run from the backend directory: python -m pytest -q test_session_tokens.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from session_tokens import TokenSigner
+from test_support import load_app
+
+# Tokens a client could send that are not tokens this server issued
+MALFORMED_TOKENS = ['', '.', 'é.x', 'abc', 'a.b.c', 'é', 'x.é', '☃.☃', 'eyJ1aWQiOjF9.', '!!!.???',
+                    'WzFd.c2ln']
+
+# Legacy user ID headers that are not a user ID
+MALFORMED_USER_IDS = ['abc', '1a', '-1', '1.5', '²', ' ']
+
+# Routes that identify the user themselves rather than through check_role
+AUTHENTICATED_ROUTES = ['/tasks/assigned', '/search?q=task', '/reports/time?start=2000-01-01&end=2999-12-31',
+                        '/events', '/events/poll?timeout=0']
+
+
+
+class TokenSignerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.signer = TokenSigner('secret', ttl=60)
+
+    def test_issued_token_verifies(self):
+        token, _ = self.signer.issue(1, 'Manager', 7)
+        claims = self.signer.verify(token)
+        self.assertEqual((claims['uid'], claims['role'], claims['sid']), (1, 'Manager', 7))
+
+    def test_malformed_tokens_are_rejected(self):
+        for token in MALFORMED_TOKENS + [None, 42, b'a.b']:
+            with self.subTest(token=token):
+                self.assertIsNone(self.signer.verify(token))
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        token, _ = self.signer.issue(1, 'Manager', 7, now=0)
+        self.assertIsNone(self.signer.verify(token))
+        token, _ = self.signer.issue(1, 'Manager', 7)
+        payload, _ = token.split('.')
+        self.assertIsNone(self.signer.verify(f"{payload}.{TokenSigner('other')._sign(payload)}"))
+        self.assertIsNone(TokenSigner('other').verify(token))
+
+
+
+class MalformedBearerTokenTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = load_app().app.test_client()
+
+    def test_authenticated_routes_answer_401(self):
+        for token in MALFORMED_TOKENS:
+            with self.subTest(token=token):
+                response = self.client.get('/tasks/assigned', headers={'Authorization': f'Bearer {token}'})
+                self.assertEqual(response.status_code, 401)
+
+
+
+class MalformedUserIdHeaderTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = load_app().app.test_client()
+
+    def test_authenticated_routes_answer_401(self):
+        for path in AUTHENTICATED_ROUTES + ['/projects/1']:
+            for user_id in MALFORMED_USER_IDS:
+                with self.subTest(path=path, user_id=user_id):
+                    response = self.client.get(path, headers={'User-Id': user_id})
+                    self.assertEqual(response.status_code, 401)
+
+    def test_numeric_user_id_is_accepted(self):
+        self.assertEqual(self.client.get('/search?q=task', headers={'User-Id': '3'}).status_code, 200)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
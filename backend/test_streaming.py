@@ -0,0 +1,80 @@
+# Tests for streamed responses: a stream owns a pooled connection of its own from before its headers are sent
+# until the response is closed, and never reads a connection that has gone back to the pool
+# Run from the backend directory: python -m pytest -q test_streaming.py (or python -m unittest)
+
+# import json to read the streamed array, and unittest for the tests
+import json
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, load_app
+
+backend = load_app()
+
+
+
+class StreamConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.pool = backend.get_pool()
+
+    def idle(self):
+        return self.pool.stats()['idle_connections']
+
+    def open_connections(self):
+        return self.pool.stats()['open_connections']
+
+    def check_stream_owns_its_connection(self, path, headers):
+        response = self.client.get(path, headers=headers, buffered=False)
+        self.assertEqual(response.status_code, 200)
+
+        # The view has returned and its request connection is back in the pool; the stream still holds one
+        chunks = iter(response.response)
+        first = next(chunks)
+        self.assertEqual(self.idle(), self.open_connections() - 1)
+
+        # A connection taken now is never the one the stream is reading
+        other = self.pool.acquire()
+        try:
+            body = first + b''.join(chunks)
+        finally:
+            other.close()
+        response.close()
+
+        self.assertEqual(self.idle(), self.open_connections())
+        return body
+
+    def test_task_stream_owns_its_connection(self):
+        body = self.check_stream_owns_its_connection('/tasks/assigned?stream=1', TEAM_MEMBER)
+        self.assertIsInstance(json.loads(body), list)
+
+    def test_report_export_owns_its_connection(self):
+        body = self.check_stream_owns_its_connection('/reports/time?start=2000-01-01&end=2999-12-31&format=ndjson', MANAGER)
+        for line in body.decode().splitlines():
+            self.assertIn('hours', json.loads(line))
+
+    def test_unread_stream_gives_its_connection_back(self):
+        for path, headers in (('/tasks/assigned?stream=1', TEAM_MEMBER),
+                              ('/reports/time?start=2000-01-01&end=2999-12-31&format=ndjson', MANAGER)):
+            with self.subTest(path=path):
+                self.client.get(path, headers=headers, buffered=False).close()
+                self.assertEqual(self.idle(), self.open_connections())
+
+    def test_exhausted_pool_is_503_before_the_stream_starts(self):
+        held = []
+        timeout, self.pool.timeout = self.pool.timeout, 0.05
+        try:
+            while len(held) < self.pool.max_size:
+                held.append(self.pool.acquire())
+            response = self.client.get('/tasks/assigned?stream=1', headers=TEAM_MEMBER)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers.get('Retry-After'), '1')
+        finally:
+            self.pool.timeout = timeout
+            for connection in held:
+                connection.close()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# Shared setup for the backend tests: the app runs against a throwaway copy of projects.db
+# The app module keeps one connection pool per process, so every test module shares the same copy;
+# tests create the rows they need instead of relying on the state other tests leave behind
+
+# import atexit/os/shutil/tempfile to create and remove the copy of the database
+import atexit
+import os
+import shutil
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Users of the bundled database: a Manager and a Team Member
+MANAGER = {'User-Id': '1'}
+TEAM_MEMBER = {'User-Id': '3'}
+
+_directory = None
+
+
+
+# Import the app pointed at a copy of the bundled database (made once per process) and return the module
+def load_app():
+    global _directory
+
+    if _directory is None:
+        _directory = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, _directory, ignore_errors=True)
+        database = os.path.join(_directory, 'projects.db')
+        shutil.copy(os.path.join(BACKEND_DIR, '..', 'projects.db'), database)
+        os.environ['PROJECTS_DB'] = database
+        os.environ.setdefault('SECRET_KEY', 'test')
+
+    import app as backend
+    backend.app.config['DATABASE'] = os.environ['PROJECTS_DB']
+    return backend
+
+
+
+# Run a query against the test database and return its first row; the connection goes straight back to the pool
+def fetch_one(query, params=()):
+    import app as backend
+    connection = backend.get_pool().acquire()
+    try:
+        return connection.execute(query, params).fetchone()
+    finally:
+        connection.close()
+
+
+
+# Create a project through the API as the Manager and return its id
+def create_project(client, **fields):
+    response = client.post('/projects', headers=MANAGER, json=dict({'project_name': 'test project'}, **fields))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['project_id']
+
+
+
+# Create a task through the API as the Manager and return its id
+def create_task(client, project_id, **fields):
+    response = client.post('/tasks', headers=MANAGER, json=dict({'project_id': project_id, 'task_name': 'test task'}, **fields))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['task_id']
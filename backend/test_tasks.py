@@ -0,0 +1,69 @@
+# Tests for the task write endpoints: input is validated before anything is written, and a write that
+# has been committed is answered as such even when publishing its change fails
+# Run from the backend directory: python -m pytest -q test_tasks.py (or python -m unittest)
+
+# import unittest for the tests, and mock to make the change feed fail
+import unittest
+from unittest import mock
+
+from test_support import MANAGER, fetch_one, load_app
+
+backend = load_app()
+
+
+
+class TaskAssigneeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def count_tasks(self, task_name):
+        return fetch_one('SELECT COUNT(*) FROM tasks WHERE task_name = ?', (task_name,))[0]
+
+    def create_task(self, **fields):
+        response = self.client.post('/tasks', headers=MANAGER, json=dict({'project_id': 1}, **fields))
+        self.assertEqual(response.status_code, 201, response.get_json())
+        return response.get_json()['task_id']
+
+    def test_create_rejects_a_non_integer_assignee_before_writing(self):
+        for assignee in ('abc', 1.5, [1], True):
+            with self.subTest(assignee=assignee):
+                response = self.client.post('/tasks', headers=MANAGER,
+                                            json={'project_id': 1, 'task_name': 'bad assignee', 'assigned_user_id': assignee})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.count_tasks('bad assignee'), 0)
+
+    def test_create_accepts_a_string_of_digits(self):
+        task_id = self.create_task(task_name='digit assignee', assigned_user_id='3')
+        row = fetch_one('SELECT assigned_user_id FROM tasks WHERE task_id = ?', (task_id,))
+        self.assertEqual(row['assigned_user_id'], 3)
+
+    def test_assign_and_edit_reject_a_non_integer_assignee(self):
+        task_id = self.create_task(task_name='reassigned')
+        response = self.client.put(f'/tasks/{task_id}/assign', headers=MANAGER, json={'assigned_user_id': 'zz'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(f'/tasks/{task_id}', headers=MANAGER, json={'assigned_user_id': 'zz'})
+        self.assertEqual(response.status_code, 400)
+
+        row = fetch_one('SELECT assigned_user_id FROM tasks WHERE task_id = ?', (task_id,))
+        self.assertIsNone(row['assigned_user_id'])
+
+    def test_committed_write_is_not_a_500_when_publishing_fails(self):
+        with mock.patch.object(backend.get_change_feed(), 'publish', side_effect=RuntimeError('feed down')):
+            self.create_task(task_name='published anyway')
+        self.assertEqual(self.count_tasks('published anyway'), 1)
+
+    def test_change_feed_and_workload_skip_values_that_are_not_ids(self):
+        feed = backend.get_change_feed()
+        subscription, _, _ = feed.subscribe(user_id=3)
+        try:
+            feed.publish('task.assigned', project_id=1, user_ids=['abc', None, '3'])
+            self.assertEqual(subscription.next_event(timeout=1)['user_ids'], [3])
+        finally:
+            subscription.close()
+        backend.get_workload_refresher().mark_dirty(['abc', None, [1]])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# Tests for the write-behind time log buffer: acknowledged entries survive a failing batch, and only an
+# entry that can never be written is dropped
+# Run from the backend directory: python -m pytest -q test_time_log_buffer.py (or python -m unittest)
+
+# import os/shutil/tempfile for a throwaway database, sqlite3 for the errors, and unittest for the tests
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from db_pool import ConnectionPool
+from time_log_buffer import BufferFull, TimeLogBuffer
+
+SCHEMA = '''
+    CREATE TABLE tasks (task_id INTEGER PRIMARY KEY, hours_logged REAL);
+    CREATE TABLE task_logs (log_id INTEGER PRIMARY KEY, task_id INTEGER, user_id INTEGER, hours_spent REAL, timestamp TEXT);
+    INSERT INTO tasks (task_id) VALUES (1), (2);
+    -- Time logged on task 13 can never be written
+    CREATE TRIGGER reject_task_13 BEFORE INSERT ON task_logs WHEN NEW.task_id = 13
+    BEGIN SELECT RAISE(ABORT, 'rejected'); END;
+'''
+
+
+
+class TimeLogBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = ConnectionPool(os.path.join(self.directory, 'logs.db'), max_size=2)
+        connection = self.pool.acquire()
+        connection.executescript(SCHEMA)
+        connection.close()
+        self.flushed_users = []
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def buffer(self, acquire=None, **options):
+        options = dict({'flush_interval': 0.01, 'retry_backoff': 0}, **options)
+        return TimeLogBuffer(acquire or self.pool.acquire, on_flush=self.flushed_users.append, **options).start()
+
+    def hours(self):
+        connection = self.pool.acquire()
+        try:
+            return {row[0]: row[1] for row in connection.execute('SELECT task_id, hours_logged FROM tasks')}
+        finally:
+            connection.close()
+
+    def test_entries_are_written_and_rolled_up(self):
+        buffer = self.buffer()
+        for task_id, hours in ((1, 1.5), (1, 2), (2, 0.5)):
+            buffer.add(task_id, 3, hours)
+        buffer.stop()
+
+        self.assertEqual(self.hours(), {1: 3.5, 2: 0.5})
+        self.assertEqual(buffer.stats()['flushed_entries'], 3)
+        self.assertEqual(set().union(*self.flushed_users), {3})
+
+    def test_failed_batch_is_retried(self):
+        failures = [sqlite3.OperationalError('database is locked')] * 2
+
+        def acquire():
+            if failures:
+                raise failures.pop()
+            return self.pool.acquire()
+
+        buffer = self.buffer(acquire, max_retries=3)
+        buffer.add(1, 3, 2)
+        buffer.stop()
+
+        stats = buffer.stats()
+        self.assertEqual(self.hours()[1], 2)
+        self.assertEqual((stats['failed_flushes'], stats['retried_flushes'], stats['dropped_entries']), (2, 2, 0))
+
+    def test_batch_that_keeps_failing_only_drops_the_bad_entry(self):
+        buffer = self.buffer(max_retries=1, batch_size=10, flush_interval=1.0)
+        for task_id in (1, 13, 2):
+            buffer.add(task_id, 3, 1)
+        buffer.stop()
+
+        stats = buffer.stats()
+        self.assertEqual(self.hours(), {1: 1, 2: 1})
+        self.assertEqual((stats['flushed_entries'], stats['dropped_entries']), (2, 1))
+
+    def test_stopped_buffer_refuses_entries(self):
+        buffer = self.buffer()
+        buffer.stop()
+        with self.assertRaises(BufferFull):
+            buffer.add(1, 3, 1)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
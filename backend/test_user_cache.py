@@ -0,0 +1,50 @@
+# Tests for the user role cache: a user that was not in the database yet is not remembered as unknown
+# Run from the backend directory: python -m pytest -q test_user_cache.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from test_support import load_app
+
+backend = load_app()
+
+# Id of a user that the bundled database does not have
+NEW_USER_ID = 90001
+
+
+
+class UserRoleCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+
+    def write(self, query, params):
+        connection = backend.get_pool().acquire()
+        try:
+            connection.execute(query, params)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def create_project(self):
+        return self.client.post('/projects', headers={'User-Id': str(NEW_USER_ID)},
+                                json={'project_name': 'cache test', 'description': '', 'start_date': '2030-01-01',
+                                      'end_date': '2030-02-01'})
+
+    def test_user_added_by_another_process_is_recognised(self):
+        # Unknown: treated as a Team Member
+        self.assertEqual(self.create_project().status_code, 403)
+
+        # Added behind the app's back, as seed_database.py or generate_data.py do
+        self.write("INSERT INTO users (user_id, username, password, name, role, email) VALUES (?, ?, ?, ?, 'Manager', ?)",
+                   (NEW_USER_ID, 'cache_manager', 'password', 'Cache Manager', 'cache.manager@example.com'))
+        try:
+            self.assertEqual(self.create_project().status_code, 201)
+        finally:
+            self.write('DELETE FROM users WHERE user_id = ?', (NEW_USER_ID,))
+            backend.get_user_cache().invalidate(str(NEW_USER_ID))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# Tests for row versions: ETags on reads, 304 for a current copy, and If-Match preconditions on writes
+# Run from the backend directory: python -m pytest -q test_versions.py (or python -m unittest)
+
+# import unittest for the tests
+import unittest
+
+from test_support import MANAGER, TEAM_MEMBER, create_project, create_task, load_app
+
+backend = load_app()
+
+
+
+class ProjectVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.project_id = create_project(self.client)
+
+    def etag(self):
+        response = self.client.get(f'/projects/{self.project_id}', headers=MANAGER)
+        self.assertEqual(response.status_code, 200)
+        return response.headers['ETag']
+
+    def put(self, if_match, body):
+        return self.client.put(f'/projects/{self.project_id}', headers=dict(MANAGER, **{'If-Match': if_match}), json=body)
+
+    def test_current_copy_is_not_modified(self):
+        etag = self.etag()
+        response = self.client.get(f'/projects/{self.project_id}', headers=dict(MANAGER, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_write_with_the_current_etag_gets_a_new_one(self):
+        etag = self.etag()
+        response = self.put(etag, {'description': 'first'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.headers['ETag'], self.etag())
+
+    def test_write_with_a_stale_etag_is_412_and_changes_nothing(self):
+        stale = self.etag()
+        self.assertEqual(self.put(stale, {'description': 'first'}).status_code, 200)
+
+        response = self.put(stale, {'description': 'second'})
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.headers['ETag'], self.etag())
+        self.assertEqual(self.client.get(f'/projects/{self.project_id}', headers=MANAGER).get_json()['description'], 'first')
+
+    def test_etag_of_another_row_never_matches(self):
+        other = self.client.get(f'/projects/{create_project(self.client)}', headers=MANAGER).headers['ETag']
+        self.assertEqual(self.put(other, {'description': 'never written'}).status_code, 412)
+
+    def test_delete_with_a_stale_version_is_412(self):
+        stale = self.etag()
+        self.assertEqual(self.put(stale, {'description': 'first'}).status_code, 200)
+        response = self.client.delete(f'/projects/{self.project_id}', headers=dict(MANAGER, **{'If-Match': stale}))
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.client.get(f'/projects/{self.project_id}', headers=MANAGER).status_code, 200)
+
+
+
+class TaskVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = backend.app.test_client()
+        self.task_id = create_task(self.client, 1, assigned_user_id=3)
+
+    def test_status_update_with_a_bare_version(self):
+        response = self.client.put(f'/tasks/{self.task_id}/status', headers=TEAM_MEMBER, json={'status': 'In Progress'})
+        self.assertEqual(response.status_code, 200)
+        version = response.get_json()['version']
+
+        headers = dict(TEAM_MEMBER, **{'If-Match': str(version)})
+        self.assertEqual(self.client.put(f'/tasks/{self.task_id}/status', headers=headers, json={'status': 'Completed'}).status_code, 200)
+        self.assertEqual(self.client.put(f'/tasks/{self.task_id}/status', headers=headers, json={'status': 'Not Started'}).status_code, 412)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+# import logging to report failed flushes, and threading/queue/time for the background flusher
+import logging
+import queue
+import threading
+import time
+
+# import datetime to stamp each entry with the time it was logged, not the time it was flushed
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+
+# Raised when the queue stays full for longer than the enqueue timeout (backpressure)
+class BufferFull(Exception):
+    pass
+
+
+
+# Write-behind buffer for task_logs
+# Entries are queued in memory and written by a background thread in batches, flushed when either
+# `batch_size` entries are waiting or the oldest one has waited `flush_interval` seconds.
+# Each batch is one transaction that inserts the log rows and rolls them up into tasks.hours_logged.
+# Entries were acknowledged (202) when queued, so a batch that fails is retried `max_retries` times with
+# exponential backoff; after that its entries are written one at a time and only those that still fail are dropped.
+class TimeLogBuffer:
+
+    def __init__(self, acquire_connection, batch_size=500, flush_interval=0.05, max_queue=10000, enqueue_timeout=1.0,
+                 on_flush=None, max_retries=5, retry_backoff=0.1):
+        # `acquire_connection` returns a connection whose close() gives it back (e.g. ConnectionPool.acquire)
+        # `on_flush`, if given, is called with the user ids of every batch once it has been committed
+        self.acquire_connection = acquire_connection
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        # Bounded queue: producers block (then fail) instead of letting memory grow without limit
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='time-log-flusher', daemon=True)
+
+        # Metrics
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed_entries = 0
+        self.failed_flushes = 0
+        self.retried_flushes = 0
+        self.dropped_entries = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.total_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # Queue one entry; blocks up to `enqueue_timeout` while the queue is full
+    def add(self, task_id, user_id, hours_spent):
+        if self._stopping.is_set():
+            raise BufferFull('Time log buffer is shutting down')
+
+        logged_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            self._queue.put((task_id, user_id, hours_spent, logged_at), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise BufferFull('Time log buffer is full')
+
+        with self._lock:
+            self.enqueued += 1
+
+    # Background loop: gather a batch, then write it
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    # Wait for the first entry, then keep collecting until the batch is full or the latency budget is spent
+    # stop() queues a None to wake the flusher, so a long flush interval never holds a batch past shutdown
+    def _collect(self):
+        batch = []
+        try:
+            entry = self._queue.get(timeout=self.flush_interval)
+            deadline = time.monotonic() + self.flush_interval
+            while entry is not None:
+                batch.append(entry)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                entry = self._queue.get(timeout=remaining)
+        except queue.Empty:
+            pass
+
+        return batch
+
+    # Write a batch of entries, retrying a failed transaction with exponential backoff (the flusher waits, and
+    # the bounded queue pushes back on producers meanwhile); a batch that keeps failing is split into single
+    # entries, so one bad entry cannot take the rest of its batch down with it
+    def _flush(self, batch):
+        started = time.perf_counter()
+
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write(batch)
+                written = batch
+                break
+            except Exception:
+                logger.exception('Failed to flush %d time log entries (attempt %d of %d)', len(batch), attempt + 1, self.max_retries + 1)
+                with self._lock:
+                    self.failed_flushes += 1
+                    if attempt < self.max_retries:
+                        self.retried_flushes += 1
+                if attempt < self.max_retries:
+                    time.sleep(delay)
+                    delay *= 2
+        else:
+            written = self._write_one_by_one(batch)
+
+        if not written:
+            return
+
+        if self.on_flush is not None:
+            self.on_flush({user_id for _, user_id, _, _ in written})
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.batches += 1
+            self.flushed_entries += len(written)
+            self.max_batch_size = max(self.max_batch_size, len(written))
+            self.total_flush_seconds += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    # Last resort for a batch that could not be written: each entry in its own transaction; the entries that
+    # still fail are dropped (counted in `dropped_entries`). Returns the entries that were written
+    def _write_one_by_one(self, batch):
+        written = []
+        for entry in batch:
+            try:
+                self._write([entry])
+                written.append(entry)
+            except Exception:
+                logger.exception('Dropped time log entry %r', entry)
+                with self._lock:
+                    self.dropped_entries += 1
+        return written
+
+    # Write entries in a single transaction; raises (after rolling back) when it fails
+    def _write(self, batch):
+        # Roll the hours up per task so each task row is updated once per batch
+        hours_per_task = {}
+        for task_id, _, hours_spent, _ in batch:
+            hours_per_task[task_id] = hours_per_task.get(task_id, 0) + hours_spent
+
+        conn = self.acquire_connection()
+        try:
+            conn.begin_immediate()
+            conn.executemany('INSERT INTO task_logs (task_id, user_id, hours_spent, timestamp) VALUES (?, ?, ?, ?)', batch)
+            conn.executemany('UPDATE tasks SET hours_logged = COALESCE(hours_logged, 0) + ? WHERE task_id = ?',
+                             [(hours, task_id) for task_id, hours in hours_per_task.items()])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # Stop accepting entries and write everything still queued before returning
+    def stop(self, timeout=30.0):
+        self._stopping.set()
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+        # Anything that slipped in while the flusher was exiting is written from the calling thread
+        leftovers = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                leftovers.append(entry)
+        if leftovers:
+            self._flush(leftovers)
+
+    # Snapshot of the buffer's metrics
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "flushed_entries": self.flushed_entries,
+                "failed_flushes": self.failed_flushes,
+                "retried_flushes": self.retried_flushes,
+                "dropped_entries": self.dropped_entries,
+                "batches": self.batches,
+                "average_batch_size": (self.flushed_entries / self.batches) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "average_flush_seconds": (self.total_flush_seconds / self.batches) if self.batches else 0.0,
+                "max_flush_seconds": self.max_flush_seconds,
+            }
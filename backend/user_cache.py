@@ -0,0 +1,87 @@
+# import threading to make the cache safe to share between request threads
+import threading
+
+# import time for TTL expiry, and OrderedDict to keep entries in least-recently-used order
+import time
+from collections import OrderedDict
+
+
+
+# Bounded LRU cache whose entries also expire after a fixed time-to-live
+# Used to remember the role of each known user between requests
+class LRUTTLCache:
+
+    # Sentinel returned by `get` when a key is not cached (None is a valid cached value)
+    MISSING = object()
+
+    def __init__(self, max_size=10000, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # key -> (value, expiry time)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Hit-rate counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Look up a key, returning MISSING if it is absent or has expired
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return self.MISSING
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return self.MISSING
+
+            # Mark the entry as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Store a value, evicting the least recently used entries beyond the bound
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Drop a single key
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    # Drop every entry
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    # Snapshot of the cache's counters
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
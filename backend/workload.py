@@ -0,0 +1,219 @@
+# Per-user workload summary behind the manager dashboard
+# Open tasks by status, overdue tasks and hours logged this week are kept per user in the user_workload table
+# (migration 10), so the dashboard reads one small row per user instead of joining tasks, task_logs and users.
+# Write handlers mark the users whose tasks or time logs they changed as dirty; a background thread recomputes
+# only those users every `interval` seconds, and every user once a day has passed (overdue counts and weekly
+# hours move with the date) or `full_refresh_interval` seconds have passed (changes made outside the API).
+
+# import json to pass a set of user ids as one parameter, logging to report failed refreshes,
+# and threading/time for the background refresher
+import json
+import logging
+import threading
+import time
+
+# import datetime to compute the day and the week a summary is for (UTC, like the time reports)
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Recompute the summary rows of every user, or of the users in a JSON array bound as :users
+# Tasks are counted through idx_tasks_assigned_user and this week's hours are summed from idx_task_logs_user
+# (idx_task_logs_timestamp for everyone); a task without a due date is never overdue
+REFRESH_QUERY = '''
+    INSERT OR REPLACE INTO user_workload (user_id, not_started, in_progress, completed, overdue, hours_this_week, as_of, refreshed_at)
+    SELECT u.user_id, COALESCE(t.not_started, 0), COALESCE(t.in_progress, 0), COALESCE(t.completed, 0),
+           COALESCE(t.overdue, 0), ROUND(COALESCE(l.hours, 0), 2), :today, :now
+    FROM users u
+    LEFT JOIN (
+        SELECT assigned_user_id,
+               SUM(status = 'Not Started') AS not_started,
+               SUM(status = 'In Progress') AS in_progress,
+               SUM(status = 'Completed') AS completed,
+               SUM(status != 'Completed' AND due_date < :today) AS overdue
+        FROM tasks {tasks_filter}
+        GROUP BY assigned_user_id
+    ) t ON t.assigned_user_id = u.user_id
+    LEFT JOIN (
+        SELECT user_id, SUM(hours_spent) AS hours
+        FROM task_logs WHERE timestamp >= :week_start {logs_filter}
+        GROUP BY user_id
+    ) l ON l.user_id = u.user_id
+    {users_filter}
+'''
+USER_FILTER = 'IN (SELECT value FROM json_each(:users))'
+REFRESH_ALL = REFRESH_QUERY.format(tasks_filter='', logs_filter='', users_filter='')
+REFRESH_USERS = REFRESH_QUERY.format(tasks_filter=f'WHERE assigned_user_id {USER_FILTER}',
+                                     logs_filter=f'AND user_id {USER_FILTER}',
+                                     users_filter=f'WHERE u.user_id {USER_FILTER}')
+
+
+
+# The day (UTC) a summary is computed for, as YYYY-MM-DD
+def today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+
+# Monday of the current week (UTC), the start of "hours this week"
+def week_start():
+    day = datetime.now(timezone.utc).date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+
+# Recompute the summary of the given users (None: every user) in one transaction; returns the number of rows written
+def recompute(conn, user_ids=None):
+    params = {"today": today(), "week_start": week_start(),
+              "now": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}
+    conn.begin_immediate()
+    try:
+        if user_ids is None:
+            written = conn.execute(REFRESH_ALL, params).rowcount
+            # Users that no longer exist have nothing to show
+            conn.execute('DELETE FROM user_workload WHERE user_id NOT IN (SELECT user_id FROM users)')
+        else:
+            written = conn.execute(REFRESH_USERS, dict(params, users=json.dumps(sorted(user_ids)))).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
+
+
+
+# Dirty-user tracking and the background thread that keeps user_workload up to date
+class WorkloadRefresher:
+
+    def __init__(self, acquire_connection, interval=2.0, full_refresh_interval=900.0):
+        # `acquire_connection` returns a connection whose close() gives it back (e.g. ConnectionPool.acquire)
+        self.acquire_connection = acquire_connection
+        self.interval = interval
+        self.full_refresh_interval = full_refresh_interval
+
+        # Users changed since their row was last computed, with the time (monotonic) of the first such change;
+        # `_everyone_since` is set when every row is out of date (e.g. after a project and its tasks were deleted)
+        self._dirty = {}
+        self._everyone_since = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='workload-refresher', daemon=True)
+        self._day = today()
+        self._last_full = time.monotonic()
+
+        # Metrics
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.refreshed_users = 0
+        self.failed_refreshes = 0
+        self.total_refresh_seconds = 0.0
+        self.max_refresh_seconds = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # Mark users whose tasks or time logs changed (None entries, e.g. an unassigned task, are ignored)
+    # Must be called after the change has been committed, so the next refresh sees it
+    def mark_dirty(self, user_ids):
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                # None and values that are not ids concern no user
+                try:
+                    self._dirty.setdefault(int(user_id), now)
+                except (TypeError, ValueError):
+                    pass
+
+    # Mark every user, when a change touched rows of users the caller does not know
+    def mark_all_dirty(self):
+        with self._lock:
+            if self._everyone_since is None:
+                self._everyone_since = time.monotonic()
+
+    # Number of the given users with changes not yet in the summary, and the age in seconds of the oldest
+    # such change (0 when their rows are up to date)
+    def pending(self, user_ids):
+        with self._lock:
+            marks = [self._dirty[user_id] for user_id in user_ids if user_id in self._dirty]
+            count = len(marks)
+            if self._everyone_since is not None:
+                marks.append(self._everyone_since)
+                count = len(user_ids)
+        return count, (time.monotonic() - min(marks)) if marks else 0.0
+
+    # Recompute the given users (None: everyone) now, from the calling thread; returns the number of rows written
+    # The users are taken off the dirty set first, so a change committed while the refresh runs is marked again
+    def refresh(self, user_ids=None):
+        with self._lock:
+            if user_ids is None:
+                taken, everyone = self._dirty, self._everyone_since
+                self._dirty, self._everyone_since = {}, None
+            else:
+                taken = {user_id: self._dirty.pop(user_id) for user_id in user_ids if user_id in self._dirty}
+                everyone = None
+
+        started = time.perf_counter()
+        conn = self.acquire_connection()
+        try:
+            written = recompute(conn, user_ids)
+        except Exception:
+            # Put the marks back, so the users are retried on the next run
+            with self._lock:
+                for user_id, since in taken.items():
+                    self._dirty[user_id] = min(since, self._dirty.get(user_id, since))
+                if everyone is not None and (self._everyone_since is None or everyone < self._everyone_since):
+                    self._everyone_since = everyone
+                self.failed_refreshes += 1
+            raise
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.refreshes += 1
+            self.refreshed_users += written
+            self.total_refresh_seconds += elapsed
+            self.max_refresh_seconds = max(self.max_refresh_seconds, elapsed)
+            if user_ids is None:
+                self.full_refreshes += 1
+                self._last_full = time.monotonic()
+                self._day = today()
+        return written
+
+    # Background loop: every `interval` seconds, recompute the dirty users, or everyone when the day changed,
+    # every row was marked, or the last full refresh is older than `full_refresh_interval`
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            with self._lock:
+                everyone = (self._everyone_since is not None or self._day != today()
+                            or time.monotonic() - self._last_full >= self.full_refresh_interval)
+                dirty = list(self._dirty)
+            if not everyone and not dirty:
+                continue
+            try:
+                self.refresh(None if everyone else dirty)
+            except Exception:
+                logger.exception('Failed to refresh the workload summary')
+
+    # Stop the background thread (pending marks are left for the next process, which refreshes rows of past days)
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # Snapshot of the refresher's metrics
+    def stats(self):
+        with self._lock:
+            marks = list(self._dirty.values()) + ([self._everyone_since] if self._everyone_since is not None else [])
+            return {
+                "pending_users": len(self._dirty),
+                "full_refresh_pending": self._everyone_since is not None,
+                "oldest_pending_seconds": (time.monotonic() - min(marks)) if marks else 0.0,
+                "refreshes": self.refreshes,
+                "full_refreshes": self.full_refreshes,
+                "refreshed_users": self.refreshed_users,
+                "failed_refreshes": self.failed_refreshes,
+                "average_refresh_seconds": (self.total_refresh_seconds / self.refreshes) if self.refreshes else 0.0,
+                "max_refresh_seconds": self.max_refresh_seconds,
+            }
@@ -0,0 +1,599 @@
+# Load-testing and benchmark harness for the Project Management API
+#
+# Builds a database of configurable size (with generate_data.py), replays a weighted mix of API calls (the mix is read from a
+# JSONL file, one {"operation": ..., "weight": ...} per line) and reports throughput and p50/p95/p99
+# latency per endpoint. Results are saved as JSON so runs can be compared between commits.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench.py run --mode inprocess --clients 4 --requests 5000 --output before.json
+#   python benchmarks/bench.py run --mode http --clients 16 --duration 30 --output after.json
+#   python benchmarks/bench.py run --mode http --url http://127.0.0.1:5000 ...   (server already running)
+#   python benchmarks/bench.py compare before.json after.json
+#   python benchmarks/bench.py scale --workers 1,2,4 --clients 16 --duration 20   (backend/serve.py, one run per worker count)
+#   python benchmarks/bench.py servers --clients 16,64,256 --duration 20   (backend/serve.py against backend/asgi.py)
+
+# import the standard library modules used to drive clients and report results
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+# Paths used to locate the backend and the data generator
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCH_DIR, '..')
+BACKEND_DIR = os.path.join(REPO_DIR, 'backend')
+DEFAULT_WORKLOAD = os.path.join(BENCH_DIR, 'workload.jsonl')
+sys.path.insert(0, REPO_DIR)
+
+# import the bulk data generator used to build benchmark databases
+import generate_data
+
+# Allowed task statuses, as in the API
+STATUSES = ['Not Started', 'In Progress', 'Completed']
+
+
+
+# Read the operation mix from a JSONL file
+def load_workload(path):
+    mix = []
+    with open(path) as workload:
+        for line in workload:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                mix.append((entry['operation'], float(entry.get('weight', 1))))
+    return mix
+
+
+
+# Snapshot of the ids a client can act on, read once before the run
+def load_fixtures(path):
+    conn = sqlite3.connect(path)
+    managers = [row[0] for row in conn.execute("SELECT user_id FROM users WHERE role = 'Manager'")]
+    members = {row[0]: row[1] for row in conn.execute("SELECT user_id, username FROM users WHERE role = 'Team Member'")}
+    projects = [row[0] for row in conn.execute('SELECT project_id FROM projects')]
+    tasks_by_member = {}
+    for task_id, user_id in conn.execute('SELECT task_id, assigned_user_id FROM tasks WHERE assigned_user_id IS NOT NULL'):
+        tasks_by_member.setdefault(user_id, []).append(task_id)
+    conn.close()
+
+    # Only members with at least one task can update statuses or log time
+    members = {user_id: name for user_id, name in members.items() if user_id in tasks_by_member}
+    return {"managers": managers, "members": members, "projects": projects, "tasks_by_member": tasks_by_member}
+
+
+
+# One simulated client: turns operation names into concrete requests
+# Keeps the projects and tasks it created so it only deletes its own rows
+class Client:
+
+    def __init__(self, fixtures, seed):
+        self.rng = random.Random(seed)
+        self.fixtures = fixtures
+        self.member_ids = list(fixtures['members'])
+        self.created_projects = []
+        self.created_tasks = []
+
+    def manager(self):
+        return {'user_id': str(self.rng.choice(self.fixtures['managers']))}
+
+    def member(self):
+        user_id = self.rng.choice(self.member_ids)
+        return user_id, {'user_id': str(user_id)}
+
+    # Return (endpoint label, method, path, headers, json body)
+    def next_request(self, operation):
+        rng = self.rng
+
+        if operation == 'login':
+            user_id = rng.choice(self.member_ids)
+            return 'POST /login', 'POST', '/login', {}, {'username': self.fixtures['members'][user_id], 'password': 'password123'}
+
+        if operation == 'create_project':
+            return 'POST /projects', 'POST', '/projects', self.manager(), {'project_name': f'Bench {rng.random():.6f}', 'description': 'created by bench'}
+
+        if operation == 'view_project':
+            return 'GET /projects/<id>', 'GET', f"/projects/{rng.choice(self.fixtures['projects'])}", self.manager(), None
+
+        if operation == 'view_project_overview':
+            return 'GET /projects/<id>/overview', 'GET', f"/projects/{rng.choice(self.fixtures['projects'])}/overview", self.manager(), None
+
+        if operation == 'update_project':
+            return 'PUT /projects/<id>', 'PUT', f"/projects/{rng.choice(self.fixtures['projects'])}", self.manager(), {'description': f'updated {rng.random():.6f}'}
+
+        if operation == 'delete_project' and self.created_projects:
+            return 'DELETE /projects/<id>', 'DELETE', f'/projects/{self.created_projects.pop()}', self.manager(), None
+
+        if operation == 'create_task' or (operation == 'delete_task' and not self.created_tasks):
+            return 'POST /tasks', 'POST', '/tasks', self.manager(), {
+                'project_id': rng.choice(self.fixtures['projects']), 'task_name': f'Bench task {rng.random():.6f}',
+                'status': rng.choice(STATUSES)}
+
+        if operation == 'delete_task':
+            return 'DELETE /tasks/<id>', 'DELETE', f'/tasks/{self.created_tasks.pop()}', self.manager(), None
+
+        if operation == 'edit_task':
+            user_id = rng.choice(self.member_ids)
+            task_id = rng.choice(self.fixtures['tasks_by_member'][user_id])
+            return 'PUT /tasks/<id>', 'PUT', f'/tasks/{task_id}', self.manager(), {'description': f'edited {rng.random():.6f}'}
+
+        if operation == 'view_assigned_tasks':
+            _, headers = self.member()
+            return 'GET /tasks/assigned', 'GET', '/tasks/assigned', headers, None
+
+        if operation == 'update_task_status':
+            user_id, headers = self.member()
+            task_id = rng.choice(self.fixtures['tasks_by_member'][user_id])
+            return 'PUT /tasks/<id>/status', 'PUT', f'/tasks/{task_id}/status', headers, {'status': rng.choice(STATUSES)}
+
+        if operation == 'log_time':
+            user_id, headers = self.member()
+            task_id = rng.choice(self.fixtures['tasks_by_member'][user_id])
+            return 'POST /tasks/<id>/log-time', 'POST', f'/tasks/{task_id}/log-time', headers, {'hours_spent': round(rng.uniform(0.25, 4), 2)}
+
+        # Full-text search: two words from the generator's vocabulary, a prefix, a filtered search, and projects
+        if operation == 'search_tasks':
+            query = f'{rng.choice(generate_data.SUBJECTS)} {rng.choice(generate_data.OBJECTS)}'
+            return 'GET /search (tasks)', 'GET', f'/search?q={query.replace(" ", "+")}', self.manager(), None
+
+        if operation == 'search_prefix':
+            prefix = rng.choice(generate_data.SUBJECTS)[:rng.randint(2, 4)]
+            return 'GET /search (prefix)', 'GET', f'/search?q={prefix}*', self.manager(), None
+
+        if operation == 'search_filtered':
+            project_id = rng.choice(self.fixtures['projects'])
+            return 'GET /search (filtered)', 'GET', f'/search?q={rng.choice(generate_data.VERBS)}&project_id={project_id}&status={rng.choice(STATUSES).replace(" ", "+")}', self.manager(), None
+
+        if operation == 'search_projects':
+            return 'GET /search (projects)', 'GET', f'/search?type=projects&q={rng.choice(generate_data.SUBJECTS)}', self.manager(), None
+
+        if operation == 'search_member':
+            _, headers = self.member()
+            return 'GET /search (member)', 'GET', f'/search?q={rng.choice(generate_data.VERBS)}', headers, None
+
+        # delete_project with nothing to delete yet: create one instead
+        return self.next_request('create_project')
+
+    # Remember rows created by this client so later delete operations have something to remove
+    def record(self, label, status, body):
+        if label == 'POST /projects' and status == 201 and isinstance(body, dict) and 'project_id' in body:
+            self.created_projects.append(body['project_id'])
+        if label == 'POST /tasks' and status == 201 and isinstance(body, dict) and 'task_id' in body:
+            self.created_tasks.append(body['task_id'])
+
+
+
+# Send one request through the Flask test client
+def make_inprocess_sender(app):
+    local = threading.local()
+
+    def send(method, path, headers, body):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        response = local.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    return send
+
+
+
+# Send one request over HTTP (one keep-alive connection per client thread)
+def make_http_sender(url):
+    parsed = urlparse(url)
+    local = threading.local()
+
+    def send(method, path, headers, body):
+        if not hasattr(local, 'conn'):
+            local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        # HTTP servers drop header names containing underscores, so send `user_id` as `User-Id`
+        # (Flask reads both spellings through the same WSGI key)
+        headers = {name.replace('_', '-'): value for name, value in headers.items()}
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            local.conn.request(method, path, body=payload, headers=headers)
+            response = local.conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect on the next request
+            local.conn.close()
+            del local.conn
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+    return send
+
+
+
+# Start the app on a free local port in a background thread (threaded werkzeug server)
+def start_local_server(app):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    # Per-request access logging would dominate the measurements
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+
+# Start backend/serve.py (or another entry point taking the same options, e.g. asgi.py) with `workers` processes
+# on a free port and wait until every worker is ready
+def start_served(database, workers, script='serve.py'):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    env = dict(os.environ, PROJECTS_DB=database, SECRET_KEY=os.environ.get('SECRET_KEY', 'bench'))
+    process = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, script), '--workers', str(workers), '--port', str(port)],
+                               cwd=BACKEND_DIR, env=env, stderr=subprocess.PIPE, text=True)
+
+    # Each worker logs a line once it has warmed up; anything logged afterwards is drained so the pipe never fills
+    ready = 0
+    for line in process.stderr:
+        if 'ready' in line:
+            ready += 1
+            if ready == workers:
+                break
+    if ready < workers:
+        process.wait()
+        raise RuntimeError(f'{script} exited before its workers were ready (status {process.returncode})')
+    threading.Thread(target=process.stderr.read, daemon=True).start()
+    return process, f'http://127.0.0.1:{port}'
+
+
+
+# Nearest-rank percentile of a sorted list
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+
+# Summarize latencies (seconds) into milliseconds
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": (len(latencies) / elapsed) if elapsed else 0.0,
+        "mean_ms": (1000 * sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "max_ms": 1000 * latencies[-1] if latencies else 0.0,
+    }
+
+
+
+# Replay the workload with `clients` concurrent threads until `requests` calls or `duration` seconds
+# A client that gets a 503 waits `retry_after` seconds before its next request, as the server's Retry-After asks
+def run_workload(send, fixtures, mix, clients=4, requests=2000, duration=None, seed=0, retry_after=0.0):
+    operations = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    lock = threading.Lock()
+    latencies = {}
+    errors = {}
+    issued = [0]
+    deadline = (time.perf_counter() + duration) if duration else None
+
+    def worker(index):
+        client = Client(fixtures, seed * 1000 + index)
+        while True:
+            with lock:
+                if (deadline is None and issued[0] >= requests) or (deadline is not None and time.perf_counter() >= deadline):
+                    return
+                issued[0] += 1
+
+            label, method, path, headers, body = client.next_request(client.rng.choices(operations, weights)[0])
+            started = time.perf_counter()
+            try:
+                status, payload = send(method, path, headers, body)
+            except Exception:
+                status, payload = 599, None
+            elapsed = time.perf_counter() - started
+
+            client.record(label, status, payload)
+            with lock:
+                latencies.setdefault(label, []).append(elapsed)
+                if status >= 400:
+                    errors[label] = errors.get(label, 0) + 1
+            if status == 503 and retry_after:
+                time.sleep(retry_after)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {label: summarize(values, errors.get(label, 0), elapsed) for label, values in sorted(latencies.items())}
+    everything = [value for values in latencies.values() for value in values]
+    return {"elapsed_seconds": elapsed, "total": summarize(everything, sum(errors.values()), elapsed), "endpoints": endpoints}
+
+
+
+# Current git commit, so saved results can be matched to the code that produced them
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+
+# Import the Flask app against the given database
+def load_app(database):
+    os.environ['PROJECTS_DB'] = database
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+    backend.app.config['DATABASE'] = database
+    return backend.app
+
+
+
+# Print a results table
+def print_report(results):
+    print(f"{'endpoint':32} {'count':>7} {'err':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, row in list(results['endpoints'].items()) + [('TOTAL', results['total'])]:
+        print(f"{label:32} {row['count']:7d} {row['errors']:5d} {row['throughput_rps']:9.1f} "
+              f"{row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f}")
+
+
+
+# Build (or reuse) the benchmark database
+def prepare_database(args):
+    database = args.db
+    if database is None:
+        database = os.path.join(tempfile.mkdtemp(prefix='pm-bench-'), 'bench.db')
+    if not os.path.exists(database):
+        generate_data.generate(database, users=args.users, projects=args.projects, tasks=args.tasks, logs=args.logs,
+                               seed=args.seed, quiet=True)
+    return database
+
+
+
+def run(args):
+    database = prepare_database(args)
+    fixtures = load_fixtures(database)
+    mix = load_workload(args.workload)
+
+    # Choose how requests are sent
+    server = None
+    if args.mode == 'inprocess':
+        send = make_inprocess_sender(load_app(database))
+    else:
+        url = args.url
+        if url is None:
+            server, url = start_local_server(load_app(database))
+        send = make_http_sender(url)
+
+    try:
+        results = run_workload(send, fixtures, mix, clients=args.clients, requests=args.requests, duration=args.duration, seed=args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    results['meta'] = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "mode": args.mode,
+        "url": args.url,
+        "clients": args.clients,
+        "database": database,
+        "workload": {name: weight for name, weight in mix},
+        "dataset": {"users": args.users, "projects": args.projects, "tasks": args.tasks, "logs": args.logs, "seed": args.seed},
+    }
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print(f'Results saved to {args.output}')
+    return 0
+
+
+
+# Replay the same workload against backend/serve.py once per worker count, to see how throughput scales
+def scale(args):
+    database = prepare_database(args)
+    fixtures = load_fixtures(database)
+    mix = load_workload(args.workload)
+
+    runs = []
+    for workers in [int(count) for count in args.workers.split(',')]:
+        process, url = start_served(database, workers)
+        try:
+            results = run_workload(make_http_sender(url), fixtures, mix, clients=args.clients, requests=args.requests,
+                                   duration=args.duration, seed=args.seed)
+        finally:
+            process.terminate()
+            process.wait()
+        results['workers'] = workers
+        runs.append(results)
+
+    baseline = runs[0]['total']['throughput_rps'] or 1.0
+    print(f"{'workers':>7} {'rps':>9} {'speedup':>8} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for results in runs:
+        total = results['total']
+        print(f"{results['workers']:7d} {total['throughput_rps']:9.1f} {total['throughput_rps'] / baseline:7.2f}x {total['errors']:5d} "
+              f"{total['p50_ms']:8.2f} {total['p95_ms']:8.2f} {total['p99_ms']:8.2f}")
+
+    if args.output:
+        meta = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "cpus": os.cpu_count(),
+            "clients": args.clients,
+            "database": database,
+            "workload": {name: weight for name, weight in mix},
+            "dataset": {"users": args.users, "projects": args.projects, "tasks": args.tasks, "logs": args.logs, "seed": args.seed},
+        }
+        with open(args.output, 'w') as output:
+            json.dump({"runs": runs, "meta": meta}, output, indent=2)
+        print(f'Results saved to {args.output}')
+    return 0
+
+
+
+# Entry point of each server compared by `servers`
+SERVERS = {'sync': 'serve.py', 'asgi': 'asgi.py'}
+
+
+
+# Replay the same workload against the threaded WSGI server (serve.py) and the ASGI server (asgi.py)
+# at each client count; requests the ASGI server turns away (503) are counted as errors, and `ok rps`
+# only counts the requests that succeeded
+def servers(args):
+    database = prepare_database(args)
+    fixtures = load_fixtures(database)
+    mix = load_workload(args.workload)
+
+    runs = []
+    for clients in [int(count) for count in args.clients.split(',')]:
+        for name, script in SERVERS.items():
+            process, url = start_served(database, args.workers, script)
+            try:
+                results = run_workload(make_http_sender(url), fixtures, mix, clients=clients, requests=args.requests,
+                                       duration=args.duration, seed=args.seed, retry_after=args.retry_after)
+            finally:
+                process.terminate()
+                process.wait()
+            total = results['total']
+            total['ok_rps'] = (total['count'] - total['errors']) / results['elapsed_seconds']
+            results['server'] = name
+            results['clients'] = clients
+            runs.append(results)
+
+    print(f"{'server':>6} {'clients':>7} {'rps':>9} {'ok rps':>9} {'err':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for results in runs:
+        total = results['total']
+        print(f"{results['server']:>6} {results['clients']:7d} {total['throughput_rps']:9.1f} {total['ok_rps']:9.1f} {total['errors']:6d} "
+              f"{total['p50_ms']:8.2f} {total['p95_ms']:8.2f} {total['p99_ms']:8.2f} {total['max_ms']:8.2f}")
+
+    if args.output:
+        meta = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "cpus": os.cpu_count(),
+            "workers": args.workers,
+            "retry_after": args.retry_after,
+            "database": database,
+            "workload": {name: weight for name, weight in mix},
+            "dataset": {"users": args.users, "projects": args.projects, "tasks": args.tasks, "logs": args.logs, "seed": args.seed},
+        }
+        with open(args.output, 'w') as output:
+            json.dump({"runs": runs, "meta": meta}, output, indent=2)
+        print(f'Results saved to {args.output}')
+    return 0
+
+
+
+# Compare two saved result files endpoint by endpoint
+def compare(args):
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+
+    print(f"baseline {baseline['meta'].get('commit')}  ->  candidate {candidate['meta'].get('commit')}")
+    print(f"{'endpoint':32} {'rps':>18} {'p50 ms':>18} {'p99 ms':>18}")
+    rows = dict(candidate['endpoints'], TOTAL=candidate['total'])
+    before = dict(baseline['endpoints'], TOTAL=baseline['total'])
+    for label, new in rows.items():
+        old = before.get(label)
+        if old is None:
+            continue
+        cells = []
+        for key in ('throughput_rps', 'p50_ms', 'p99_ms'):
+            change = ((new[key] - old[key]) / old[key] * 100) if old[key] else 0.0
+            cells.append(f'{new[key]:9.2f} ({change:+6.1f}%)')
+        print(f'{label:32} ' + ' '.join(cells))
+    return 0
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Project Management API')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='replay the workload and report latencies')
+    run_parser.add_argument('--mode', choices=['inprocess', 'http'], default='inprocess')
+    run_parser.add_argument('--url', help='base URL of a running server (http mode); a local server is started if omitted')
+    run_parser.add_argument('--clients', type=int, default=4, help='number of concurrent clients')
+    run_parser.add_argument('--requests', type=int, default=2000, help='total number of requests')
+    run_parser.add_argument('--duration', type=float, help='run for this many seconds instead of a fixed request count')
+    run_parser.add_argument('--workload', default=DEFAULT_WORKLOAD, help='JSONL file with the operation mix')
+    run_parser.add_argument('--db', help='database to use (built with the sizes below if it does not exist)')
+    run_parser.add_argument('--users', type=int, default=100)
+    run_parser.add_argument('--projects', type=int, default=100)
+    run_parser.add_argument('--tasks', type=int, default=2000)
+    run_parser.add_argument('--logs', type=int, default=4000)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', help='save the results to this JSON file')
+
+    scale_parser = commands.add_parser('scale', help='replay the workload against serve.py with increasing worker counts')
+    scale_parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts to measure')
+    scale_parser.add_argument('--clients', type=int, default=16, help='number of concurrent clients')
+    scale_parser.add_argument('--requests', type=int, default=2000, help='total number of requests per run')
+    scale_parser.add_argument('--duration', type=float, help='run each worker count for this many seconds instead')
+    scale_parser.add_argument('--workload', default=DEFAULT_WORKLOAD, help='JSONL file with the operation mix')
+    scale_parser.add_argument('--db', help='database to use (built with the sizes below if it does not exist)')
+    scale_parser.add_argument('--users', type=int, default=100)
+    scale_parser.add_argument('--projects', type=int, default=100)
+    scale_parser.add_argument('--tasks', type=int, default=2000)
+    scale_parser.add_argument('--logs', type=int, default=4000)
+    scale_parser.add_argument('--seed', type=int, default=0)
+    scale_parser.add_argument('--output', help='save the results to this JSON file')
+
+    servers_parser = commands.add_parser('servers', help='replay the workload against serve.py and asgi.py at several client counts')
+    servers_parser.add_argument('--clients', default='16,64,256', help='comma-separated client counts to measure')
+    servers_parser.add_argument('--workers', type=int, default=1, help='worker processes per server')
+    servers_parser.add_argument('--retry-after', type=float, default=1.0,
+                                help='seconds a client waits after a 503 (0: retry at once, like a client ignoring Retry-After)')
+    servers_parser.add_argument('--requests', type=int, default=2000, help='total number of requests per run')
+    servers_parser.add_argument('--duration', type=float, help='run each server and client count for this many seconds instead')
+    servers_parser.add_argument('--workload', default=DEFAULT_WORKLOAD, help='JSONL file with the operation mix')
+    servers_parser.add_argument('--db', help='database to use (built with the sizes below if it does not exist)')
+    servers_parser.add_argument('--users', type=int, default=100)
+    servers_parser.add_argument('--projects', type=int, default=100)
+    servers_parser.add_argument('--tasks', type=int, default=2000)
+    servers_parser.add_argument('--logs', type=int, default=4000)
+    servers_parser.add_argument('--seed', type=int, default=0)
+    servers_parser.add_argument('--output', help='save the results to this JSON file')
+
+    compare_parser = commands.add_parser('compare', help='compare two saved result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+
+    args = parser.parse_args(argv)
+    if args.command == 'scale':
+        return scale(args)
+    if args.command == 'servers':
+        return servers(args)
+    return run(args) if args.command == 'run' else compare(args)
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# Bulk data generator for scale testing
+# Builds a realistic projects database (users, projects, team memberships, tasks and task logs)
+# deterministically from a seed. seed_database.py remains the small hand-written fixture.
+#
+# Rows are streamed into batched executemany calls inside large transactions, with journaling
+# turned off during the load; indexes, triggers and derived counters are created afterwards by
+# the schema migrations in backend/migrations.py.
+#
+# Usage:
+#   python generate_data.py --db big.db --users 10000 --projects 100000 --tasks 10000000 --logs 50000000
+#   python generate_data.py --db small.db --users 50 --projects 100 --tasks 2000 --logs 4000 --seed 7
+
+# import the standard library modules used to generate and load the data
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+# Paths to the schema and the migration runner
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(REPO_DIR, 'projects_schema.sql')
+sys.path.insert(0, os.path.join(REPO_DIR, 'backend'))
+
+# import the migration runner to build indexes and derived tables once the rows are loaded
+import migrations
+
+# Allowed task statuses
+STATUSES = ['Not Started', 'In Progress', 'Completed']
+
+# Every generated date falls in this window
+EPOCH = date(2023, 1, 1)
+WINDOW_DAYS = 3 * 365
+
+# Vocabulary for project and task names and descriptions, so full-text search has realistic text to index
+VERBS = ['design', 'implement', 'review', 'test', 'deploy', 'migrate', 'refactor', 'document', 'fix', 'update',
+         'plan', 'audit', 'optimize', 'configure', 'integrate', 'monitor']
+SUBJECTS = ['billing', 'checkout', 'login', 'search', 'reporting', 'dashboard', 'invoice', 'payment', 'database', 'cache',
+            'api', 'mobile', 'onboarding', 'notification', 'analytics', 'inventory', 'shipping', 'pricing', 'profile', 'settings',
+            'export', 'import', 'backup', 'security', 'permissions', 'calendar', 'chat', 'email', 'upload', 'workflow']
+OBJECTS = ['service', 'page', 'module', 'pipeline', 'schema', 'endpoint', 'integration', 'tests', 'docs', 'report',
+           'flow', 'job', 'queue', 'widget', 'migration', 'release', 'feature', 'bug', 'index', 'config']
+
+
+
+# Split `total` items over `buckets` according to a distribution of bucket sizes
+#   uniform  every bucket gets about the same number
+#   zipf     a few buckets get most of the items (1/rank weights, shuffled)
+def distribute(rng, total, buckets, distribution):
+    if buckets == 0:
+        return []
+    if distribution == 'uniform':
+        weights = [1.0] * buckets
+    else:
+        weights = [1.0 / rank for rank in range(1, buckets + 1)]
+        rng.shuffle(weights)
+
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+
+    # The rounding remainder is smaller than the number of buckets; hand it out one item per bucket
+    for index in rng.sample(range(buckets), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+
+# Insert rows from a generator in batches, committing every `commit_every` rows
+def load(conn, sql, rows, batch_size, commit_every):
+    batch = []
+    loaded = 0
+    uncommitted = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            loaded += len(batch)
+            uncommitted += len(batch)
+            batch = []
+            if uncommitted >= commit_every:
+                conn.commit()
+                uncommitted = 0
+    if batch:
+        conn.executemany(sql, batch)
+        loaded += len(batch)
+    conn.commit()
+    return loaded
+
+
+
+def generate(path, users=50, projects=100, tasks=2000, logs=4000, manager_ratio=0.05, team_size=5,
+             task_distribution='zipf', log_distribution='uniform', unassigned_ratio=0.1,
+             status_weights=(0.4, 0.35, 0.25), seed=0, batch_size=50000, commit_every=1000000, cache_mb=512, quiet=False):
+    started = time.perf_counter()
+
+    def report(message):
+        if not quiet:
+            print(f'[{time.perf_counter() - started:7.1f}s] {message}')
+
+    if os.path.exists(path):
+        raise FileExistsError(f'{path} already exists')
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+
+    # Relax durability for the load: no rollback journal, no fsyncs, one exclusive writer, a large cache
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA locking_mode = EXCLUSIVE')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute(f'PRAGMA cache_size = {-1024 * int(cache_mb)}')
+
+    with open(SCHEMA_PATH) as schema:
+        conn.executescript(schema.read())
+
+    # Users: the first `managers` ids are Managers, the rest Team Members
+    managers = max(1, int(users * manager_ratio))
+    member_ids = list(range(managers + 1, users + 1))
+    if not member_ids:
+        raise ValueError('At least one Team Member is required')
+
+    def user_rows():
+        for user_id in range(1, users + 1):
+            role = 'Manager' if user_id <= managers else 'Team Member'
+            username = f'manager{user_id}' if role == 'Manager' else f'member{user_id}'
+            yield (user_id, username, 'password123', f'User {user_id}', role, f'{username}@example.com')
+
+    load(conn, 'INSERT INTO users (user_id, username, password, name, role, email) VALUES (?, ?, ?, ?, ?, ?)',
+         user_rows(), batch_size, commit_every)
+    report(f'{users} users ({managers} managers)')
+
+    # Projects: random start date and a 1-12 month duration; projects that already ended are Completed
+    project_dates = []
+
+    def project_rows():
+        today = EPOCH + timedelta(days=WINDOW_DAYS)
+        for project_id in range(1, projects + 1):
+            start = EPOCH + timedelta(days=rng.randrange(WINDOW_DAYS - 30))
+            end = start + timedelta(days=rng.randint(30, 365))
+            project_dates.append((start.toordinal(), min(end, today).toordinal()))
+            status = 'Completed' if end < today and rng.random() < 0.8 else 'In Progress'
+            subject, area, kind = rng.choice(SUBJECTS), rng.choice(SUBJECTS), rng.choice(OBJECTS)
+            yield (project_id, f'{subject.title()} {kind} {project_id}', f'{rng.choice(VERBS).title()} the {subject} {kind} for the {area} team',
+                   start.isoformat(), end.isoformat(), status)
+
+    load(conn, 'INSERT INTO projects (project_id, project_name, description, start_date, end_date, status) VALUES (?, ?, ?, ?, ?, ?)',
+         project_rows(), batch_size, commit_every)
+    report(f'{projects} projects')
+
+    # Team memberships: every project gets up to `team_size` distinct Team Members
+    teams = []
+
+    def team_rows():
+        size = min(team_size, len(member_ids))
+        for project_id in range(1, projects + 1):
+            team = rng.sample(member_ids, size)
+            teams.append(team)
+            for user_id in team:
+                yield (project_id, user_id)
+
+    load(conn, 'INSERT INTO project_team_members (project_id, user_id) VALUES (?, ?)', team_rows(), batch_size, commit_every)
+    report(f'{projects * min(team_size, len(member_ids))} team memberships')
+
+    # Tasks per project and logs per task follow the requested distributions
+    # (unassigned tasks get no logs, so their share is spread over the assigned ones)
+    tasks_per_project = distribute(rng, tasks, projects, task_distribution)
+    logs_per_task = distribute(rng, round(logs / (1 - unassigned_ratio)) if unassigned_ratio < 1 else 0, tasks, log_distribution)
+
+    # Tasks and their logs are generated together so each task's hours_logged is the sum of its logs
+    log_rows = []
+    task_sql = ('INSERT INTO tasks (task_id, project_id, task_name, description, due_date, status, assigned_user_id, hours_logged) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+    log_sql = 'INSERT INTO task_logs (task_id, user_id, hours_spent, timestamp) VALUES (?, ?, ?, ?)'
+    task_batch = []
+    loaded_tasks = 0
+    loaded_logs = 0
+    uncommitted = 0
+    task_id = 0
+
+    # Precomputed date and time-of-day strings keep per-row formatting out of the inner loop
+    first_day = EPOCH.toordinal()
+    day_names = [date.fromordinal(first_day + offset).isoformat() for offset in range(WINDOW_DAYS + 366)]
+    clock_times = [f'{hour:02d}:{minute:02d}:00' for hour in range(8, 19) for minute in range(60)]
+    random_value = rng.random
+
+    # Pick a word from a list with the fast random_value() instead of rng.choice()
+    def word(words):
+        return words[int(random_value() * len(words))]
+
+    for project_index, count in enumerate(tasks_per_project):
+        project_id = project_index + 1
+        start, end = project_dates[project_index]
+        span = end - start + 1
+        team = teams[project_index]
+
+        for _ in range(count):
+            task_id += 1
+            status = rng.choices(STATUSES, status_weights)[0]
+            assignee = None if rng.random() < unassigned_ratio else rng.choice(team)
+            due = day_names[start + int(random_value() * span) - first_day]
+
+            # Logs are only written by the assignee, between the project's start and end
+            hours = 0.0
+            if assignee is not None:
+                for _ in range(logs_per_task[task_id - 1]):
+                    spent = round(0.25 + random_value() * 7.75, 2)
+                    hours += spent
+                    logged = day_names[start + int(random_value() * span) - first_day]
+                    log_rows.append((task_id, assignee, spent, f'{logged} {clock_times[int(random_value() * len(clock_times))]}'))
+
+            subject = word(SUBJECTS)
+            task_batch.append((task_id, project_id, f'{word(VERBS).title()} {subject} {word(OBJECTS)}',
+                               f'{word(VERBS).title()} the {subject} {word(OBJECTS)} and {word(VERBS)} the {word(SUBJECTS)} {word(OBJECTS)}', due,
+                               status, assignee, round(hours, 2)))
+
+            if len(task_batch) >= batch_size:
+                conn.executemany(task_sql, task_batch)
+                loaded_tasks += len(task_batch)
+                task_batch = []
+            if len(log_rows) >= batch_size:
+                conn.executemany(log_sql, log_rows)
+                loaded_logs += len(log_rows)
+                uncommitted += len(log_rows)
+                log_rows = []
+                if uncommitted >= commit_every:
+                    conn.commit()
+                    uncommitted = 0
+                    report(f'{loaded_tasks} tasks, {loaded_logs} task logs')
+
+    if task_batch:
+        conn.executemany(task_sql, task_batch)
+        loaded_tasks += len(task_batch)
+    if log_rows:
+        conn.executemany(log_sql, log_rows)
+        loaded_logs += len(log_rows)
+    conn.commit()
+    report(f'{loaded_tasks} tasks, {loaded_logs} task logs')
+
+    # Back to a normal journal before building indexes and derived tables
+    conn.execute('PRAGMA locking_mode = NORMAL')
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.execute('PRAGMA synchronous = NORMAL')
+
+    # hours_logged was computed while loading, so the backfill migration has nothing to do
+    migrations.ensure_migrations_table(conn)
+    conn.execute("INSERT INTO schema_migrations (version, name) VALUES (4, 'backfill tasks.hours_logged from task_logs')")
+    conn.commit()
+
+    applied = migrations.apply_migrations(conn)
+    report(f'applied migrations {applied}')
+
+    # Give the query planner statistics for the freshly built indexes
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    report(f'done: {os.path.getsize(path) / 1e6:.1f} MB')
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a large, deterministic projects database for scale testing')
+    parser.add_argument('--db', required=True, help='path of the database to create (must not exist)')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--tasks', type=int, default=10000000)
+    parser.add_argument('--logs', type=int, default=50000000, help='approximate number of task logs')
+    parser.add_argument('--manager-ratio', type=float, default=0.05, help='share of users who are Managers')
+    parser.add_argument('--team-size', type=int, default=5, help='Team Members per project')
+    parser.add_argument('--task-distribution', choices=['uniform', 'zipf'], default='zipf', help='how tasks are spread over projects')
+    parser.add_argument('--log-distribution', choices=['uniform', 'zipf'], default='uniform', help='how logs are spread over tasks')
+    parser.add_argument('--unassigned-ratio', type=float, default=0.1, help='share of tasks without an assignee')
+    parser.add_argument('--status-weights', type=float, nargs=3, default=[0.4, 0.35, 0.25], metavar=('NOT_STARTED', 'IN_PROGRESS', 'COMPLETED'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=50000, help='rows per executemany call')
+    parser.add_argument('--commit-every', type=int, default=1000000, help='rows per transaction')
+    parser.add_argument('--cache-mb', type=int, default=512, help='SQLite page cache used during the load')
+    args = parser.parse_args(argv)
+
+    generate(args.db, users=args.users, projects=args.projects, tasks=args.tasks, logs=args.logs,
+             manager_ratio=args.manager_ratio, team_size=args.team_size, task_distribution=args.task_distribution,
+             log_distribution=args.log_distribution, unassigned_ratio=args.unassigned_ratio,
+             status_weights=tuple(args.status_weights), seed=args.seed, batch_size=args.batch_size,
+             commit_every=args.commit_every, cache_mb=args.cache_mb)
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())